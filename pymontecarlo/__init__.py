@@ -10,8 +10,6 @@ del get_versions
 # Standard library modules.
 import os
 import sys
-import importlib
-import pkgutil
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,10 +36,12 @@ pint.set_application_registry(unit_registry)
 
 # --- Plug-ins
 
-pymontecarlo_plugins = {
-    name: importlib.import_module(name)
-    for finder, name, ispkg in pkgutil.iter_modules()
-    if name.startswith("pymontecarlo_")
-}
 
-logger.debug("Plug-ins: {}".format(", ".join(pymontecarlo_plugins)))
+def __getattr__(name):
+    # Plug-ins are only imported when first used (see pymontecarlo.plugin)
+    if name == "pymontecarlo_plugins":
+        from pymontecarlo.plugin import load_plugins
+
+        return load_plugins()
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
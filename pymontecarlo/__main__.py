@@ -1,7 +1,14 @@
 """"""
 
 # Standard library modules.
+import os
+import sys
+import time
+import runpy
+import asyncio
+import itertools
 import argparse
+import contextlib
 import multiprocessing
 import logging
 
@@ -10,9 +17,17 @@ logger = logging.getLogger(__name__)
 # Third party modules.
 
 # Local modules.
+from pymontecarlo.options.options import Options, OptionsBuilder
+from pymontecarlo.project import Project, ProjectWriter
+from pymontecarlo.runner.helper import run_async
+from pymontecarlo.util.token import Token, TokenState, TqdmToken
+from pymontecarlo.util.threadutil import RepeatTimer
+from pymontecarlo.util.human import human_time
 
 # Globals and constants variables.
 
+OPTIONS_VARIABLES = ("options", "list_options", "builder")
+
 
 def _create_parser():
     prog = "pymontecarlo"
@@ -23,33 +38,192 @@ def _create_parser():
         "-v", "--verbose", action="store_true", help="Run in debug mode"
     )
 
-    parser.add_argument("-o", required=False, metavar="FILE", help="Path to project")
+    subparsers = parser.add_subparsers(dest="command")
 
-    parser.add_argument(
+    parser_run = subparsers.add_parser(
+        "run",
+        help="Run simulations",
+        description="Run the simulations defined in files",
+    )
+
+    parser_run.add_argument(
+        "inputs",
+        nargs="+",
+        metavar="INPUT",
+        help="Python file defining the options or the sweep to simulate "
+        "(variable {}), or project file to simulate again".format(
+            ", ".join(OPTIONS_VARIABLES)
+        ),
+    )
+
+    parser_run.add_argument(
+        "-o", required=False, metavar="FILE", help="Path to project"
+    )
+
+    parser_run.add_argument(
         "-s", action="store_true", help="Skip existing simulations in project"
     )
 
+    parser_run.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Replace the project if it exists (instead of skipping its "
+        "simulations with -s)",
+    )
+
     nprocessors = multiprocessing.cpu_count()
-    parser.add_argument(
+    parser_run.add_argument(
         "-n", type=int, default=nprocessors, help="Number of processors to use"
     )
 
+    parser_run.add_argument(
+        "--interval",
+        type=float,
+        default=10.0,
+        metavar="SECONDS",
+        help="Interval between two progress summaries, when the output is not "
+        "a terminal",
+    )
+
     return parser
 
 
+def _iter_options(obj):
+    if isinstance(obj, Options):
+        yield obj
+    elif isinstance(obj, OptionsBuilder):
+        yield from obj.iterbuild()
+    else:
+        for item in obj:
+            yield from _iter_options(item)
+
+
+def _load_options(filepath):
+    """
+    Returns an iterator over the options defined in a Python file or the
+    options of the simulations of a project file.
+    The options of a sweep are only built as they are submitted.
+    """
+    if os.path.splitext(filepath)[1] == ".py":
+        variables = runpy.run_path(filepath)
+        objs = [variables[name] for name in OPTIONS_VARIABLES if name in variables]
+        if not objs:
+            raise ValueError(
+                "No variable {} in {}".format(" or ".join(OPTIONS_VARIABLES), filepath)
+            )
+        return _iter_options(objs)
+
+    project = Project.read(filepath)
+    return (simulation.options for simulation in project.simulations)
+
+
+def _create_project(filepath, skip_existing):
+    if filepath is None:
+        logger.warning("No project file (-o), results will not be saved")
+        return Project()
+
+    if skip_existing and os.path.exists(filepath):
+        project = Project.read(filepath)
+        logger.info("{} simulation(s) in {}".format(len(project.simulations), filepath))
+        return project
+
+    return Project(filepath)
+
+
+def _format_summary(token, start_time):
+    counts = token.get_state_counts("simulation")
+    return "{} done, {} failed, {} cancelled, {} running ({} elapsed)".format(
+        counts.get(TokenState.DONE, 0),
+        counts.get(TokenState.ERROR, 0),
+        counts.get(TokenState.CANCELLED, 0),
+        counts.get(TokenState.RUNNING, 0),
+        human_time(time.monotonic() - start_time) or "0 s",
+    )
+
+
+@contextlib.contextmanager
+def _print_progress(token, interval, stream):
+    """
+    Prints periodically one line summarizing the simulations, which works
+    when the output is redirected to a file (e.g. cluster jobs), contrary to
+    a progress bar.
+    """
+    start_time = time.monotonic()
+
+    def print_summary():
+        print(_format_summary(token, start_time), file=stream, flush=True)
+
+    timer = RepeatTimer(interval, print_summary)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.cancel()
+        timer.join()
+        print_summary()
+
+
+def _run(ns):
+    # Inputs are loaded first, so that errors are reported before running
+    iterable_options = itertools.chain.from_iterable(
+        [_load_options(filepath) for filepath in ns.inputs]
+    )
+
+    project = _create_project(ns.o, ns.s)
+
+    if sys.stderr.isatty():
+        token = TqdmToken("Simulations", collapse_finished=True)
+        progress = contextlib.nullcontext()
+    else:
+        token = Token("Simulations", collapse_finished=True)
+        progress = _print_progress(token, ns.interval, sys.stderr)
+
+    if project.filepath is not None:
+        writer = ProjectWriter(project)
+    else:
+        writer = contextlib.nullcontext()
+
+    with writer, progress:
+        asyncio.run(run_async(iterable_options, project, ns.n, token=token))
+
+    if project.filepath is not None:
+        print(
+            "{} simulation(s) saved in {}".format(
+                len(project.simulations), project.filepath
+            )
+        )
+
+    if token.state == TokenState.ERROR:
+        return 1
+    return 0
+
+
 def _parse(parser, ns):
     if ns.verbose:
+        logging.basicConfig(level=logging.DEBUG)
         logger.setLevel(logging.DEBUG)
 
+    if ns.command == "run":
+        # The project file is opened for writing, which would erase it
+        if ns.o and os.path.exists(ns.o) and not (ns.s or ns.overwrite):
+            parser.error(
+                "{} already exists, use -s to skip its simulations or "
+                "--overwrite to replace it".format(ns.o)
+            )
+        return _run(ns)
+
+    parser.print_help()
+    return 0
+
 
 def main():
     parser = _create_parser()
 
     ns = parser.parse_args()
 
-    _parse(parser, ns)
-    parser.print_help()
+    return _parse(parser, ns)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""
+Microbenchmarks of the hot paths of options, persistence and tabulation.
+
+The results are saved as JSON and can be compared with the results of a
+previous commit, to catch regressions::
+
+    python -m pymontecarlo.benchmark.micro --sizes 100 1000 -o new.json
+    python -m pymontecarlo.benchmark.micro --sizes 100 1000 --compare old.json
+"""
+
+# Standard library modules.
+import os
+import sys
+import math
+import copy
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import datetime
+import statistics
+import tempfile
+
+# Third party modules.
+import pyxray
+
+# Local modules.
+import pymontecarlo
+from pymontecarlo.mock import ProgramMock
+from pymontecarlo.options.material import Material
+from pymontecarlo.options.beam import GaussianBeam
+from pymontecarlo.options.sample import SubstrateSample
+from pymontecarlo.options.detector import PhotonDetector
+from pymontecarlo.options.analysis import PhotonIntensityAnalysis, KRatioAnalysis
+from pymontecarlo.options.options import Options, OptionsBuilder
+from pymontecarlo.formats.identifier import create_identifiers
+from pymontecarlo.project import Project
+from pymontecarlo.settings import Settings
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.results.photonintensity import EmittedPhotonIntensityResultBuilder
+from pymontecarlo.util.token import Token
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+SIZES = (100, 1000, 10000, 50000)
+
+_BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Registers a benchmark.
+    The decorated function takes the size and returns the function to time,
+    so that the preparation is not timed, or a tuple of the function to time
+    and a function called (untimed) before each repetition.
+    """
+
+    def decorator(setup):
+        _BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def _create_list_options(size, kratio=False):
+    program = ProgramMock()
+    detector = PhotonDetector("xray", math.radians(40.0))
+    sample = SubstrateSample(Material.from_formula("CuZn"))
+
+    list_options = []
+    for i in range(size):
+        beam = GaussianBeam(5e3 + i, 10e-9)
+        analyses = [PhotonIntensityAnalysis(detector)]
+        if kratio:
+            analyses.append(KRatioAnalysis(detector))
+        list_options.append(Options(program, beam, sample, analyses))
+
+    return list_options
+
+
+def _create_results(options, xraylines):
+    analysis = PhotonIntensityAnalysis(options.detectors[0])
+    builder = EmittedPhotonIntensityResultBuilder(analysis)
+    for xrayline in xraylines:
+        builder.add_intensity(xrayline, 1000.0, 10.0)
+    return [builder.build()]
+
+
+def _create_project(size, kratio=False):
+    """
+    Returns a project with *size* simulations with results.
+    With *kratio*, a third of the simulations are unknowns (CuZn) with a
+    k-ratio analysis and the others their standards (Cu and Zn).
+    """
+    project = Project()
+
+    if kratio:
+        list_options = []
+        for options in _create_list_options(max(1, size // 3), kratio=True):
+            list_options.append(options)
+            list_options.extend(options.analyses[-1].apply(options))
+    else:
+        list_options = _create_list_options(size)
+
+    # X-ray lines are looked up once, since pyxray is slow
+    xraylines = [pyxray.xray_line(z, line) for z in (29, 30) for line in ("Ka1", "La1")]
+
+    # Identifiers are not created with create_identifiers(), which is
+    # benchmarked on its own
+    for i, options in enumerate(list_options):
+        identifier = "simulation-{:d}".format(i)
+        results = _create_results(options, xraylines)
+        project.simulations.append(Simulation(options, results, identifier))
+
+    return project
+
+
+@benchmark("options_eq")
+def _setup_options_eq(size):
+    list_options = _create_list_options(size)
+    list_copies = copy.deepcopy(list_options)
+
+    def run():
+        for options, other in zip(list_options, list_copies):
+            assert options == other
+
+    return run
+
+
+@benchmark("options_builder_build")
+def _setup_options_builder_build(size):
+    detector = PhotonDetector("xray", math.radians(40.0))
+
+    builder = OptionsBuilder()
+    builder.add_program(ProgramMock())
+    for i in range(size):
+        builder.add_beam(GaussianBeam(5e3 + i, 10e-9))
+    builder.add_sample(SubstrateSample(Material.pure(29)))
+    builder.add_analysis(PhotonIntensityAnalysis(detector))
+
+    def run():
+        assert len(builder.build()) == size
+
+    return run
+
+
+@benchmark("create_identifiers")
+def _setup_create_identifiers(size):
+    list_options = _create_list_options(size)
+
+    def run():
+        create_identifiers(list_options)
+
+    return run
+
+
+@benchmark("project_write")
+def _setup_project_write(size):
+    project = _create_project(size)
+    filepath = os.path.join(tempfile.mkdtemp(), "project.h5")
+
+    def run():
+        project.write(filepath)
+
+    return run
+
+
+@benchmark("project_read")
+def _setup_project_read(size):
+    project = _create_project(size)
+    filepath = os.path.join(tempfile.mkdtemp(), "project.h5")
+    project.write(filepath)
+
+    def run():
+        assert len(Project.read(filepath).simulations) == size
+
+    return run
+
+
+@benchmark("create_options_dataframe")
+def _setup_create_options_dataframe(size):
+    project = _create_project(size)
+    settings = Settings()
+
+    def run():
+        project.create_options_dataframe(settings)
+
+    return run
+
+
+@benchmark("create_results_dataframe")
+def _setup_create_results_dataframe(size):
+    project = _create_project(size)
+    settings = Settings()
+
+    def run():
+        project.create_results_dataframe(settings)
+
+    return run
+
+
+@benchmark("recalculate_kratio")
+def _setup_recalculate_kratio(size):
+    # A new project is prepared before each run, since the results are only
+    # calculated once
+    projects = []
+
+    def prepare():
+        projects.append(_create_project(size, kratio=True))
+
+    def run():
+        asyncio.run(projects.pop().recalculate())
+
+    return run, prepare
+
+
+@benchmark("token_progress")
+def _setup_token_progress(size):
+    def run():
+        token = Token("benchmark")
+        subtokens = [token.create_subtoken(str(i)) for i in range(size)]
+        for subtoken in subtokens:
+            subtoken.start()
+            token.progress
+        for subtoken in subtokens:
+            subtoken.done()
+            token.progress
+
+    return run
+
+
+def time_benchmark(name, size, repeat=3):
+    """
+    Runs a benchmark *repeat* times and returns a :class:`dict` with the
+    durations in seconds.
+    """
+    setup = _BENCHMARKS[name](size)
+    if isinstance(setup, tuple):
+        func, prepare = setup
+    else:
+        func, prepare = setup, None
+
+    durations = []
+    for _ in range(repeat):
+        if prepare is not None:
+            prepare()
+
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    return {
+        "benchmark": name,
+        "size": size,
+        "repeat": repeat,
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "per_item": min(durations) / size,
+    }
+
+
+def run_suite(names=None, sizes=SIZES, repeat=3, callback=None):
+    """
+    Runs the benchmarks for all sizes and returns a :class:`dict` which can
+    be saved as JSON.
+    """
+    if names is None:
+        names = list(_BENCHMARKS)
+
+    results = []
+    for name in names:
+        for size in sizes:
+            result = time_benchmark(name, size, repeat)
+            results.append(result)
+            if callback is not None:
+                callback(result)
+
+    return {
+        "benchmark": "micro",
+        "version": pymontecarlo.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now().isoformat(),
+        "results": results,
+    }
+
+
+def compare(data, baseline, tolerance=0.25):
+    """
+    Returns the results which are slower than in the baseline by more than
+    *tolerance*, as tuples of the result and the ratio of the durations.
+    """
+    baseline_results = dict(
+        ((result["benchmark"], result["size"]), result)
+        for result in baseline["results"]
+    )
+
+    regressions = []
+    for result in data["results"]:
+        other = baseline_results.get((result["benchmark"], result["size"]))
+        if other is None or other["min"] <= 0.0:
+            continue
+
+        ratio = result["min"] / other["min"]
+        if ratio > 1.0 + tolerance:
+            regressions.append((result, ratio))
+
+    return regressions
+
+
+def _create_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m pymontecarlo.benchmark.micro",
+        description="Microbenchmarks of options, persistence and tabulation",
+    )
+
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=sorted(_BENCHMARKS),
+        help="Benchmarks to run (default: all)",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(SIZES),
+        help="Numbers of simulations or options",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repetitions")
+    parser.add_argument(
+        "-o", metavar="FILE", help="Path of the JSON file (default: standard output)"
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="JSON file of previous results; exits with an error on regressions",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown tolerated by --compare",
+    )
+
+    return parser
+
+
+def main():
+    parser = _create_parser()
+    ns = parser.parse_args()
+
+    def callback(result):
+        print(
+            "{benchmark} size={size}: {min:.4f} s ({per_item:.2e} s/item)".format(
+                **result
+            ),
+            file=sys.stderr,
+            flush=True,
+        )
+
+    data = run_suite(ns.benchmarks, ns.sizes, ns.repeat, callback)
+    content = json.dumps(data, indent=2)
+
+    if ns.o:
+        with open(ns.o, "w", encoding="utf8") as fp:
+            fp.write(content)
+    elif not ns.compare:
+        print(content)
+
+    if ns.compare:
+        with open(ns.compare, "r", encoding="utf8") as fp:
+            baseline = json.load(fp)
+
+        regressions = compare(data, baseline, ns.tolerance)
+        for result, ratio in regressions:
+            print(
+                "Regression: {} size={} is {:.2f}x slower".format(
+                    result["benchmark"], result["size"], ratio
+                ),
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+End-to-end scaling benchmark of the local runner with the mock program.
+
+The simulations do no Monte Carlo work (see
+:class:`LoadWorkerMock <pymontecarlo.mock.LoadWorkerMock>` without load),
+so the measured time is the overhead of pymontecarlo itself (submission,
+dispatching, export, import, project and recalculation) per simulation.
+
+Usage::
+
+    python -m pymontecarlo.benchmark.scaling --workers 1 2 4 --sizes 10 100 1000 -o results.json
+"""
+
+# Standard library modules.
+import sys
+import math
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import datetime
+import multiprocessing
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+import pymontecarlo
+from pymontecarlo.mock import ProgramMock, LoadWorkerMock
+from pymontecarlo.options.material import Material
+from pymontecarlo.options.beam import GaussianBeam
+from pymontecarlo.options.sample import SubstrateSample
+from pymontecarlo.options.detector import PhotonDetector
+from pymontecarlo.options.analysis import PhotonIntensityAnalysis, KRatioAnalysis
+from pymontecarlo.options.options import OptionsBuilder
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.runner.events import EVENT_QUEUED, EVENT_COMPLETED
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+SIZES = (10, 100, 1000, 10000, 100000)
+PERCENTILES = (50, 90, 99)
+
+
+def create_builder(size, kratio=False, program=None):
+    """
+    Returns an :class:`OptionsBuilder` of *size* options with the mock
+    program, differing by their beam energy.
+    With *kratio*, a k-ratio analysis is added, so a standard is also
+    simulated for each options and the project is recalculated.
+    """
+    if program is None:
+        program = ProgramMock(worker=LoadWorkerMock())
+
+    detector = PhotonDetector("xray", math.radians(40.0))
+
+    builder = OptionsBuilder()
+    builder.add_program(program)
+    for i in range(size):
+        builder.add_beam(GaussianBeam(5e3 + i, 10e-9))
+    builder.add_sample(SubstrateSample(Material.pure(29)))
+    builder.add_analysis(PhotonIntensityAnalysis(detector))
+    if kratio:
+        builder.add_analysis(KRatioAnalysis(detector))
+
+    return builder
+
+
+def _summarize_latencies(latencies):
+    if not latencies:
+        return {}
+
+    values = np.percentile(latencies, PERCENTILES)
+    summary = dict(
+        ("p{:d}".format(percentile), float(value))
+        for percentile, value in zip(PERCENTILES, values)
+    )
+    summary["max"] = float(max(latencies))
+    return summary
+
+
+async def run_benchmark_async(max_workers, size, kratio=False):
+    """
+    Runs the simulations of :func:`create_builder` and returns a
+    :class:`dict` with the throughput, the percentiles of the latency (from
+    queued to added to the project) and the overhead per simulation.
+    """
+    builder = create_builder(size, kratio)
+
+    runner = LocalSimulationRunner(max_workers=max_workers)
+    subscription = runner.events(EVENT_QUEUED, EVENT_COMPLETED)
+
+    queued_times = {}
+    latencies = []
+
+    async def consume():
+        async for event in subscription:
+            key = id(event.simulation)
+            if event.kind == EVENT_QUEUED:
+                queued_times[key] = event.time
+            elif key in queued_times:
+                latencies.append(event.time - queued_times.pop(key))
+
+    start = time.perf_counter()
+
+    async with runner:
+        task = asyncio.ensure_future(consume())
+        count = await runner.submit_iter(builder.iterbuild())
+        submit_time = time.perf_counter() - start
+
+    wall_time = time.perf_counter() - start
+    await task
+
+    metrics = runner.metrics.as_dict()
+    number_workers = metrics["workers"]
+
+    return {
+        "workers": max_workers,
+        "effective_workers": number_workers,
+        "size": size,
+        "kratio": kratio,
+        "simulations": count,
+        "completed": metrics["completed"],
+        "failed": metrics["failed"],
+        "wall_time": wall_time,
+        "submit_time": submit_time,
+        "throughput": count / wall_time if wall_time > 0 else 0.0,
+        "overhead_per_simulation": wall_time * number_workers / max(count, 1),
+        "latency": _summarize_latencies(latencies),
+        "utilization": metrics["utilization"],
+        "durations": metrics["durations"],
+    }
+
+
+def run_benchmark(max_workers, size, kratio=False):
+    return asyncio.run(run_benchmark_async(max_workers, size, kratio))
+
+
+def run_suite(list_workers, sizes, list_kratio=(False, True), callback=None):
+    """
+    Runs the benchmark for all combinations of workers, sizes and k-ratio,
+    and returns a :class:`dict` which can be saved as JSON.
+    """
+    results = []
+
+    for kratio in list_kratio:
+        for size in sizes:
+            for max_workers in list_workers:
+                result = run_benchmark(max_workers, size, kratio)
+                results.append(result)
+                if callback is not None:
+                    callback(result)
+
+    return {
+        "benchmark": "scaling",
+        "version": pymontecarlo.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "date": datetime.datetime.now().isoformat(),
+        "results": results,
+    }
+
+
+def _default_workers():
+    list_workers = []
+    max_workers = multiprocessing.cpu_count()
+    workers = 1
+    while workers < max_workers:
+        list_workers.append(workers)
+        workers *= 2
+    list_workers.append(max_workers)
+    return list_workers
+
+
+def _create_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m pymontecarlo.benchmark.scaling",
+        description="Benchmark the scaling of the local runner",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=_default_workers(),
+        help="Numbers of workers",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(SIZES),
+        help="Numbers of options in the sweep",
+    )
+    parser.add_argument(
+        "--kratio",
+        choices=["without", "with", "both"],
+        default="both",
+        help="Whether the options have a k-ratio analysis",
+    )
+    parser.add_argument(
+        "-o", metavar="FILE", help="Path of the JSON file (default: standard output)"
+    )
+
+    return parser
+
+
+def main():
+    parser = _create_parser()
+    ns = parser.parse_args()
+
+    list_kratio = {"without": (False,), "with": (True,), "both": (False, True)}[
+        ns.kratio
+    ]
+
+    def callback(result):
+        print(
+            "workers={workers} size={size} kratio={kratio}: "
+            "{throughput:.1f} simulations/s, "
+            "{overhead_per_simulation:.4f} s/simulation".format(**result),
+            file=sys.stderr,
+            flush=True,
+        )
+
+    data = run_suite(ns.workers, ns.sizes, list_kratio, callback)
+    content = json.dumps(data, indent=2)
+
+    if ns.o:
+        with open(ns.o, "w", encoding="utf8") as fp:
+            fp.write(content)
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ import pyxray
 # Local modules.
 from pymontecarlo.exceptions import ParseError, ConvertError
 from pymontecarlo.util.xrayline import convert_xrayline
+from pymontecarlo.plugin import load_plugins
 
 # Globals and constants variables.
 
@@ -80,12 +81,25 @@ class EntityHDF5Mixin(metaclass=abc.ABCMeta):
         return cls._parse_hdf5_object(group_obj)
 
     @classmethod
-    def _parse_hdf5_object(cls, group):
+    def _find_hdf5_handler(cls, group):
         for subclass in cls._subclasses:
             if subclass.can_parse_hdf5(group):
-                return subclass.parse_hdf5(group)
+                return subclass
+        return None
+
+    @classmethod
+    def _parse_hdf5_object(cls, group):
+        subclass = cls._find_hdf5_handler(group)
+
+        # Classes of plug-ins are only registered once imported
+        if subclass is None:
+            load_plugins()
+            subclass = cls._find_hdf5_handler(group)
+
+        if subclass is None:
+            raise ParseError("No handler found for {}".format(group))
 
-        raise ParseError("No handler found for {}".format(group))
+        return subclass.parse_hdf5(group)
 
     @abc.abstractmethod
     def convert_hdf5(self, group):
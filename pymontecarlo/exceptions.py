@@ -67,6 +67,10 @@ class WorkerError(PymontecarloError):
     pass
 
 
+class WorkerTimeoutError(WorkerError):
+    """Exception raised when a simulation takes longer than its timeout"""
+
+
 class ImportError(AccumulatedError):
     pass
 
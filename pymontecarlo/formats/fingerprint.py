@@ -0,0 +1,108 @@
+""""""
+
+# Standard library modules.
+import numbers
+import itertools
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.formats.base import FormatBuilderBase, LazyFormat
+from pymontecarlo.settings import Settings
+from pymontecarlo.util.tolerance import quantize_candidates
+
+# Globals and constants variables.
+
+
+class FingerprintBuilder(FormatBuilderBase):
+    """
+    Builds a hashable fingerprint of an entity from the columns of its
+    series conversion.
+    Float values are quantized using the tolerance given with each column.
+    Two equal entities usually have the same fingerprint, but not always:
+    a float value close to a quantization boundary may be quantized
+    differently. The fingerprint of an entity is however always among the
+    candidate fingerprints of an equal entity (see :meth:`build_candidates`).
+    Two entities with the same fingerprint are not necessarily equal.
+    """
+
+    def __init__(self, settings=None):
+        if settings is None:
+            settings = Settings()
+        super().__init__(settings)
+        self.data = []
+
+    def _hashable(self, value):
+        if isinstance(value, LazyFormat):
+            return value.__class__.__name__
+        return value
+
+    def add_column(self, name, abbrev, value, unit=None, tolerance=None, error=False):
+        if error:
+            return
+
+        # Each column is saved with its candidate values, the first being
+        # the quantized value
+        if isinstance(value, numbers.Real) and not isinstance(value, numbers.Integral):
+            values = quantize_candidates(value, tolerance)
+        else:
+            values = (self._hashable(value),)
+
+        self.data.append((self._hashable(name), values))
+
+    def add_entity(self, entity, prefix_name="", prefix_abbrev=""):
+        builder = self.__class__(self.settings)
+        entity.convert_series(builder)
+
+        self.data.append((prefix_name, (entity.__class__.__name__,)))
+
+        for name, values in builder.data:
+            self.data.append(((prefix_name, name), values))
+
+    def _build(self, values):
+        # Sorted since the equality of some options does not depend on order
+        items = zip((name for name, _values in self.data), values)
+        return tuple(sorted(items, key=repr))
+
+    def build(self):
+        return self._build(values[0] for _name, values in self.data)
+
+    def build_candidates(self):
+        """
+        Returns the fingerprint and the other candidate fingerprints, i.e.
+        those which an equal entity may have.
+        """
+        candidates = [self.build()]
+
+        # Only the columns with several candidate values are combined
+        indexes = [i for i, (_name, values) in enumerate(self.data) if len(values) > 1]
+        for combination in itertools.product(*(self.data[i][1] for i in indexes)):
+            chosen = [values[0] for _name, values in self.data]
+            for i, value in zip(indexes, combination):
+                chosen[i] = value
+
+            fingerprint = self._build(chosen)
+            if fingerprint not in candidates:
+                candidates.append(fingerprint)
+
+        return candidates
+
+
+def create_fingerprint(entity):
+    """
+    Returns a hashable fingerprint of an entity (e.g. :class:`Options`).
+    """
+    builder = FingerprintBuilder()
+    builder.add_entity(entity)
+    return builder.build()
+
+
+def create_candidate_fingerprints(entity):
+    """
+    Returns the fingerprint of an entity, followed by the other fingerprints
+    that an equal entity may have.
+    Lookups by fingerprint should check all candidates.
+    """
+    builder = FingerprintBuilder()
+    builder.add_entity(entity)
+    return builder.build_candidates()
@@ -10,10 +10,12 @@ from pymontecarlo.settings import Settings
 from pymontecarlo.util.cbook import get_valid_filename
 from pymontecarlo.formats.dataframe import ensure_distinct_columns
 from pymontecarlo.formats.series import SeriesBuilder
+from pymontecarlo.util.trace import traced
 
 # Globals and constants variables.
 
 
+@traced()
 def create_identifiers(entities):
     settings = Settings()
     settings.set_preferred_unit("nm")
@@ -2,6 +2,7 @@
 
 # Standard library modules.
 import os
+import abc
 import sys
 import json
 import itertools
@@ -9,6 +10,7 @@ import operator
 import functools
 import asyncio
 import math
+import random
 
 # Third party modules.
 import pyxray
@@ -28,15 +30,15 @@ from pymontecarlo.options.analysis import PhotonIntensityAnalysis, KRatioAnalysi
 from pymontecarlo.options.detector import PhotonDetector
 from pymontecarlo.options.program.base import ProgramBase, ProgramBuilderBase
 from pymontecarlo.options.program.expander import (
-    ExpanderBase,
+    SingleDetectorExpander,
     expand_to_single,
-    expand_analyses_to_single_detector,
 )
 from pymontecarlo.options.program.exporter import ExporterBase, apply_lazy
 from pymontecarlo.options.program.worker import WorkerBase
 from pymontecarlo.options.program.importer import ImporterBase
 from pymontecarlo.results.photonintensity import EmittedPhotonIntensityResultBuilder
-from pymontecarlo.util.process import create_startupinfo
+from pymontecarlo.util.process import create_startupinfo, create_subprocess_exec
+from pymontecarlo.exceptions import WorkerError
 
 # Globals and constants variables.
 
@@ -47,10 +49,7 @@ class SampleMock(SampleBase):
         return []
 
 
-class ExpanderMock(ExpanderBase):
-    def expand_analyses(self, analyses):
-        return expand_analyses_to_single_detector(analyses)
-
+class ExpanderMock(SingleDetectorExpander):
     def expand_limits(self, limits):
         return expand_to_single(limits)
 
@@ -89,8 +88,11 @@ class ExporterMock(ExporterBase):
 
         if not dry_run:
             filepath = os.path.join(dirpath, "sim.json")
-            with open(filepath, "w") as fp:
-                json.dump(outdict, fp)
+            await self._run_io(self._write_json, filepath, outdict)
+
+    def _write_json(self, filepath, outdict):
+        with open(filepath, "w") as fp:
+            json.dump(outdict, fp)
 
     def _export_program(self, program, options, erracc, outdict):
         self._validate_program(program, options, erracc)
@@ -194,7 +196,7 @@ class WorkerMock(WorkerBase):
             kwargs["stderr"] = asyncio.subprocess.DEVNULL
             kwargs["startupinfo"] = create_startupinfo()
 
-            proc = await asyncio.create_subprocess_exec(*args, **kwargs)
+            proc = await create_subprocess_exec(*args, **kwargs)
             await proc.wait()
 
             await asyncio.sleep(0.01)
@@ -207,6 +209,193 @@ class WorkerMock(WorkerBase):
         simulation.results += await options.program.importer.import_(options, outputdir)
 
 
+class Distribution(metaclass=abc.ABCMeta):
+    """
+    Distribution of a value of :class:`LoadWorkerMock`.
+    """
+
+    @abc.abstractmethod
+    def sample(self, rng):
+        """
+        Returns a value drawn with the :class:`random.Random` *rng*.
+        """
+        raise NotImplementedError
+
+
+class ConstantDistribution(Distribution):
+    def __init__(self, value):
+        self.value = value
+
+    def sample(self, rng):
+        return self.value
+
+
+class UniformDistribution(Distribution):
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng):
+        return rng.uniform(self.low, self.high)
+
+
+class NormalDistribution(Distribution):
+    """
+    Normal distribution, truncated at zero.
+    """
+
+    def __init__(self, mean, stddev):
+        self.mean = mean
+        self.stddev = stddev
+
+    def sample(self, rng):
+        return max(0.0, rng.gauss(self.mean, self.stddev))
+
+
+class LogNormalDistribution(Distribution):
+    """
+    Log-normal distribution, e.g. for run times with a long tail.
+    """
+
+    def __init__(self, median, sigma):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng):
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+
+class ExponentialDistribution(Distribution):
+    def __init__(self, mean):
+        self.mean = mean
+
+    def sample(self, rng):
+        return rng.expovariate(1.0 / self.mean)
+
+
+def _as_distribution(value):
+    if isinstance(value, Distribution):
+        return value
+    return ConstantDistribution(value)
+
+
+_LOAD_SCRIPT = """
+import sys, time
+runtime_s, cpu_s, memory_bytes, output_bytes = map(float, sys.argv[1:5])
+start = time.monotonic()
+memory = b"\\x01" * int(memory_bytes)
+cpu_start = time.process_time()
+while time.process_time() - cpu_start < cpu_s:
+    pass
+if output_bytes > 0:
+    chunk = b"\\x00" * 1048576
+    remaining = int(output_bytes)
+    with open(sys.argv[5], "wb") as fp:
+        while remaining > 0:
+            fp.write(chunk[:remaining])
+            remaining -= len(chunk)
+time.sleep(max(0.0, runtime_s - (time.monotonic() - start)))
+"""
+
+
+class LoadWorkerMock(WorkerMock):
+    """
+    Worker of the mock program generating a configurable load, to test
+    runners at scale without a Monte Carlo program.
+
+    Each value is either a number or a :class:`Distribution`, sampled for
+    every simulation.
+    The load is generated in a separate process, like a real program: it
+    allocates the memory, burns the CPU time, writes the output file and
+    sleeps for the rest of the run time.
+    If all values are zero, no process is started and only the export and
+    import of the mock program are performed.
+
+    Args:
+        runtime_s: minimum duration of a simulation in seconds
+        cpu_s: CPU time burnt by a simulation in seconds
+        memory_bytes: memory allocated by a simulation
+        output_bytes: size of the output file (``output.bin``)
+        failure_probability (float): probability that a simulation raises
+            a :exc:`WorkerError`
+        timeout_probability (float): probability that a simulation hangs
+            for *hang_s* seconds, e.g. to test the timeout of the runner
+        hang_s (float): duration of a hanging simulation
+        seed: seed of the random generator
+    """
+
+    OUTPUT_FILENAME = "output.bin"
+
+    def __init__(
+        self,
+        runtime_s=0.0,
+        cpu_s=0.0,
+        memory_bytes=0,
+        output_bytes=0,
+        failure_probability=0.0,
+        timeout_probability=0.0,
+        hang_s=3600.0,
+        seed=None,
+    ):
+        super().__init__()
+        self.runtime_s = _as_distribution(runtime_s)
+        self.cpu_s = _as_distribution(cpu_s)
+        self.memory_bytes = _as_distribution(memory_bytes)
+        self.output_bytes = _as_distribution(output_bytes)
+        self.failure_probability = failure_probability
+        self.timeout_probability = timeout_probability
+        self.hang_s = hang_s
+        self.random = random.Random(seed)
+
+    def sample_load(self):
+        """
+        Returns the run time, CPU time, memory and output size of a
+        simulation.
+        """
+        return (
+            self.runtime_s.sample(self.random),
+            self.cpu_s.sample(self.random),
+            self.memory_bytes.sample(self.random),
+            self.output_bytes.sample(self.random),
+        )
+
+    async def _run(self, token, simulation, outputdir):
+        options = simulation.options
+
+        # Export
+        token.update(0.1, "Exporting options")
+        await options.program.exporter.export(options, outputdir)
+
+        # Run
+        token.update(0.2, "Started")
+
+        load = self.sample_load()
+        if self.random.random() < self.timeout_probability:
+            load = (self.hang_s, 0.0, 0, 0)
+
+        if self.random.random() < self.failure_probability:
+            raise WorkerError("Simulated failure")
+
+        if any(value > 0 for value in load):
+            filepath = os.path.join(outputdir, self.OUTPUT_FILENAME)
+            args = [sys.executable, "-c", _LOAD_SCRIPT]
+            args += [str(value) for value in load] + [filepath]
+
+            kwargs = {}
+            kwargs["stdout"] = asyncio.subprocess.DEVNULL
+            kwargs["stderr"] = asyncio.subprocess.DEVNULL
+            kwargs["startupinfo"] = create_startupinfo()
+
+            proc = await create_subprocess_exec(*args, **kwargs)
+            returncode = await proc.wait()
+            if returncode != 0:
+                raise WorkerError("Load process failed ({})".format(returncode))
+
+        # Import
+        token.update(0.9, "Importing results")
+        simulation.results += await options.program.importer.import_(options, outputdir)
+
+
 class ImporterMock(ImporterBase):
 
     TRANSITIONS = (
@@ -271,17 +460,24 @@ class ProgramMock(ProgramBase):
         self,
         number_trajectories=100,
         elastic_cross_section_model=ElasticCrossSectionModel.RUTHERFORD,
+        worker=None,
     ):
         super().__init__("mock")
 
+        if worker is None:
+            worker = WorkerMock()
+
         self._expander = ExpanderMock()
         self._exporter = ExporterMock()
         self._importer = ImporterMock()
-        self._worker = WorkerMock()
+        self._worker = worker
 
         self.number_trajectories = number_trajectories
         self.elastic_cross_section_model = elastic_cross_section_model
 
+        # Random seed, so that the simulation can be split in shards
+        self.seed = None
+
     def __eq__(self, other):
         return (
             super().__eq__(other)
@@ -42,6 +42,41 @@ class AnalysisBase(OptionBase):
         """
         return False
 
+    @classmethod
+    def calculate_many(cls, items):
+        """
+        Calculates additional result(s) for many simulations at once.
+        Subclasses may override this method to perform the calculations in a
+        more efficient way than calling :meth:`calculate` for each item.
+
+        :arg items: :class:`list` of ``(analysis, simulation, simulations)``,
+            where the analyses are instances of this class and the arguments
+            are the ones of :meth:`calculate`
+
+        :return: :class:`list` of ``True`` if new results were added to the
+            simulation of the item, ``False`` otherwise
+        """
+        return [
+            analysis.calculate(simulation, simulations)
+            for analysis, simulation, simulations in items
+        ]
+
+    def dependencies(self, options):
+        """
+        Returns the options of the simulations required by :meth:`calculate`,
+        or ``None`` if the calculation may depend on any simulation of the
+        project.
+        Only the simulations with these options are then given to
+        :meth:`calculate`, and the calculation is repeated when one of them
+        is added to the project.
+
+        :arg options: options subjected to this analysis
+        :type options: :class:`Options`
+
+        :return: :class:`list` of :class:`Options` or ``None``
+        """
+        return None
+
     @abc.abstractproperty
     def detector(self):
         """
@@ -5,15 +5,15 @@ __all__ = ["KRatioAnalysis", "KRatioAnalysisBuilder"]
 # Standard library modules.
 import logging
 import copy
+import itertools
 
 # Third party modules.
 import h5py
 import numpy as np
 import pyxray
-import more_itertools
 
 # Local modules.
-from pymontecarlo.options.options import OptionsBuilder
+from pymontecarlo.options.options import Options, OptionsBuilder
 from pymontecarlo.options.beam import PencilBeam
 from pymontecarlo.options.material import Material
 from pymontecarlo.options.sample import SubstrateSample
@@ -24,6 +24,8 @@ from pymontecarlo.options.analysis.photon import (
 from pymontecarlo.options.analysis.photonintensity import PhotonIntensityAnalysis
 from pymontecarlo.results.photonintensity import EmittedPhotonIntensityResult
 from pymontecarlo.results.kratio import KRatioResult, KRatioResultBuilder
+from pymontecarlo.formats.fingerprint import create_candidate_fingerprints
+from pymontecarlo.util.tolerance import quantize_candidates
 import pymontecarlo.options.base as base
 
 # Globals and constants variables.
@@ -32,6 +34,56 @@ logger = logging.getLogger(__name__)
 TAG_STANDARD = "standard"
 
 
+class _StandardIndex:
+    """
+    Index of standard simulations by material and beam energy.
+    """
+
+    def __init__(self):
+        self._simulations = {}
+        self._fingerprints = {}
+        self._ids = set()
+
+    def _get_keys(self, options):
+        """
+        Returns the key of the options, followed by the other keys that
+        equal options may have (see :func:`quantize_candidates`).
+        """
+        material = options.sample.material
+        if id(material) not in self._fingerprints:
+            # Keep a reference to the material, since its id is used
+            fingerprints = create_candidate_fingerprints(material)
+            self._fingerprints[id(material)] = (material, fingerprints)
+        fingerprints = self._fingerprints[id(material)][1]
+
+        energies = quantize_candidates(
+            options.beam.energy_eV, PencilBeam.ENERGY_TOLERANCE_eV
+        )
+        return list(itertools.product(fingerprints, energies))
+
+    def update(self, simulations):
+        for simulation in simulations:
+            if id(simulation) in self._ids:
+                continue
+            self._ids.add(id(simulation))
+
+            if not hasattr(simulation.options.sample, "material"):
+                continue
+
+            key = self._get_keys(simulation.options)[0]
+            self._simulations.setdefault(key, []).append(simulation)
+
+    def find(self, stdoptions):
+        """
+        Returns the simulation with the standard options or ``None``.
+        """
+        for key in self._get_keys(stdoptions):
+            for simulation in self._simulations.get(key, []):
+                if simulation.options == stdoptions:
+                    return simulation
+        return None
+
+
 class KRatioAnalysis(PhotonAnalysisBase):
 
     DEFAULT_NONPURE_STANDARD_MATERIALS = {
@@ -100,83 +152,190 @@ class KRatioAnalysis(PhotonAnalysisBase):
 
         return super().apply(options) + standard_options
 
-    def calculate(self, simulation, simulations):
-        # If k-ratio result exists, return False, no new result
-        for kratioresult in simulation.find_result(KRatioResult):
-            if kratioresult.analysis == self:
-                logger.debug("KRatioResult already calculated")
-                return False
+    def dependencies(self, options):
+        return self._create_standard_options(options)
 
-        # Find emitted photon intensity result(s)
-        it = (
-            r
-            for r in simulation.find_result(EmittedPhotonIntensityResult)
-            if r.analysis.photon_detector == self.photon_detector
+    def _create_standard_options_for_material(self, options, material):
+        """
+        Returns the standard options of *options* for one standard material,
+        as created by :meth:`_create_standard_options`, without a builder.
+        """
+        program = copy.copy(options.program)
+        beam = PencilBeam(
+            energy_eV=options.beam.energy_eV, particle=options.beam.particle
         )
-        unkresult = more_itertools.first(it, None)
+        sample = SubstrateSample(material)
+        analyses = [PhotonIntensityAnalysis(self.photon_detector)]
+        return Options(program, beam, sample, analyses, [TAG_STANDARD])
 
-        # If no result, return False, no new result
-        if unkresult is None:
-            return False
+    def _find_emitted_photon_intensity_result(self, simulation):
+        for result in simulation.find_result(EmittedPhotonIntensityResult):
+            if result.analysis.photon_detector == self.photon_detector:
+                return result
+        return None
 
-        # Find standard simulations
-        stdoptions = self._create_standard_options(simulation.options)
-        stdsimulations = [s for s in simulations if s.options in stdoptions]
+    def calculate(self, simulation, simulations):
+        # The standards are searched directly, since an index of the
+        # simulations would be created again at each call
+        def find_standard(stdoptions):
+            for stdsimulation in simulations:
+                if stdsimulation.options == stdoptions:
+                    return stdsimulation
+            return None
 
-        # Build cache of standard result
-        stdresult_cache = {}
-        for xrayline in unkresult:
-            z = xrayline.atomic_number
+        return self._calculate_kratios([(self, simulation, find_standard)])[0]
 
-            if z in stdresult_cache:
-                continue
+    @classmethod
+    def calculate_many(cls, items):
+        """
+        Calculates the k-ratios of many unknowns at once.
+        The standard simulations are indexed by material and beam energy, so
+        that the standard of each unknown and element is found once.
+        The k-ratios and their uncertainties are then calculated for all
+        unknowns and X-ray lines in a single vectorized pass.
+
+        The uncertainties are propagated assuming the unknown and standard
+        intensities are independent.
+        """
+        # Index standard simulations
+        index = _StandardIndex()
+        seen = set()
+        for _analysis, _simulation, simulations in items:
+            if id(simulations) not in seen:
+                seen.add(id(simulations))
+                index.update(simulations)
+
+        return cls._calculate_kratios(
+            [(analysis, simulation, index.find) for analysis, simulation, _ in items]
+        )
 
+    def _find_standard_results(self, simulation, unkresult, find_standard):
+        """
+        Returns the emitted photon intensity result of the standard of each
+        element of the unknown result, or ``None`` if it is missing.
+        """
+        stdresults = {}
+
+        for z in unkresult.atomic_numbers:
             stdmaterial = self.get_standard_material(z)
-            it = (s for s in stdsimulations if s.options.sample.material == stdmaterial)
-            stdsimulation = more_itertools.first(it, None)
+            stdoptions = self._create_standard_options_for_material(
+                simulation.options, stdmaterial
+            )
+            stdsimulation = find_standard(stdoptions)
             if stdsimulation is None:
                 logger.debug("No standard simulation found for Z={}".format(z))
-                stdresult_cache[z] = None
+                stdresults[z] = None
                 continue
 
-            it = (
-                r
-                for r in stdsimulation.find_result(EmittedPhotonIntensityResult)
-                if r.analysis.photon_detector == self.photon_detector
-            )
-            stdresult = more_itertools.first(it, None)
+            stdresult = self._find_emitted_photon_intensity_result(stdsimulation)
             if stdresult is None:
                 logger.debug("No standard result found for Z={}".format(z))
-                stdresult_cache[z] = None
+            stdresults[z] = stdresult
+
+        return stdresults
+
+    @classmethod
+    def _calculate_kratios(cls, items):
+        """
+        Calculates the k-ratios of a :class:`list` of ``(analysis,
+        simulation, find_standard)``, where *find_standard* returns the
+        standard simulation of standard options (or ``None``).
+        """
+        newresults = [False] * len(items)
+
+        # X-ray lines are encoded as integers and the intensities are
+        # gathered in arrays: one row per X-ray line of each unknown and of
+        # each standard result
+        codes = {}
+        stdindices = {}
+        unkrows = []
+        unkkeys = []
+        unkvalues = []
+        stdkeys = []
+        stdvalues = []
+
+        for i, (analysis, simulation, find_standard) in enumerate(items):
+            # If k-ratio result exists, no new result
+            if any(
+                result.analysis == analysis
+                for result in simulation.find_result(KRatioResult)
+            ):
+                logger.debug("KRatioResult already calculated")
                 continue
 
-            stdresult_cache[z] = stdresult
+            # If no emitted photon intensity result, no new result
+            unkresult = analysis._find_emitted_photon_intensity_result(simulation)
+            if unkresult is None:
+                continue
 
-        # Calculate k-ratios
-        builder = KRatioResultBuilder(self)
+            stdresults = analysis._find_standard_results(
+                simulation, unkresult, find_standard
+            )
 
-        for xrayline, unkintensity in unkresult.items():
-            z = xrayline.atomic_number
+            for xrayline, unkintensity in unkresult.items():
+                stdresult = stdresults[xrayline.atomic_number]
+                if stdresult is None:
+                    continue
+
+                j = stdindices.get(id(stdresult))
+                if j is None:
+                    j = stdindices[id(stdresult)] = len(stdindices)
+                    for stdxrayline, stdintensity in stdresult.items():
+                        stdkeys.append((j, codes.setdefault(stdxrayline, len(codes))))
+                        stdvalues.append((stdintensity.n, stdintensity.s))
+
+                unkrows.append((i, xrayline))
+                unkkeys.append((j, codes.setdefault(xrayline, len(codes))))
+                unkvalues.append((unkintensity.n, unkintensity.s))
+
+        if not unkrows or not stdkeys:
+            return newresults
+
+        # Match the X-ray lines of the unknowns and standards
+        ncodes = len(codes)
+        unkkeys = np.array(unkkeys, dtype=np.int64)
+        unkkeys = unkkeys[:, 0] * ncodes + unkkeys[:, 1]
+        stdkeys = np.array(stdkeys, dtype=np.int64)
+        stdkeys = stdkeys[:, 0] * ncodes + stdkeys[:, 1]
+
+        order = np.argsort(stdkeys)
+        positions = np.searchsorted(stdkeys[order], unkkeys)
+        positions = order[np.minimum(positions, len(order) - 1)]
+        found = stdkeys[positions] == unkkeys
+
+        if not found.all():
+            logger.debug(
+                "No standard intensity for {} X-ray line(s)".format(
+                    np.count_nonzero(~found)
+                )
+            )
 
-            stdresult = stdresult_cache.get(z)
-            if stdresult is None:
-                continue
+        # Calculate all k-ratios
+        unk_n, unk_s = np.array(unkvalues, dtype=float).T
+        std_n, std_s = np.array(stdvalues, dtype=float)[positions].T
 
-            stdintensity = stdresult.get(xrayline, None)
-            if stdintensity is None:
-                logger.debug("No standard intensity for {}".format(xrayline))
-                continue
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kratios = unk_n / std_n
+            errors = np.sqrt((unk_s / std_n) ** 2 + (unk_n * std_s / std_n**2) ** 2)
 
-            builder.add_kratio(xrayline, unkintensity, stdintensity)
+        valid = found & np.isfinite(kratios)
+        if np.count_nonzero(found & ~valid):
+            logger.debug("Standard intensity of some X-ray line(s) is zero")
 
-        # Create result
-        newresult = super().calculate(simulation, simulations)
+        # Create results
+        builders = {}
+        for k in np.flatnonzero(valid):
+            i, xrayline = unkrows[k]
+            if i not in builders:
+                builders[i] = KRatioResultBuilder(items[i][0])
+            builders[i].add_kratio_value(xrayline, kratios[k], errors[k])
 
-        if builder.data:
+        for i, builder in builders.items():
+            simulation = items[i][1]
             simulation.results.append(builder.build())
-            newresult = True
+            newresults[i] = True
 
-        return newresult
+        return newresults
 
     # region HDF5
 
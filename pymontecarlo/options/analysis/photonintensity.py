@@ -25,6 +25,9 @@ class PhotonIntensityAnalysis(PhotonAnalysisBase):
     def apply(self, options):
         return []
 
+    def dependencies(self, options):
+        return []
+
     def calculate(self, simulation, simulations):
         return super().calculate(simulation, simulations)
 
@@ -7,6 +7,7 @@ __all__ = ["Material", "MaterialBuilder", "VACUUM"]
 # Standard library modules.
 from operator import itemgetter
 import itertools
+import functools
 
 # Third party modules.
 import pyxray
@@ -32,6 +33,12 @@ from pymontecarlo.options.parameter import (
 # Globals and constants variables.
 
 
+@functools.lru_cache(maxsize=None)
+def _element_symbol(z):
+    # Cached, since it is called for every material of every converted options
+    return pyxray.element_symbol(z)
+
+
 class LazyDensity(base.LazyOptionBase):
     def apply(self, material, options):
         composition = base.apply_lazy(material.composition, material, options)
@@ -203,7 +210,7 @@ class Material(base.OptionBase):
         super().convert_series(builder)
 
         for z, wf in self.composition.items():
-            symbol = pyxray.element_symbol(z)
+            symbol = _element_symbol(z)
             name = "{} weight fraction".format(symbol)
             abbrev = "wt{}".format(symbol)
             tolerance = self.WEIGHT_FRACTION_TOLERANCE
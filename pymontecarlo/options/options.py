@@ -2,10 +2,10 @@
 Main class containing all options of a simulation
 """
 
-__all__ = ["Options", "OptionsBuilder"]
+__all__ = ["Options", "OptionsBuilder", "OptionsIndex"]
 
 # Standard library modules.
-import itertools
+import collections.abc
 
 # Third party modules.
 import h5py
@@ -13,6 +13,7 @@ import h5py
 # Local modules.
 from pymontecarlo.util.cbook import unique, find_by_type, organize_by_type
 from pymontecarlo.util.human import camelcase_to_words
+from pymontecarlo.formats.fingerprint import create_candidate_fingerprints
 import pymontecarlo.options.base as base
 
 # Globals and constants variables.
@@ -193,15 +194,11 @@ class OptionsBuilder(base.OptionBuilderBase):
         self.tags = list(tags) if tags is not None else []
 
     def __len__(self):
-        count = len(self.programs) * len(self.beams) * len(self.samples)
+        return sum(self._count_combinations(program) for program in self.programs)
 
-        for program in self.programs:
-            analysis_combinations = program.expander.expand_analyses(self.analyses) or [
-                None
-            ]
-            count *= len(analysis_combinations)
-
-        return count
+    def _count_combinations(self, program):
+        count = max(program.expander.count_analyses(self.analyses), 1)
+        return len(self.beams) * len(self.samples) * count
 
     def add_program(self, program):
         if program not in self.programs:
@@ -219,27 +216,175 @@ class OptionsBuilder(base.OptionBuilderBase):
         if analysis not in self.analyses:
             self.analyses.append(analysis)
 
-    def iterbuild(self):
-        list_options = []
+    def _iter_combinations(self, start, stop):
+        """
+        Yields the options of the combinations between *start* and *stop*,
+        in the same order as :func:`itertools.product` of the programs, beams,
+        samples and analyses.
+        Only these combinations are created.
+        """
+        offset = 0
 
         for program in self.programs:
-            analyses = self.analyses
-            analysis_combinations = program.expander.expand_analyses(analyses) or [None]
+            count = self._count_combinations(program)
+            if offset >= stop:
+                break
+            if offset + count <= start:
+                offset += count
+                continue
+
+            analysis_combinations = program.expander.expand_analyses(self.analyses) or [
+                None
+            ]
+            size_analyses = len(analysis_combinations)
+            size_samples = len(self.samples)
+
+            for index in range(max(start, offset), min(stop, offset + count)):
+                index, k = divmod(index - offset, size_analyses)
+                i, j = divmod(index, size_samples)
+                yield Options(
+                    program,
+                    self.beams[i],
+                    self.samples[j],
+                    analysis_combinations[k],
+                    self.tags,
+                )
+
+            offset += count
+
+    def build_combination(self, index):
+        """
+        Returns the options of the *index*-th combination, without creating
+        the other combinations.
+        The additional options required by the analyses are not returned.
+        """
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("Combination index out of range")
 
-            product = itertools.product(self.beams, self.samples, analysis_combinations)
-            for beam, sample, analyses in product:
-                options = Options(program, beam, sample, analyses, self.tags)
+        return next(self._iter_combinations(index, index + 1))
 
-                if options in list_options:
-                    continue
-                list_options.append(options)
-                yield options
+    def iterbuild(self, shard=0, num_shards=1):
+        """
+        Yields the options of all combinations, each followed by the
+        additional options required by its analyses.
+        Duplicate options are only yielded once.
+
+        The combinations can be split in *num_shards* contiguous slices of
+        the same size, e.g. to run a sweep on several computers.
+        Only the options of the *shard*-th slice are then created.
+        The additional options, e.g. standards, may be yielded by more than
+        one shard.
+        """
+        if not 0 <= shard < num_shards:
+            raise ValueError(
+                "Shard {} is not between 0 and {}".format(shard, num_shards - 1)
+            )
+
+        count = len(self)
+        start = count * shard // num_shards
+        stop = count * (shard + 1) // num_shards
+
+        index = OptionsIndex()
 
-                for analysis in options.analyses:
-                    for extra_options in analysis.apply(options):
-                        if extra_options not in list_options:
-                            list_options.append(extra_options)
-                            yield extra_options
+        for options in self._iter_combinations(start, stop):
+            if options in index:
+                continue
+            yield options
+
+            list_extra_options = []
+            for analysis in options.analyses:
+                list_extra_options.extend(analysis.apply(options))
+
+            # Options are indexed after the analyses were applied,
+            # since they may modify the options
+            index.add(options)
+
+            for extra_options in list_extra_options:
+                if extra_options not in index:
+                    index.add(extra_options)
+                    yield extra_options
 
     def build(self):
         return list(self.iterbuild())
+
+
+class OptionsIndex(collections.abc.MutableMapping):
+    """
+    Mapping where the keys are :class:`Options`.
+    Options are bucketed by their fingerprint (see
+    :func:`create_fingerprint <pymontecarlo.formats.fingerprint.create_fingerprint>`)
+    and compared for equality only within the buckets of their candidate
+    fingerprints, instead of against all the other options.
+
+    Options should not be modified after they are added to the index.
+    """
+
+    def __init__(self, items=None):
+        self._buckets = {}
+        self._length = 0
+
+        if items is not None:
+            self.update(items)
+
+    def _find(self, options):
+        """
+        Returns the fingerprint of the options, and the bucket and position
+        of an equal options or ``None`` and ``None``.
+        All candidate fingerprints are checked, since equal options close to
+        a quantization boundary may have different fingerprints.
+        """
+        fingerprints = create_candidate_fingerprints(options)
+        for fingerprint in fingerprints:
+            bucket = self._buckets.get(fingerprint, [])
+            for i, (other, _value) in enumerate(bucket):
+                if options == other:
+                    return fingerprints[0], bucket, i
+        return fingerprints[0], None, None
+
+    def __getitem__(self, options):
+        _fingerprint, bucket, i = self._find(options)
+        if i is None:
+            raise KeyError(options)
+        return bucket[i][1]
+
+    def __setitem__(self, options, value):
+        fingerprint, bucket, i = self._find(options)
+        if i is not None:
+            bucket[i] = (bucket[i][0], value)
+            return
+
+        self._buckets.setdefault(fingerprint, []).append((options, value))
+        self._length += 1
+
+    def __delitem__(self, options):
+        _fingerprint, bucket, i = self._find(options)
+        if i is None:
+            raise KeyError(options)
+
+        del bucket[i]
+        self._length -= 1
+
+    def __iter__(self):
+        for bucket in list(self._buckets.values()):
+            for options, _value in bucket:
+                yield options
+
+    def __len__(self):
+        return self._length
+
+    def add(self, options, value=None):
+        """
+        Adds the options to the index, if an equal options is not already
+        present.
+        Returns ``True`` if the options were added.
+        """
+        fingerprint, _bucket, i = self._find(options)
+        if i is not None:
+            return False
+
+        self._buckets.setdefault(fingerprint, []).append((options, value))
+        self._length += 1
+        return True
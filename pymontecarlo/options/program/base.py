@@ -29,6 +29,20 @@ class ProgramBase(base.OptionBase):
     def name(self):
         return self._name
 
+    @property
+    def required_cores(self):
+        """
+        Number of CPU cores used by a simulation of this program.
+        """
+        return 1
+
+    @property
+    def required_memory_bytes(self):
+        """
+        Approximate memory (in bytes) used by a simulation of this program.
+        """
+        return 0
+
     @abc.abstractproperty
     def expander(self):
         raise NotImplementedError
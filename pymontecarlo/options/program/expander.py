@@ -37,6 +37,14 @@ def expand_analyses_to_single_detector(analyses):
     return combinations
 
 
+def count_analyses_to_single_detector(analyses):
+    """
+    Returns the number of combinations of
+    :func:`expand_analyses_to_single_detector`, without creating them.
+    """
+    return len(unique(analysis.detector for analysis in analyses))
+
+
 class ExpanderBase(metaclass=abc.ABCMeta):
     """
     Expands list of detectors and limits to match the simulation capabilities
@@ -51,3 +59,25 @@ class ExpanderBase(metaclass=abc.ABCMeta):
         single :class:`Options`.
         """
         raise NotImplementedError
+
+    def count_analyses(self, analyses):
+        """
+        Returns the number of tuples returned by :meth:`expand_analyses`.
+        Subclasses may override this method to count the combinations without
+        creating them, as :class:`SingleDetectorExpander` does.
+        """
+        return len(self.expand_analyses(analyses))
+
+
+class SingleDetectorExpander(ExpanderBase):
+    """
+    Expander of a program simulating a single detector per simulation.
+    The analyses are grouped by detector and their number is counted
+    without creating the combinations.
+    """
+
+    def expand_analyses(self, analyses):
+        return expand_analyses_to_single_detector(analyses)
+
+    def count_analyses(self, analyses):
+        return count_analyses_to_single_detector(analyses)
@@ -15,6 +15,9 @@ from pymontecarlo.exceptions import ExportError, ExportWarning
 from pymontecarlo.util.error import ErrorAccumulator
 from pymontecarlo.options import Material, VACUUM, Particle
 from pymontecarlo.options.base import apply_lazy
+from pymontecarlo.util.timing import timed, STAGE_EXPORT
+from pymontecarlo.util.trace import span
+import pymontecarlo.util.fileio as fileio
 
 # Globals and constants variables.
 
@@ -39,8 +42,16 @@ class ExporterBase(metaclass=abc.ABCMeta):
             dirpath (str): full path to output directory
             dry_run: if true no file is written on disk
         """
-        with ErrorAccumulator(ExportWarning, ExportError) as erracc:
-            await self._export(options, dirpath, erracc, dry_run)
+        with timed(STAGE_EXPORT), span(STAGE_EXPORT):
+            with ErrorAccumulator(ExportWarning, ExportError) as erracc:
+                await self._export(options, dirpath, erracc, dry_run)
+
+    async def _run_io(self, func, *args, **kwargs):
+        """
+        Runs a blocking file operation, e.g. writing an input file, outside
+        the event loop and returns its result.
+        """
+        return await fileio.run_io(func, *args, **kwargs)
 
     @abc.abstractmethod
     async def _export(self, options, dirpath, erracc, dry_run=False):
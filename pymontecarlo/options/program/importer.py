@@ -10,6 +10,9 @@ import abc
 # Local modules.
 from pymontecarlo.exceptions import ImportError, ImportWarning
 from pymontecarlo.util.error import ErrorAccumulator
+from pymontecarlo.util.timing import timed, STAGE_IMPORT
+from pymontecarlo.util.trace import span
+import pymontecarlo.util.fileio as fileio
 
 # Globals and constants variables.
 
@@ -25,8 +28,16 @@ class ImporterBase(metaclass=abc.ABCMeta):
         :arg options: options used for the simulation
         :arg dirpath: path containing the simulation files
         """
-        with ErrorAccumulator(ImportWarning, ImportError) as erracc:
-            return await self._import(options, dirpath, erracc)
+        with timed(STAGE_IMPORT), span(STAGE_IMPORT):
+            with ErrorAccumulator(ImportWarning, ImportError) as erracc:
+                return await self._import(options, dirpath, erracc)
+
+    async def _run_io(self, func, *args, **kwargs):
+        """
+        Runs a blocking file operation, e.g. reading an output file, outside
+        the event loop and returns its result.
+        """
+        return await fileio.run_io(func, *args, **kwargs)
 
     @abc.abstractmethod
     async def _import(self, options, dirpath, erracc):
@@ -37,7 +48,7 @@ class ImporterBase(metaclass=abc.ABCMeta):
 
     def _run_importers(self, options, dirpath, erracc, *args, **kwargs):
         """
-        Internal command to call the register import functions. 
+        Internal command to call the register import functions.
         All optional arguments passed to this method are transferred to the
         import methods.
         """
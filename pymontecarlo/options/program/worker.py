@@ -10,6 +10,8 @@ import asyncio
 # Third party modules.
 
 # Local modules.
+from pymontecarlo.util.timing import timed, STAGE_WORKER
+from pymontecarlo.util.trace import span
 
 # Globals and constants variables.
 
@@ -50,7 +52,10 @@ class WorkerBase(metaclass=abc.ABCMeta):
         token.start()
 
         try:
-            await self._run(token, simulation, outputdir)
+            with timed(STAGE_WORKER), span(
+                STAGE_WORKER, simulation=simulation.identifier
+            ):
+                await self._run(token, simulation, outputdir)
         except asyncio.CancelledError:
             token.cancel()
             raise
@@ -68,6 +73,10 @@ class WorkerBase(metaclass=abc.ABCMeta):
         Actual implementation to run a simulation. 
         The :meth:`run` takes care of handling the cancellation and 
         error exceptions with the token.
+
+        External programs should be started with
+        :func:`create_subprocess_exec <pymontecarlo.util.process.create_subprocess_exec>`,
+        so that they are killed if the simulation times out.
         
         Args:
             token (:class:`Token`): token to track the progress of this simulation.
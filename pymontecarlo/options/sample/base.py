@@ -7,6 +7,8 @@ __all__ = ["LayerBuilder", "Layer"]
 # Standard library modules.
 import abc
 import math
+import operator
+import functools
 import itertools
 
 # Third party modules.
@@ -411,8 +413,8 @@ class LayeredSampleBuilderBase(SampleBuilderBase):
         self.layer_builders = []
 
     def __len__(self):
-        layers_list = self._calculate_layer_combinations()
-        return super().__len__() * len(layers_list)
+        it = [super().__len__()] + [len(builder) for builder in self.layer_builders]
+        return functools.reduce(operator.mul, it)
 
     def _calculate_layer_combinations(self):
         layers_list = [builder.build() for builder in self.layer_builders]
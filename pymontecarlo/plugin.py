@@ -0,0 +1,290 @@
+"""
+Registry of the plug-ins, i.e. the Monte Carlo programs and other extensions
+installed as separate packages.
+
+Plug-ins are declared as entry points in their ``setup.py``::
+
+    entry_points={
+        "pymontecarlo.programs": ["casino2 = pymontecarlo_casino2.program:Casino2Program"],
+        "pymontecarlo.plugins": ["casino2 = pymontecarlo_casino2"],
+    }
+
+Top-level modules named ``pymontecarlo_*`` without entry points are also
+found, for backward compatibility.
+
+Discovery does not import anything. Its result is saved in a manifest in
+the cache directory, which is reused until a directory of :data:`sys.path`
+changes (e.g. a package is installed). A program, with its exporter, worker
+and importer, is only imported when it is first requested.
+"""
+
+# Standard library modules.
+import os
+import sys
+import json
+import hashlib
+import pkgutil
+import logging
+import importlib
+import threading
+
+try:
+    import importlib.metadata as importlib_metadata
+except ImportError:  # pragma: no cover
+    import importlib_metadata
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.util.path import get_cache_dir
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+GROUP_PROGRAMS = "pymontecarlo.programs"
+GROUP_PLUGINS = "pymontecarlo.plugins"
+GROUPS = (GROUP_PROGRAMS, GROUP_PLUGINS)
+
+LEGACY_PREFIX = "pymontecarlo_"
+
+MANIFEST_FILENAME = "plugins-{}.json"
+MANIFEST_VERSION = 1
+
+
+def _select_entry_points(group):
+    entry_points = importlib_metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=group)
+    return entry_points.get(group, [])  # Python < 3.10
+
+
+def _load_object(value):
+    """
+    Imports the object referenced by an entry point value, ``module`` or
+    ``module:attribute``.
+    """
+    modulename, _, attrs = value.partition(":")
+    obj = importlib.import_module(modulename.strip())
+    for attr in filter(None, attrs.strip().split(".")):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class PluginRegistry:
+    """
+    Lazy registry of the plug-ins.
+
+    :arg manifest_filepath: path of the cached manifest, ``None`` to not
+        cache the discovery
+    :arg paths: directories to search, :data:`sys.path` if ``None``
+    """
+
+    def __init__(self, manifest_filepath=None, paths=None):
+        self.manifest_filepath = manifest_filepath
+        self.paths = paths
+
+        self._manifest = None
+        self._programs = {}
+        self._plugins = None
+        self.lock = threading.RLock()
+
+    def _get_paths(self):
+        # The working directory is excluded, since it changes too often to
+        # be part of the fingerprint
+        paths = sys.path if self.paths is None else self.paths
+        return [path for path in paths if path and path != os.curdir]
+
+    def _create_fingerprint(self):
+        """
+        Returns the modification time of each search path, which changes
+        when a package is installed or removed.
+        """
+        fingerprint = []
+        for path in self._get_paths():
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            fingerprint.append([path, mtime_ns])
+        return fingerprint
+
+    def _discover(self, fingerprint):
+        paths = [path for path, _mtime_ns in fingerprint]
+
+        entry_points = {}
+        packages = set()
+        for group in GROUPS:
+            entry_points[group] = {}
+            for entry_point in _select_entry_points(group):
+                entry_points[group].setdefault(entry_point.name, entry_point.value)
+                packages.add(entry_point.value.split(":")[0].split(".")[0].strip())
+
+        modules = sorted(
+            name
+            for _finder, name, _ispkg in pkgutil.iter_modules(paths)
+            if name.startswith(LEGACY_PREFIX) and name not in packages
+        )
+
+        return {
+            "version": MANIFEST_VERSION,
+            "fingerprint": fingerprint,
+            "entry_points": entry_points,
+            "modules": modules,
+        }
+
+    def _read_manifest(self, fingerprint):
+        if self.manifest_filepath is None:
+            return None
+
+        try:
+            with open(self.manifest_filepath, "r", encoding="utf8") as fp:
+                manifest = json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        if manifest.get("fingerprint") != fingerprint:
+            return None
+
+        return manifest
+
+    def _write_manifest(self, manifest):
+        if self.manifest_filepath is None:
+            return
+
+        # Written in a temporary file and renamed, since several processes
+        # may start at the same time
+        tmpfilepath = "{}.{}.tmp".format(self.manifest_filepath, os.getpid())
+        try:
+            with open(tmpfilepath, "w", encoding="utf8") as fp:
+                json.dump(manifest, fp)
+            os.replace(tmpfilepath, self.manifest_filepath)
+        except OSError:
+            logger.debug("Could not write plug-in manifest", exc_info=True)
+
+    @property
+    def manifest(self):
+        """
+        Discovered plug-ins, read from the cached manifest when it is
+        up-to-date.
+        """
+        with self.lock:
+            if self._manifest is None:
+                fingerprint = self._create_fingerprint()
+                manifest = self._read_manifest(fingerprint)
+                if manifest is None:
+                    manifest = self._discover(fingerprint)
+                    self._write_manifest(manifest)
+                self._manifest = manifest
+
+                logger.debug("Plug-ins: {}".format(", ".join(self.iter_plugin_names())))
+
+            return self._manifest
+
+    def refresh(self):
+        """
+        Discovers the plug-ins again and updates the cached manifest.
+        Plug-ins already imported are not reloaded.
+        """
+        with self.lock:
+            self._manifest = self._discover(self._create_fingerprint())
+            self._write_manifest(self._manifest)
+            self._plugins = None
+
+    def iter_program_names(self):
+        yield from sorted(self.manifest["entry_points"][GROUP_PROGRAMS])
+
+    def iter_plugin_names(self):
+        names = set(self.manifest["entry_points"][GROUP_PLUGINS])
+        names.update(self.manifest["modules"])
+        yield from sorted(names)
+
+    def get_program_class(self, name):
+        """
+        Returns the class of the program registered as *name*, importing it
+        if needed.
+
+        :raises KeyError: if no program is registered as *name*
+        """
+        with self.lock:
+            if name not in self._programs:
+                value = self.manifest["entry_points"][GROUP_PROGRAMS].get(name)
+                if value is None:
+                    raise KeyError("No program {!r}".format(name))
+                self._programs[name] = _load_object(value)
+
+            return self._programs[name]
+
+    def load_plugins(self):
+        """
+        Imports all plug-ins and programs, and returns a :class:`dict` of
+        the plug-in names and modules (or objects).
+        Plug-ins which cannot be imported are logged and skipped.
+        """
+        with self.lock:
+            if self._plugins is not None:
+                return self._plugins
+
+            manifest = self.manifest
+            plugins = {}
+
+            values = dict(manifest["entry_points"][GROUP_PLUGINS])
+            for name in manifest["modules"]:
+                values.setdefault(name, name)
+
+            for name, value in sorted(values.items()):
+                try:
+                    plugins[name] = _load_object(value)
+                except Exception:
+                    logger.exception("Could not load plug-in {}".format(name))
+
+            for name in self.iter_program_names():
+                try:
+                    self.get_program_class(name)
+                except Exception:
+                    logger.exception("Could not load program {}".format(name))
+
+            self._plugins = plugins
+            return plugins
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def _get_manifest_filepath():
+    if os.environ.get("PYMONTECARLO_PLUGIN_CACHE", "1") == "0":
+        return None
+
+    try:
+        # One manifest per Python environment
+        key = hashlib.sha1(sys.executable.encode("utf8")).hexdigest()[:12]
+        return os.path.join(get_cache_dir(), MANIFEST_FILENAME.format(key))
+    except OSError:
+        return None
+
+
+def get_registry():
+    """
+    Returns the default registry, with its manifest in the cache directory.
+    The cache is disabled with the environment variable
+    ``PYMONTECARLO_PLUGIN_CACHE=0``.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PluginRegistry(_get_manifest_filepath())
+        return _registry
+
+
+def iter_program_names():
+    return get_registry().iter_program_names()
+
+
+def get_program_class(name):
+    return get_registry().get_program_class(name)
+
+
+def load_plugins():
+    return get_registry().load_plugins()
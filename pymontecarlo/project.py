@@ -3,7 +3,12 @@ Project.
 """
 
 # Standard library modules.
+import os
 import re
+import time
+import shutil
+import asyncio
+import queue
 import threading
 import logging
 
@@ -11,18 +16,141 @@ logger = logging.getLogger(__name__)
 
 # Third party modules.
 import pandas as pd
+import h5py
 
 # Local modules.
 from pymontecarlo.entity import EntityBase, EntryHDF5IOMixin
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.options.options import OptionsIndex
 from pymontecarlo.formats.dataframe import (
     create_options_dataframe,
     create_results_dataframe,
 )
 from pymontecarlo.util.signal import Signal
+from pymontecarlo.util.trace import span
 
 # Globals and constants variables.
 
 
+class _DependencyGraph:
+    """
+    Tracks the simulations required by the analyses of each simulation
+    (e.g. the standards of an unknown for k-ratios) and the simulations
+    which must be recalculated.
+    It assumes that simulations are only appended to the project.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+        # Simulation of each options
+        self._index = OptionsIndex()
+
+        # Simulations waiting for a required simulation, keyed by its options
+        self._waiting = OptionsIndex()
+
+        # Required and dependent simulations, keyed by id() of a simulation
+        self._dependencies = {}
+        self._dependents = {}
+
+        # Analyses of each simulation and whether their dependencies are known,
+        # keyed by id()
+        self._analyses = {}
+
+        # Simulations to recalculate, keyed by id()
+        self._dirty = {}
+
+        # Simulations with an analysis which may depend on any simulation
+        self._unbounded = {}
+
+    def get(self, options):
+        return self._index.get(options)
+
+    def sync(self, simulations):
+        """
+        Registers the simulations appended to the list since the last call.
+        """
+        if len(simulations) < self.count:
+            self.__init__()
+
+        for simulation in simulations[self.count :]:
+            self.add(simulation)
+
+    def add(self, simulation):
+        key = id(simulation)
+        options = simulation.options
+        self.count += 1
+
+        self._index.add(options, simulation)
+        self._dependencies[key] = []
+        self._dependents.setdefault(key, [])
+        self._analyses[key] = []
+        self._dirty[key] = simulation
+
+        for analysis in options.analyses:
+            list_options = analysis.dependencies(options)
+            self._analyses[key].append((analysis, list_options is not None))
+
+            if list_options is None:
+                self._unbounded[key] = simulation
+                continue
+
+            for required_options in list_options:
+                required_simulation = self._index.get(required_options)
+                if required_simulation is not None:
+                    self._add_edge(simulation, required_simulation)
+                    continue
+
+                waiting = self._waiting.get(required_options)
+                if waiting is None:
+                    waiting = self._waiting[required_options] = []
+                waiting.append(simulation)
+
+        # Simulations waiting for this one can now be recalculated
+        waiting = self._waiting.pop(options, None)
+        for dependent in waiting or []:
+            self._add_edge(dependent, simulation)
+            self.mark_dirty(dependent)
+
+    def _add_edge(self, simulation, required_simulation):
+        dependencies = self._dependencies[id(simulation)]
+        if any(s is required_simulation for s in dependencies):
+            return
+        dependencies.append(required_simulation)
+        self._dependents[id(required_simulation)].append(simulation)
+
+    def mark_dirty(self, simulation):
+        self._dirty[id(simulation)] = simulation
+
+    def mark_dependents_dirty(self, simulation):
+        for dependent in self._dependents.get(id(simulation), []):
+            self.mark_dirty(dependent)
+
+    def pop_all_dirty(self):
+        """
+        Returns the simulations to recalculate, in order they were marked.
+        """
+        simulations = list(self._dirty.values())
+        self._dirty.clear()
+        return simulations
+
+    def dirty_count(self):
+        return len(self._dirty)
+
+    def mark_unbounded_dirty(self):
+        self._dirty.update(self._unbounded)
+
+    def get_dependencies(self, simulation):
+        return tuple(self._dependencies[id(simulation)])
+
+    def get_analyses(self, simulation):
+        """
+        Returns the analyses of the simulation and whether their
+        dependencies are known.
+        """
+        return self._analyses[id(simulation)]
+
+
 class Project(EntityBase, EntryHDF5IOMixin):
 
     simulation_added = Signal()
@@ -33,6 +161,8 @@ class Project(EntityBase, EntryHDF5IOMixin):
         self.simulations = []
         self.lock = threading.Lock()
         self.recalculate_required = False
+        self._graph = _DependencyGraph()
+        self._recalculation_lock = None
 
     def __getstate__(self):
         with self.lock:
@@ -43,11 +173,15 @@ class Project(EntityBase, EntryHDF5IOMixin):
 
         self.filepath = filepath
         self.simulations = simulations
+        self.lock = threading.Lock()
         self.recalculate_required = True
+        self._graph = _DependencyGraph()
+        self._recalculation_lock = None
 
     def add_simulation(self, simulation):
-        with self.lock:
-            if simulation in self.simulations:
+        with span("add_simulation", simulation=simulation.identifier), self.lock:
+            self._graph.sync(self.simulations)
+            if self._graph.get(simulation.options) is not None:
                 return
 
             identifiers = [
@@ -65,32 +199,143 @@ class Project(EntityBase, EntryHDF5IOMixin):
                 simulation.identifier += "-{:d}".format(last + 1)
 
             self.simulations.append(simulation)
+            self._graph.sync(self.simulations)
             self.recalculate_required = True
             self.simulation_added.send(simulation)
 
-    async def recalculate(self, token=None):
+    def find_simulation(self, options):
+        """
+        Returns the first simulation of the project with the same options,
+        or ``None``.
+        The simulations are indexed once, when they are added, so the lookup
+        does not depend on the number of simulations.
+        """
         with self.lock:
-            if token:
-                token.start()
-            count = len(self.simulations)
+            self._graph.sync(self.simulations)
+            return self._graph.get(options)
 
-            for i, simulation in enumerate(self.simulations):
-                progress = i / count
-                status = "Calculating simulation {}".format(simulation.identifier)
-                if token:
-                    token.update(progress, status)
+    async def recalculate(self, token=None):
+        """
+        Calculates the analyses of the simulations added since the last
+        recalculation and of the simulations depending on them, e.g. the
+        unknowns of a new standard.
+
+        The calculations are performed in a separate thread on copies of the
+        simulations, so the event loop is not blocked and simulations can
+        be added meanwhile.
+        The new results are then added to the simulations of the project at
+        once.
+        """
+        loop = asyncio.get_event_loop()
 
-                newresult = False
-                for analysis in simulation.options.analyses:
-                    newresult |= analysis.calculate(simulation, tuple(self.simulations))
+        # One recalculation at a time, per event loop
+        if self._recalculation_lock is None or self._recalculation_lock[0] is not loop:
+            self._recalculation_lock = (loop, asyncio.Lock())
 
-                if newresult:
-                    self.simulation_recalculated.send(simulation)
+        async with self._recalculation_lock[1]:
+            with span("recalculate"):
+                if token:
+                    token.start()
+
+                graph = self._graph
+                with self.lock:
+                    graph.sync(self.simulations)
+                    graph.mark_unbounded_dirty()
+                    count = graph.dirty_count()
+                    self.recalculate_required = False
+
+                i = 0
+
+                while True:
+                    with self.lock:
+                        batch = graph.pop_all_dirty()
+                        if not batch:
+                            break
+                        snapshots, groups = self._prepare_calculations(batch)
+
+                    try:
+                        progress = min(i / count, 1.0)
+                        newresults = await loop.run_in_executor(
+                            None, self._calculate, groups, len(batch), progress, token
+                        )
+                    except BaseException as exc:
+                        # Nothing was merged, so the batch is calculated again at
+                        # the next recalculation
+                        with self.lock:
+                            for simulation in batch:
+                                graph.mark_dirty(simulation)
+                            self.recalculate_required = True
+
+                        if token:
+                            if isinstance(exc, asyncio.CancelledError):
+                                token.cancel()
+                            else:
+                                token.error()
+                        raise
+
+                    i += len(batch)
+
+                    with self.lock:
+                        self._merge_calculations(batch, snapshots, newresults)
 
+                if token:
+                    token.done()
+
+    def _prepare_calculations(self, batch):
+        """
+        Returns copies of the simulations of the batch and the calculations to
+        perform on them, grouped by analysis class, so that each class can
+        calculate all its simulations at once.
+        Only the required simulations are given to analyses with known
+        dependencies.
+        """
+        graph = self._graph
+        simulations = tuple(self.simulations)
+
+        snapshots = []
+        groups = {}
+        for j, simulation in enumerate(batch):
+            snapshot = Simulation(
+                simulation.options, simulation.results, simulation.identifier
+            )
+            snapshots.append(snapshot)
+
+            dependencies = graph.get_dependencies(simulation)
+
+            for analysis, bounded in graph.get_analyses(simulation):
+                items, owners = groups.setdefault(type(analysis), ([], []))
+                items.append(
+                    (analysis, snapshot, dependencies if bounded else simulations)
+                )
+                owners.append(j)
+
+        return snapshots, groups
+
+    def _calculate(self, groups, count, progress, token):
+        newresults = [False] * count
+
+        for analysis_class, (items, owners) in groups.items():
+            status = "Calculating {} of {} simulation(s)".format(
+                analysis_class.__name__, len(set(owners))
+            )
             if token:
-                token.done()
+                token.update(progress, status)
+
+            for j, newresult in zip(owners, analysis_class.calculate_many(items)):
+                newresults[j] |= newresult
+
+        return newresults
+
+    def _merge_calculations(self, batch, snapshots, newresults):
+        for simulation, snapshot, newresult in zip(batch, snapshots, newresults):
+            if not newresult:
+                continue
 
-            self.recalculate_required = False
+            # Results are only appended by the analyses
+            simulation.results += snapshot.results[len(simulation.results) :]
+
+            self._graph.mark_dependents_dirty(simulation)
+            self.simulation_recalculated.send(simulation)
 
     def create_options_dataframe(
         self,
@@ -155,7 +400,9 @@ class Project(EntityBase, EntryHDF5IOMixin):
             filepath = self.filepath
         if filepath is None:
             raise RuntimeError("No file path given")
-        super().write(filepath)
+
+        with span("write", filepath=filepath):
+            super().write(filepath)
 
     @property
     def result_classes(self):
@@ -200,3 +447,178 @@ class Project(EntityBase, EntryHDF5IOMixin):
 
 
 # endregion
+
+
+class ProjectWriter:
+    """
+    Saves a project incrementally while simulations are added.
+
+    When started, the current simulations are written in a working file,
+    next to the project file. Afterwards, each simulation added to the
+    project, and each new result from a recalculation, is appended to the
+    working file by a background thread. Groups already written are never
+    rewritten.
+
+    Every *flush_interval* seconds, if anything was written, the project file
+    is atomically replaced by a copy of the working file (checkpoint).
+    :meth:`close` moves the working file to the project file.
+    The project file is therefore always complete: an existing project file
+    is only replaced at the first checkpoint, and after a crash, it contains
+    the simulations of the last checkpoint.
+
+    Usage::
+
+        with ProjectWriter(project, filepath):
+            ...
+
+    Args:
+        project (:class:`Project`): project to save
+        filepath (str): path of the project file.
+            If ``None``, the file path of the project is used.
+        flush_interval (float): interval in seconds between checkpoints
+    """
+
+    WORKING_SUFFIX = ".part"
+    CHECKPOINT_SUFFIX = ".tmp"
+
+    def __init__(self, project, filepath=None, flush_interval=10.0):
+        if filepath is None:
+            filepath = project.filepath
+        if filepath is None:
+            raise RuntimeError("No file path given")
+
+        self.project = project
+        self.filepath = filepath
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._file = None
+        self._changed = False
+
+        # Number of results written for each simulation, keyed by identifier
+        self._written_result_counts = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self.project.simulation_added.connect(self._on_simulation_changed)
+        self.project.simulation_recalculated.connect(self._on_simulation_changed)
+
+        # Write current simulations
+        self._file = h5py.File(self.working_filepath, "w")
+        self.project.convert_hdf5(self._file)
+        self._changed = True
+
+        for name, group_simulation in self._file[Project.GROUP_SIMULATIONS].items():
+            group_results = group_simulation[Simulation.GROUP_RESULTS]
+            self._written_result_counts[name] = len(group_results)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        logger.debug("Incremental writing of project in {}".format(self.filepath))
+
+    def close(self):
+        """
+        Writes the pending simulations and closes the file.
+        """
+        if self._thread is None:
+            return
+
+        self.project.simulation_added.disconnect(self._on_simulation_changed)
+        self.project.simulation_recalculated.disconnect(self._on_simulation_changed)
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+        self._file.close()
+        self._file = None
+        os.replace(self.working_filepath, self.filepath)
+
+        logger.debug("Project file {} closed".format(self.filepath))
+
+    @property
+    def working_filepath(self):
+        return self.filepath + self.WORKING_SUFFIX
+
+    def _checkpoint(self):
+        """
+        Replaces the project file by a copy of the working file.
+        """
+        self._file.close()
+        try:
+            tmpfilepath = self.filepath + self.CHECKPOINT_SUFFIX
+            shutil.copyfile(self.working_filepath, tmpfilepath)
+            os.replace(tmpfilepath, self.filepath)
+        finally:
+            self._file = h5py.File(self.working_filepath, "r+")
+
+        self._changed = False
+        logger.debug("Checkpoint of project file {}".format(self.filepath))
+
+    def _on_simulation_changed(self, simulation):
+        self._queue.put(simulation)
+
+    def _run(self):
+        last_flush = time.monotonic()
+
+        while True:
+            timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+            try:
+                simulation = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                if simulation is None:
+                    break
+
+                try:
+                    self._write_simulation(simulation)
+                    self._changed = True
+                except Exception:
+                    logger.exception(
+                        'Simulation "{}" could not be written'.format(
+                            simulation.identifier
+                        )
+                    )
+
+            if time.monotonic() - last_flush >= self.flush_interval:
+                if self._changed:
+                    try:
+                        self._checkpoint()
+                    except Exception:
+                        logger.exception(
+                            "Checkpoint of project file {} failed".format(self.filepath)
+                        )
+                last_flush = time.monotonic()
+
+        self._file.flush()
+
+    def _write_simulation(self, simulation):
+        group_simulations = self._file[Project.GROUP_SIMULATIONS]
+        name = simulation.identifier
+
+        # Results are only appended to a simulation (e.g. by recalculation),
+        # so only the results not yet written are added.
+        results = list(simulation.results)
+
+        if name not in group_simulations:
+            group_simulation = group_simulations.create_group(name)
+            simulation.convert_hdf5(group_simulation)
+
+        else:
+            count = self._written_result_counts.get(name, 0)
+            group_results = group_simulations[name][Simulation.GROUP_RESULTS]
+            simulation.convert_hdf5_results(group_results, results[count:])
+
+        self._written_result_counts[name] = len(results)
@@ -43,5 +43,11 @@ class KRatioResultBuilder(PhotonResultBuilderBase):
             kratio = uncertainties.ufloat(kratio, 0.0)
         self._add(xrayline, kratio)
 
+    def add_kratio_value(self, xrayline, value, error):
+        """
+        Adds an already calculated k-ratio and its uncertainty.
+        """
+        self._add(xrayline, uncertainties.ufloat(value, error))
+
     def _sum_results(self, results):
         return sum(results)
@@ -5,6 +5,7 @@ Photon based results.
 # Standard library modules.
 import collections.abc
 import abc
+import functools
 
 # Third party modules.
 import uncertainties
@@ -19,6 +20,22 @@ from pymontecarlo.util.xrayline import convert_xrayline
 # Globals and constants variables.
 
 
+@functools.lru_cache(maxsize=None)
+def _element_xray_transitions(element, transition):
+    try:
+        return pyxray.element_xray_transitions(element, transition)
+    except pyxray.NotFound:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _xray_line(element, transition):
+    try:
+        return pyxray.xray_line(element, transition)
+    except pyxray.NotFound:
+        return None
+
+
 class PhotonResultBase(ResultBase, collections.abc.Mapping):
     """
     Base class for photon based results.
@@ -154,11 +171,10 @@ class PhotonResultBuilderBase(ResultBuilderBase):
                     continue
 
                 # Search for the possible transitions (i.e. expand the extra transition)
-                try:
-                    possible_transitions = pyxray.element_xray_transitions(
-                        element, extra_transition
-                    )
-                except pyxray.NotFound:
+                possible_transitions = _element_xray_transitions(
+                    element, extra_transition
+                )
+                if possible_transitions is None:
                     continue
 
                 # Find the results
@@ -175,9 +191,8 @@ class PhotonResultBuilderBase(ResultBuilderBase):
                     continue
 
                 # Add new entry
-                try:
-                    xrayline = pyxray.xray_line(element, extra_transition)
-                except pyxray.NotFound:
+                xrayline = _xray_line(element, extra_transition)
+                if xrayline is None:
                     continue
 
                 newdata[xrayline] = self._sum_results(results)
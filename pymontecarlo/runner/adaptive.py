@@ -0,0 +1,196 @@
+"""
+Adaptive number of trajectories, based on the uncertainty of X-ray lines.
+"""
+
+# Standard library modules.
+import os
+import math
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.program.worker import WorkerBase
+from pymontecarlo.results.photonintensity import EmittedPhotonIntensityResult
+from pymontecarlo.runner.shard import create_options_with_trajectories, merge_results
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.cbook import find_by_type
+import pymontecarlo.util.fileio as fileio
+from pymontecarlo.util.xrayline import convert_xrayline
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+class ConvergenceCriterion:
+    """
+    Target relative uncertainties of X-ray lines.
+
+    Args:
+        targets (dict): target relative uncertainty (``s / n``) for each
+            X-ray line.
+        pilot_trajectories (int): number of trajectories of the first batch.
+            Subsequent batches also have at least this number of trajectories.
+        max_trajectories (int): maximum number of trajectories of a simulation.
+            If ``None``, the number of trajectories of the program is used.
+        result_class: class of the photon intensity result used to evaluate
+            the uncertainties.
+    """
+
+    def __init__(
+        self,
+        targets,
+        pilot_trajectories=1000,
+        max_trajectories=None,
+        result_class=EmittedPhotonIntensityResult,
+    ):
+        self.targets = dict(
+            (convert_xrayline(xrayline), target) for xrayline, target in targets.items()
+        )
+        self.pilot_trajectories = pilot_trajectories
+        self.max_trajectories = max_trajectories
+        self.result_class = result_class
+
+    def relative_uncertainties(self, results):
+        """
+        Returns the relative uncertainty of the X-ray lines with a target.
+        X-ray lines missing from the results or with a zero intensity are not
+        returned, since more trajectories cannot improve them.
+        """
+        uncertainties = {}
+
+        for result in find_by_type(results, self.result_class):
+            for xrayline in self.targets:
+                q = result.get(xrayline)
+                if q.n <= 0.0:
+                    continue
+
+                uncertainties[xrayline] = max(
+                    uncertainties.get(xrayline, 0.0), q.s / q.n
+                )
+
+        return uncertainties
+
+    def find_missing(self, results):
+        """
+        Returns the X-ray lines with a target that are missing from the
+        results or have a zero intensity.
+        """
+        uncertainties = self.relative_uncertainties(results)
+        return [xrayline for xrayline in self.targets if xrayline not in uncertainties]
+
+    def is_converged(self, results):
+        """
+        Returns whether all targets are reached.
+        An X-ray line missing from the results (e.g. a misspelled line) does
+        not reach its target.
+        """
+        uncertainties = self.relative_uncertainties(results)
+        return all(
+            xrayline in uncertainties and uncertainties[xrayline] <= target
+            for xrayline, target in self.targets.items()
+        )
+
+    def estimate_trajectories(self, results, number_trajectories):
+        """
+        Returns the total number of trajectories to reach all targets,
+        knowing that the relative uncertainty decreases as the inverse of the
+        square root of the number of trajectories.
+        If an X-ray line is missing, the number of trajectories is doubled.
+        """
+        estimate = number_trajectories
+
+        for xrayline, uncertainty in self.relative_uncertainties(results).items():
+            ratio = uncertainty / self.targets[xrayline]
+            estimate = max(estimate, math.ceil(number_trajectories * ratio**2))
+
+        if self.find_missing(results):
+            estimate = max(estimate, 2 * number_trajectories)
+
+        return estimate
+
+
+class AdaptiveWorker(WorkerBase):
+    """
+    Runs a simulation in batches using another worker, until the
+    :class:`ConvergenceCriterion` is met or the maximum number of trajectories
+    is reached.
+    The results of all batches are merged into the simulation.
+    """
+
+    def __init__(self, worker, criterion):
+        self.worker = worker
+        self.criterion = criterion
+
+    def __repr__(self):
+        return "<{classname}({worker!r})>".format(
+            classname=self.__class__.__name__, worker=self.worker
+        )
+
+    async def _run(self, token, simulation, outputdir):
+        criterion = self.criterion
+
+        max_trajectories = criterion.max_trajectories
+        if max_trajectories is None:
+            max_trajectories = int(simulation.options.program.number_trajectories)
+
+        list_results = []
+        weights = []
+        results = []
+        number_trajectories = 0
+        batch_trajectories = min(criterion.pilot_trajectories, max_trajectories)
+
+        while batch_trajectories > 0:
+            ibatch = len(list_results) + 1
+
+            options = create_options_with_trajectories(
+                simulation.options, batch_trajectories
+            )
+            identifier = "{}_batch{:d}".format(simulation.identifier, ibatch)
+            batch_simulation = Simulation(options, identifier=identifier)
+
+            batch_outputdir = os.path.join(outputdir, "batch{:d}".format(ibatch))
+            await fileio.makedirs(batch_outputdir, exist_ok=True)
+
+            progress = number_trajectories / max_trajectories
+            token.update(progress, "Running batch {:d}".format(ibatch))
+
+            batch_token = token.create_subtoken(identifier)
+            await self.worker.run(batch_token, batch_simulation, batch_outputdir)
+
+            list_results.append(batch_simulation.results)
+            weights.append(batch_trajectories)
+            number_trajectories += batch_trajectories
+
+            results = merge_results(list_results, weights)
+
+            if criterion.is_converged(results):
+                logger.debug(
+                    'Simulation "{}" converged after {:d} trajectories'.format(
+                        simulation.identifier, number_trajectories
+                    )
+                )
+                break
+
+            estimate = criterion.estimate_trajectories(results, number_trajectories)
+            batch_trajectories = min(
+                max(estimate - number_trajectories, criterion.pilot_trajectories),
+                max_trajectories - number_trajectories,
+            )
+
+        else:
+            logger.debug(
+                'Simulation "{}" reached the maximum of {:d} trajectories'.format(
+                    simulation.identifier, max_trajectories
+                )
+            )
+
+            missing = criterion.find_missing(results)
+            if missing:
+                logger.warning(
+                    'X-ray line(s) {} not found in the results of simulation "{}"'.format(
+                        ", ".join(map(str, missing)), simulation.identifier
+                    )
+                )
+
+        simulation.results += results
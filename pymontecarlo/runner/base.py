@@ -3,35 +3,56 @@ Base runner.
 """
 
 # Standard library modules.
+import os
 import abc
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Third party modules.
+import more_itertools
 
 # Local modules.
 from pymontecarlo.project import Project
 from pymontecarlo.simulation import Simulation
-from pymontecarlo.util.cbook import unique
+from pymontecarlo.options.options import OptionsIndex
 from pymontecarlo.formats.identifier import create_identifiers
+from pymontecarlo.runner.journal import JobState
+from pymontecarlo.runner.metrics import RunnerMetrics
+from pymontecarlo.runner.events import RunnerEventStream, EVENT_COMPLETED
 
 from pymontecarlo.util.token import Token
+import pymontecarlo.util.fileio as fileio
 
 # Globals and constants variables.
 
 
 class SimulationRunnerBase(metaclass=abc.ABCMeta):
-    def __init__(self, project=None, token=None, max_workers=1):
+    def __init__(self, project=None, token=None, max_workers=1, journal=None):
+        """
+        Args:
+            journal (:class:`JobJournal <pymontecarlo.runner.journal.JobJournal>`):
+                if not ``None``, the submitted, started, completed and failed
+                simulations are recorded in this journal, so that an
+                interrupted run can be continued with :meth:`resume`.
+        """
         if project is None:
             project = Project()
         self._project = project
 
+        self.event_stream = RunnerEventStream()
+        project.simulation_recalculated.connect(
+            self.event_stream.on_simulation_recalculated
+        )
+
         if token is None:
             token = Token("simulation runner")
         self._token = token
 
-        self._submitted_options = []
+        self._submitted_options = OptionsIndex()
+        self.journal = journal
+        self.metrics = RunnerMetrics()
 
     async def __aenter__(self):
         await self.start()
@@ -85,12 +106,137 @@ class SimulationRunnerBase(metaclass=abc.ABCMeta):
         logger.debug("Prepared {} simulations".format(len(simulations)))
 
         for simulation in simulations:
-            self._submitted_options.append(simulation.options)
+            await self._submit_simulation(simulation)
+
+        if self.journal is not None:
+            await self.journal.sync()
+
+        return simulations
+
+    async def submit_iter(self, iterable_options, chunk_size=100):
+        """
+        Submits lazily the options of an iterable, e.g. the generator returned
+        by :meth:`OptionsBuilder.iterbuild <pymontecarlo.options.options.OptionsBuilder.iterbuild>`,
+        and returns the number of submitted simulations.
+
+        Contrary to :meth:`submit`, the options are consumed and prepared in
+        chunks of *chunk_size* options, so that a large parameter sweep is
+        never held in memory at once and the first simulations start
+        immediately.
+        If the queue of the runner is bounded, the submission waits for room
+        in the queue before preparing the next chunk.
+
+        The identifiers of the simulations are made unique across chunks.
+        """
+        identifiers = set()
+        count = 0
+
+        for list_options in more_itertools.chunked(iterable_options, chunk_size):
+            simulations = self.prepare_simulations(*list_options)
+            logger.debug("Prepared {} simulations".format(len(simulations)))
+
+            for simulation in simulations:
+                simulation.identifier = self._make_unique_identifier(
+                    simulation.identifier, identifiers
+                )
+                await self._submit_simulation(simulation)
+
+            if self.journal is not None:
+                await self.journal.sync()
+
+            count += len(simulations)
+
+            # Let the dispatchers run between chunks
+            await asyncio.sleep(0)
+
+        return count
+
+    def _make_unique_identifier(self, identifier, identifiers):
+        unique_identifier = identifier
+
+        i = 2
+        while unique_identifier in identifiers:
+            unique_identifier = "{}_{}".format(identifier, i)
+            i += 1
+
+        identifiers.add(unique_identifier)
+        return unique_identifier
+
+    async def _submit_simulation(self, simulation):
+        self._submitted_options.add(simulation.options)
+        if self.journal is not None:
+            self.journal.record_submitted(simulation)
+        await self._submit(simulation)
+        logger.debug('Simulation "{}" submitted'.format(simulation.identifier))
+
+    async def resume(self):
+        """
+        Submits again the simulations of the journal that were not finished,
+        e.g. after a crash, and returns them.
+
+        Simulations already in the project with results and failed simulations
+        are skipped.
+        The results of completed simulations, which are missing from the
+        project, are imported again from their output directory, instead of
+        running the simulations again.
+        """
+        if self.journal is None:
+            raise RuntimeError("No journal")
+
+        jobs = []
+        for job in await fileio.run_io(self.journal.read_jobs):
+            if job.state == JobState.FAILED:
+                continue
+
+            simulation = await fileio.run_io(self.journal.load_simulation, job)
+            options = simulation.options
+
+            real_simulation = self.project.find_simulation(options)
+            if real_simulation is not None and real_simulation.results:
+                continue
+            if options in self._submitted_options:
+                continue
+
+            if job.state == JobState.COMPLETED:
+                simulation.results += await self._reimport_results(
+                    options, job.outputdir
+                )
+
+            self._submitted_options.add(options)
+            jobs.append((job, simulation))
+
+        simulations = [simulation for _job, simulation in jobs]
+        self._register_simulations(simulations)
+
+        for job, simulation in jobs:
+            if not simulation.results:
+                self.journal.record_submitted(simulation, job.key)
             await self._submit(simulation)
-            logger.debug('Simulation "{}" submitted'.format(simulation.identifier))
+
+            logger.debug(
+                'Simulation "{}" resumed from state {}'.format(
+                    simulation.identifier, job.state.value
+                )
+            )
+
+        await self.journal.sync()
 
         return simulations
 
+    async def _reimport_results(self, options, outputdir):
+        if outputdir is None or not os.path.isdir(outputdir):
+            return []
+
+        try:
+            return await options.program.importer.import_(options, outputdir)
+        except Exception:
+            logger.exception(
+                "Results cannot be imported from {}, simulation will be run".format(
+                    outputdir
+                )
+            )
+            return []
+
     def _expand_options(self, list_options):
         final_list_options = []
 
@@ -100,7 +246,9 @@ class SimulationRunnerBase(metaclass=abc.ABCMeta):
             for analysis in options.analyses:
                 final_list_options.extend(analysis.apply(options))
 
-        return unique(final_list_options)
+        # Remove duplicates, once the analyses have modified the options
+        index = OptionsIndex()
+        return [options for options in final_list_options if index.add(options)]
 
     def _exclude_simulated_options(self, list_options):
         final_list_options = []
@@ -112,12 +260,9 @@ class SimulationRunnerBase(metaclass=abc.ABCMeta):
 
             # Exclude if simulation with same options already exists in project
             # and has results
-            dummy_simulation = Simulation(options, identifier="dummy")
-            if dummy_simulation in self.project.simulations:
-                index = self.project.simulations.index(dummy_simulation)
-                real_simulation = self.project.simulations[index]
-                if real_simulation.results:
-                    continue
+            real_simulation = self.project.find_simulation(options)
+            if real_simulation is not None and real_simulation.results:
+                continue
 
             final_list_options.append(options)
 
@@ -128,6 +273,12 @@ class SimulationRunnerBase(metaclass=abc.ABCMeta):
             return ["simulation1"]
         return create_identifiers(list_options)
 
+    def _register_simulations(self, simulations):
+        """
+        Called with the simulations, before they are submitted.
+        """
+        pass
+
     def _create_simulations(self, list_options, identifiers):
         simulations = []
 
@@ -159,6 +310,7 @@ class SimulationRunnerBase(metaclass=abc.ABCMeta):
         identifiers = self._create_identifiers(list_options)
 
         simulations = self._create_simulations(list_options, identifiers)
+        self._register_simulations(simulations)
 
         return simulations
 
@@ -167,10 +319,49 @@ class SimulationRunnerBase(metaclass=abc.ABCMeta):
         If the runner is running, all the tasks will be cancelled.
         """
         await self.cancel()
+
+        self._project.simulation_recalculated.disconnect(
+            self.event_stream.on_simulation_recalculated
+        )
+        project.simulation_recalculated.connect(
+            self.event_stream.on_simulation_recalculated
+        )
         self._project = project
         self._submitted_options.clear()
         self._token.reset()
 
+    def events(self, *kinds):
+        """
+        Returns an asynchronous iterator over the events of the simulations
+        (see :class:`RunnerEvent <pymontecarlo.runner.events.RunnerEvent>`),
+        optionally only of the specified kinds.
+        Only the events published after this call are returned.
+        The iteration stops when the runner is shutdown or cancelled.
+
+        Example::
+
+            async for event in runner.events(EVENT_COMPLETED, EVENT_FAILED):
+                print(event.kind, event.identifier)
+        """
+        return self.event_stream.subscribe(kinds)
+
+    def as_completed(self):
+        """
+        Returns an asynchronous iterator over the simulations, as they are
+        completed and added to the project.
+        Failed simulations are not returned.
+        """
+        subscription = self.events(EVENT_COMPLETED)
+
+        async def iterate():
+            try:
+                async for event in subscription:
+                    yield event.simulation
+            finally:
+                subscription.close()
+
+        return iterate()
+
     @property
     def project(self):
         """
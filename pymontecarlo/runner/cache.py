@@ -0,0 +1,131 @@
+"""
+Persistent cache of simulation results, shared across projects.
+"""
+
+# Standard library modules.
+import os
+import uuid
+import shutil
+import hashlib
+import logging
+
+# Third party modules.
+import h5py
+
+# Local modules.
+from pymontecarlo.formats.fingerprint import create_candidate_fingerprints
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.path import get_cache_dir
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+class SimulationCache:
+    """
+    On-disk cache of the imported results of simulations.
+
+    Each simulation is saved in a HDF5 file, in a directory named after the
+    hash of the fingerprint of its options.
+    Since different options may have the same fingerprint, the options saved
+    in each file are compared for equality when results are looked up.
+
+    Args:
+        dirpath (str): directory of the cache.
+            If ``None``, the cache directory of the user is used.
+    """
+
+    EXTENSION = ".h5"
+
+    def __init__(self, dirpath=None):
+        if dirpath is None:
+            dirpath = os.path.join(get_cache_dir(), "simulations")
+        self.dirpath = dirpath
+
+    def _get_dirpath(self, fingerprint):
+        key = hashlib.sha256(repr(fingerprint).encode("utf8")).hexdigest()
+        return os.path.join(self.dirpath, key[:2], key)
+
+    def _get_dirpaths(self, options):
+        """
+        Returns the directory of the options, followed by the directories
+        of the other candidate fingerprints.
+        """
+        fingerprints = create_candidate_fingerprints(options)
+        return [self._get_dirpath(fingerprint) for fingerprint in fingerprints]
+
+    def _find(self, options):
+        for dirpath in self._get_dirpaths(options):
+            for simulation in self._iter_simulations(dirpath):
+                if simulation.options == options:
+                    return simulation
+        return None
+
+    def _iter_simulations(self, dirpath):
+        if not os.path.isdir(dirpath):
+            return
+
+        for filename in sorted(os.listdir(dirpath)):
+            if not filename.endswith(self.EXTENSION):
+                continue
+
+            filepath = os.path.join(dirpath, filename)
+            try:
+                with h5py.File(filepath, "r") as f:
+                    simulation = Simulation.parse_hdf5(f)
+            except Exception:
+                logger.exception("Cannot read cached simulation {}".format(filepath))
+                continue
+
+            yield simulation
+
+    def get(self, options):
+        """
+        Returns the results of a simulation with the same options or ``None``
+        if no such simulation is cached.
+        """
+        simulation = self._find(options)
+        if simulation is None:
+            return None
+
+        logger.debug("Results found in cache")
+        return simulation.results
+
+    def put(self, simulation):
+        """
+        Saves the simulation and its results in the cache, unless a simulation
+        with the same options is already cached.
+        Returns ``True`` if the simulation was saved.
+        """
+        if not simulation.results:
+            return False
+
+        if self._find(simulation.options) is not None:
+            return False
+
+        dirpath = self._get_dirpaths(simulation.options)[0]
+        os.makedirs(dirpath, exist_ok=True)
+
+        # Write in a temporary file first, so that a partially written file
+        # is never read by another process
+        filepath = os.path.join(dirpath, uuid.uuid4().hex + self.EXTENSION)
+        tmpfilepath = filepath + ".tmp"
+        try:
+            with h5py.File(tmpfilepath, "w") as f:
+                simulation.convert_hdf5(f)
+            os.replace(tmpfilepath, filepath)
+        finally:
+            if os.path.exists(tmpfilepath):
+                os.remove(tmpfilepath)
+
+        logger.debug("Results of {} saved in cache".format(simulation.identifier))
+        return True
+
+    def __contains__(self, options):
+        return self.get(options) is not None
+
+    def clear(self):
+        """
+        Removes all cached simulations.
+        """
+        shutil.rmtree(self.dirpath, ignore_errors=True)
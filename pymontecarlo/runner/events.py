@@ -0,0 +1,208 @@
+"""
+Stream of the events of a runner, consumed asynchronously.
+"""
+
+# Standard library modules.
+import time
+import asyncio
+import logging
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+EVENT_QUEUED = "queued"
+EVENT_STARTED = "started"
+EVENT_PROGRESS = "progress"
+EVENT_COMPLETED = "completed"
+EVENT_FAILED = "failed"
+EVENT_RECALCULATED = "recalculated"
+
+EVENTS = (
+    EVENT_QUEUED,
+    EVENT_STARTED,
+    EVENT_PROGRESS,
+    EVENT_COMPLETED,
+    EVENT_FAILED,
+    EVENT_RECALCULATED,
+)
+
+
+class RunnerEvent:
+    """
+    Event of a simulation in a runner.
+
+    Attributes:
+        kind (str): one of :data:`EVENTS`
+        simulation (:class:`Simulation <pymontecarlo.simulation.Simulation>`):
+            simulation of the event. For a simulation split in shards, the
+            queued, started and progress events are those of the shards.
+        time (float): time of the event, in seconds since the epoch
+        progress (float): progress of the simulation (progress event only)
+        status (str): status of the simulation (progress event only)
+        error (Exception): exception of the last attempt (failed event only)
+    """
+
+    def __init__(self, kind, simulation, progress=None, status=None, error=None):
+        self.kind = kind
+        self.simulation = simulation
+        self.time = time.time()
+        self.progress = progress
+        self.status = status
+        self.error = error
+
+    def __repr__(self):
+        return "<{classname}({kind}, {identifier})>".format(
+            classname=self.__class__.__name__,
+            kind=self.kind,
+            identifier=self.identifier,
+        )
+
+    @property
+    def identifier(self):
+        return self.simulation.identifier
+
+
+class EventSubscription:
+    """
+    Asynchronous iterator over the events published after its creation.
+    The iteration stops when the stream is closed, i.e. when the runner is
+    shutdown or cancelled, or when :meth:`close` is called.
+
+    Events are never dropped, so a subscription should be consumed (or
+    closed) for the whole run.
+    """
+
+    def __init__(self, stream, kinds=None):
+        self.stream = stream
+        self.kinds = frozenset(kinds) if kinds else None
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue()
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed and self.queue.empty():
+            raise StopAsyncIteration
+
+        event = await self.queue.get()
+        if event is None:
+            self.closed = True
+            raise StopAsyncIteration
+
+        return event
+
+    def accepts(self, event):
+        return self.kinds is None or event.kind in self.kinds
+
+    def put(self, event):
+        """
+        Adds an event (or ``None`` to stop the iteration) without waiting,
+        from any thread.
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.queue.put_nowait(event)
+        else:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def close(self):
+        self.stream.unsubscribe(self)
+        self.put(None)
+
+
+class RunnerEventStream:
+    """
+    Publishes the events of a runner to its subscriptions.
+
+    Publishing an event only adds it to the queue of each subscription, so
+    the dispatchers are never blocked by the consumers.
+    When there is no subscription, nothing is done.
+
+    The progress of the running simulations is published every
+    *progress_interval* seconds, when it changed.
+    """
+
+    def __init__(self, progress_interval=1.0):
+        self.progress_interval = progress_interval
+        self._subscriptions = []
+        self._running = {}
+        self._progress_task = None
+
+    def subscribe(self, kinds=None):
+        """
+        Returns a new :class:`EventSubscription` receiving the events of the
+        specified kinds (all kinds if ``None``).
+        """
+        subscription = EventSubscription(self, kinds)
+        self._subscriptions.append(subscription)
+
+        if self._progress_task is None or self._progress_task.done():
+            self._progress_task = asyncio.ensure_future(self._publish_progress())
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def publish(self, kind, simulation, **kwargs):
+        if not self._subscriptions:
+            return
+
+        event = RunnerEvent(kind, simulation, **kwargs)
+        for subscription in list(self._subscriptions):
+            if subscription.accepts(event):
+                subscription.put(event)
+
+    def track(self, simulation, token):
+        """
+        Publishes the progress of the token of a running simulation, until
+        :meth:`untrack` is called.
+        """
+        self._running[id(simulation)] = [simulation, token, None]
+
+    def untrack(self, simulation):
+        self._running.pop(id(simulation), None)
+
+    async def _publish_progress(self):
+        while self._subscriptions:
+            await asyncio.sleep(self.progress_interval)
+
+            for item in list(self._running.values()):
+                simulation, token, latest_progress = item
+                progress = token.progress
+                if progress == latest_progress:
+                    continue
+
+                item[2] = progress
+                self.publish(
+                    EVENT_PROGRESS, simulation, progress=progress, status=token.status
+                )
+
+    def on_simulation_recalculated(self, simulation):
+        """
+        Handler of :attr:`Project.simulation_recalculated <pymontecarlo.project.Project.simulation_recalculated>`.
+        """
+        self.publish(EVENT_RECALCULATED, simulation)
+
+    def close(self):
+        """
+        Stops the iteration of all subscriptions, once their remaining events
+        are consumed.
+        """
+        for subscription in list(self._subscriptions):
+            subscription.close()
+
+        if self._progress_task is not None:
+            self._progress_task.cancel()
+            self._progress_task = None
@@ -0,0 +1,126 @@
+"""
+Timeouts and retries of failed simulations.
+"""
+
+# Standard library modules.
+import asyncio
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.exceptions import WorkerError, WorkerTimeoutError
+from pymontecarlo.util.process import (
+    track_processes,
+    kill_processes,
+    get_children_pids,
+    find_untracked_children,
+)
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+class FaultTolerance:
+    """
+    Timeout and retries of the simulations of a runner.
+
+    Args:
+        timeout (float): maximum duration in seconds of one attempt to run a
+            simulation. When exceeded, the processes started by the worker
+            are killed and a :exc:`WorkerTimeoutError` is raised.
+            If ``None``, there is no timeout.
+        max_attempts (int): maximum number of times a simulation is run, if
+            it fails with a transient exception.
+        backoff (float): delay in seconds before the first retry.
+        backoff_factor (float): factor multiplying the delay after each retry.
+        max_backoff (float): maximum delay in seconds between two attempts.
+        transient_exceptions (tuple): exception classes which are retried.
+            Other exceptions (e.g. export errors) fail the simulation
+            immediately.
+    """
+
+    def __init__(
+        self,
+        timeout=None,
+        max_attempts=1,
+        backoff=1.0,
+        backoff_factor=2.0,
+        max_backoff=60.0,
+        transient_exceptions=(WorkerError, OSError),
+    ):
+        if max_attempts < 1:
+            raise ValueError("At least one attempt is required")
+
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.transient_exceptions = tuple(transient_exceptions)
+
+    def should_retry(self, exc, attempt):
+        """
+        Returns whether a simulation failing with *exc* at the *attempt*-th
+        attempt (starting at 1) should be run again.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        return isinstance(exc, self.transient_exceptions)
+
+    def get_delay(self, attempt):
+        """
+        Returns the delay in seconds before running again a simulation which
+        failed at the *attempt*-th attempt.
+        """
+        delay = self.backoff * self.backoff_factor ** (attempt - 1)
+        return min(delay, self.max_backoff)
+
+
+class FailedSimulation:
+    """
+    Simulation which could not be run and the exception of its last attempt.
+    """
+
+    def __init__(self, simulation, error, attempts):
+        self.simulation = simulation
+        self.error = error
+        self.attempts = attempts
+
+    def __repr__(self):
+        return "<{classname}({identifier}, {error!r})>".format(
+            classname=self.__class__.__name__,
+            identifier=self.simulation.identifier,
+            error=self.error,
+        )
+
+
+async def run_with_timeout(coro, timeout):
+    """
+    Awaits the coroutine of a worker.
+    If it does not finish within *timeout* seconds, the processes it created
+    and their children are killed, and a :exc:`WorkerTimeoutError` is raised.
+
+    Processes created with
+    :func:`create_subprocess_exec <pymontecarlo.util.process.create_subprocess_exec>`
+    are always killed.
+    Other child processes started during the call (e.g. with
+    :func:`asyncio.create_subprocess_exec`) are only killed if no other
+    simulation runs with a timeout in the same process, since they cannot be
+    attributed to a simulation.
+    With :class:`ProcessPoolSimulationRunner <pymontecarlo.runner.pool.ProcessPoolSimulationRunner>`,
+    each simulation runs in its own process, so all its processes are killed.
+    """
+    if timeout is None:
+        return await coro
+
+    existing_pids = get_children_pids()
+    with track_processes() as pids:
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            untracked_pids = find_untracked_children(existing_pids)
+            kill_processes(pids | untracked_pids)
+            raise WorkerTimeoutError(
+                "Simulation did not finish within {:g} s".format(timeout)
+            )
@@ -3,6 +3,7 @@
 # Standard library modules.
 import asyncio
 import multiprocessing
+import collections.abc
 
 # Third party modules.
 
@@ -14,7 +15,12 @@ from pymontecarlo.util.token import TqdmToken
 
 
 async def run_async(
-    list_options, project=None, max_workers=None, runner_class=None, progress=True
+    list_options,
+    project=None,
+    max_workers=None,
+    runner_class=None,
+    progress=True,
+    token=None,
 ):
     """
     Helper function to run simulations.
@@ -23,6 +29,9 @@ async def run_async(
 
     Args:
         list_options (list): List of options to simulate.
+            An iterator (e.g. :meth:`OptionsBuilder.iterbuild <pymontecarlo.options.options.OptionsBuilder.iterbuild>`)
+            is submitted lazily, without building all the options at once
+            (see :meth:`submit_iter <pymontecarlo.runner.base.SimulationRunnerBase.submit_iter>`).
 
         project (:class:`Project <pymontecarlo.project.Project>`):
             project where to save the simulations.
@@ -36,6 +45,10 @@ async def run_async(
 
         progress (bool): whether to show a progress bar
 
+        token (:class:`Token <pymontecarlo.util.token.Token>`): token of the
+            runner, e.g. to report the progress in another way.
+            If not ``None``, *progress* is ignored.
+
     Returns:
         :class:`Project <pymontecarlo.project.Project>`: project
     """
@@ -45,17 +58,18 @@ async def run_async(
     if runner_class is None:
         runner_class = LocalSimulationRunner
 
-    if progress:
-        token = TqdmToken("Simulations")
-    else:
-        token = None
+    if token is None and progress:
+        token = TqdmToken("Simulations", collapse_finished=True)
 
     async with runner_class(
         project=project, token=token, max_workers=max_workers
     ) as runner:
         runner.token.start()
 
-        await runner.submit(*list_options)
+        if isinstance(list_options, collections.abc.Sequence):
+            await runner.submit(*list_options)
+        else:
+            await runner.submit_iter(list_options)
         await runner.shutdown()
 
         runner.token.done()
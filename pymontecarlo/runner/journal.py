@@ -0,0 +1,270 @@
+"""
+Write-ahead journal of the simulations of a runner, to resume an interrupted
+run.
+"""
+
+# Standard library modules.
+import os
+import enum
+import json
+import time
+import uuid
+import shutil
+import logging
+import threading
+
+# Third party modules.
+import h5py
+
+# Local modules.
+from pymontecarlo.simulation import Simulation
+import pymontecarlo.util.fileio as fileio
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+class JobState(enum.Enum):
+    SUBMITTED = "submitted"
+    STARTED = "started"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class Job:
+    """
+    Latest known state of a simulation in the journal.
+    """
+
+    def __init__(self, key, identifier, state, outputdir=None, error=None):
+        self.key = key
+        self.identifier = identifier
+        self.state = state
+        self.outputdir = outputdir
+        self.error = error
+
+    def __repr__(self):
+        return "<{classname}({identifier}, {state})>".format(
+            classname=self.__class__.__name__,
+            identifier=self.identifier,
+            state=self.state.value,
+        )
+
+    @property
+    def finished(self):
+        return self.state in (JobState.COMPLETED, JobState.FAILED)
+
+
+class JobJournal:
+    """
+    Append-only journal recording when simulations are submitted, started,
+    completed or failed.
+
+    Each line of the journal file is a JSON record. The options of each
+    submitted simulation are saved in a separate HDF5 file, so that the
+    simulation can be recreated after a crash.
+
+    Records are written in the thread pool of the file operations (see
+    :mod:`pymontecarlo.util.fileio`), all the pending records at once with a
+    single sync to disk, so recording does not block the event loop.
+    The options of a simulation are saved before its submission is written,
+    so a record always has its options.
+    :meth:`flush` (or :meth:`sync` in a coroutine) waits until all records
+    are on disk. The runners await :meth:`sync` before starting a
+    simulation and after it is completed or failed, and before
+    :meth:`submit <pymontecarlo.runner.base.SimulationRunnerBase.submit>`
+    returns.
+
+    Args:
+        dirpath (str): directory of the journal
+    """
+
+    FILENAME = "journal.jsonl"
+    DIRNAME_SIMULATIONS = "simulations"
+
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+        self._file = None
+
+        # Records (and simulations to save) not yet written, protected by
+        # the lock; the flush lock ensures only one thread writes at a time
+        self._pending = []
+        self._flush_future = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        # Key of the simulations in progress, keyed by their id(), since
+        # identifiers are not unique between submissions
+        self._keys = {}
+
+    @property
+    def filepath(self):
+        return os.path.join(self.dirpath, self.FILENAME)
+
+    def _get_simulation_filepath(self, key):
+        return os.path.join(self.dirpath, self.DIRNAME_SIMULATIONS, key + ".h5")
+
+    def _record(self, state, key, identifier, simulation=None, **kwargs):
+        record = {
+            "state": state.value,
+            "key": key,
+            "identifier": identifier,
+            "time": time.time(),
+        }
+        record.update(kwargs)
+
+        with self._lock:
+            self._pending.append((json.dumps(record) + "\n", key, simulation))
+            if self._flush_future is None:
+                executor = fileio.get_io_executor()
+                self._flush_future = executor.submit(self._flush_in_background)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Records could not be written in journal")
+
+    def _save_simulation(self, key, simulation):
+        filepath = self._get_simulation_filepath(key)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with h5py.File(filepath, "w") as f:
+            simulation.convert_hdf5(f)
+
+    def flush(self):
+        """
+        Writes the pending records and syncs them to disk.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = []
+                self._flush_future = None
+
+            if not pending:
+                return
+
+            for _line, key, simulation in pending:
+                if simulation is not None:
+                    self._save_simulation(key, simulation)
+
+            if self._file is None:
+                os.makedirs(self.dirpath, exist_ok=True)
+                self._file = open(self.filepath, "a", encoding="utf8")
+
+            self._file.writelines(line for line, _key, _simulation in pending)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    async def sync(self):
+        """
+        Same as :meth:`flush`, without blocking the event loop.
+        """
+        await fileio.run_io(self.flush)
+
+    def record_submitted(self, simulation, key=None):
+        """
+        Records the submission of the simulation and saves its options.
+        Returns the key of the simulation in the journal.
+        """
+        job_simulation = None
+        if key is None:
+            key = uuid.uuid4().hex
+
+            # Options are saved later, so only a copy without results is kept
+            job_simulation = Simulation(
+                simulation.options, identifier=simulation.identifier
+            )
+
+        self._keys[id(simulation)] = key
+        self._record(
+            JobState.SUBMITTED, key, simulation.identifier, simulation=job_simulation
+        )
+        return key
+
+    def record_started(self, simulation, outputdir):
+        key = self._keys.get(id(simulation))
+        if key is None:
+            return
+        self._record(JobState.STARTED, key, simulation.identifier, outputdir=outputdir)
+
+    def record_completed(self, simulation, outputdir=None):
+        """
+        Records that the simulation is completed.
+        The *outputdir* should only be specified if the results of the
+        simulation can be imported again from this directory.
+        """
+        key = self._keys.pop(id(simulation), None)
+        if key is None:
+            return
+        self._record(
+            JobState.COMPLETED, key, simulation.identifier, outputdir=outputdir
+        )
+
+    def record_failed(self, simulation, error):
+        key = self._keys.pop(id(simulation), None)
+        if key is None:
+            return
+        self._record(JobState.FAILED, key, simulation.identifier, error=str(error))
+
+    def read_jobs(self):
+        """
+        Returns the :class:`list` of :class:`Job` of the journal, in order of
+        submission.
+        A truncated last line, e.g. after a crash, is ignored.
+        """
+        jobs = {}
+
+        self.flush()
+        if not os.path.exists(self.filepath):
+            return []
+
+        with open(self.filepath, "r", encoding="utf8") as fp:
+            for line in fp:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("Ignoring corrupted record in journal")
+                    continue
+
+                key = record["key"]
+                state = JobState(record["state"])
+
+                job = jobs.get(key)
+                if job is None:
+                    job = jobs[key] = Job(key, record["identifier"], state)
+
+                job.state = state
+                if state == JobState.SUBMITTED:
+                    job.outputdir = None
+                    job.error = None
+                if "outputdir" in record:
+                    job.outputdir = record["outputdir"]
+                if "error" in record:
+                    job.error = record["error"]
+
+        return list(jobs.values())
+
+    def load_simulation(self, job):
+        """
+        Returns a new :class:`Simulation`, without results, of the job.
+        """
+        self.flush()
+        with h5py.File(self._get_simulation_filepath(job.key), "r") as f:
+            return Simulation.parse_hdf5(f)
+
+    def close(self):
+        self.flush()
+
+        with self._flush_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """
+        Removes the journal and the saved options.
+        """
+        self.close()
+        self._keys.clear()
+        shutil.rmtree(self.dirpath, ignore_errors=True)
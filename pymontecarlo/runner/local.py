@@ -4,10 +4,8 @@ Local runner.
 
 # Standard library modules.
 import os
-import tempfile
-import shutil
+import time
 import asyncio
-import shutil
 import logging
 import multiprocessing
 
@@ -15,119 +13,503 @@ import multiprocessing
 
 # Local modules.
 from pymontecarlo.runner.base import SimulationRunnerBase
+from pymontecarlo.runner.adaptive import AdaptiveWorker
+from pymontecarlo.runner.shard import ShardSimulation, create_shard_group
+from pymontecarlo.runner.scheduler import SimulationPriorityQueue
+from pymontecarlo.runner.metrics import RunnerMetrics
+from pymontecarlo.runner.events import (
+    RunnerEventStream,
+    EVENT_QUEUED,
+    EVENT_STARTED,
+    EVENT_COMPLETED,
+    EVENT_FAILED,
+)
+from pymontecarlo.runner.fault import FaultTolerance, FailedSimulation, run_with_timeout
+from pymontecarlo.util.timing import record_timings
+import pymontecarlo.util.fileio as fileio
 
 # Globals and constants variables.
 logger = logging.getLogger(__name__)
 
 
 class LocalWorkerDispatcher:
-    def __init__(self, project, token, queue):
+    def __init__(
+        self,
+        project,
+        token,
+        queue,
+        convergence=None,
+        cache=None,
+        journal=None,
+        resources=None,
+        fault_tolerance=None,
+        failed_simulations=None,
+        metrics=None,
+        event_stream=None,
+    ):
         self.project = project
         self.token = token
         self.queue = queue
+        self.convergence = convergence
+        self.cache = cache
+        self.journal = journal
+        self.resources = resources
+
+        if fault_tolerance is None:
+            fault_tolerance = FaultTolerance()
+        self.fault_tolerance = fault_tolerance
+
+        if failed_simulations is None:
+            failed_simulations = []
+        self.failed_simulations = failed_simulations
+
+        if metrics is None:
+            metrics = RunnerMetrics()
+        self.metrics = metrics
+
+        if event_stream is None:
+            event_stream = RunnerEventStream()
+        self.event_stream = event_stream
+
+        self.recalculation = None
+        self._attempts = 0
 
     async def run(self):
         logger.debug("Dispatcher running")
 
         while True:
-            # Check for recalculation
-            if (
-                self.project.recalculate_required
-                and self.queue.empty()
-                and self.queue._finished.is_set()
+            # Check for recalculation, unless one is already running
+            if self._is_recalculation_required() and (
+                self.recalculation is None or self.recalculation.done()
             ):
-                # Create new token
-                token = self.token.create_subtoken("Recalculate")
-
-                # Recalculate
-                logger.debug("Starting recalculation of project")
-                await self.project.recalculate(token)
-                logger.debug("Recalculation done")
+                # Recalculate in the background, so that the dispatcher keeps
+                # running the simulations submitted meanwhile
+                self.recalculation = asyncio.ensure_future(self._recalculate())
 
             # Get simulation or wait until the next one is available
             logger.debug("Awaiting for simulation")
 
-            simulation = await self.queue.get()
+            simulation = queued_simulation = await self.queue.get()
+            self.metrics.record_dequeued(simulation)
 
             logger.debug(
                 'Simulation "{}" retrieved from in queue'.format(simulation.identifier)
             )
 
+            # Simulation recorded in the journal, i.e. the parent of a shard
+            if isinstance(queued_simulation, ShardSimulation):
+                job_simulation = queued_simulation.group.simulation
+
+                # Another shard of the simulation failed
+                if queued_simulation.group.failed:
+                    self.queue.task_done()
+                    logger.debug(
+                        'Shard "{}" skipped, since another shard failed'.format(
+                            queued_simulation.identifier
+                        )
+                    )
+                    continue
+            else:
+                job_simulation = queued_simulation
+
+            # Results were found in cache or imported again from a previous
+            # run, so no need to run the simulation
+            if simulation.results:
+                # Task is done once the simulation is added to the project
+                try:
+                    self.metrics.record_completed()
+                    if self.journal is not None:
+                        self.journal.record_completed(job_simulation)
+                        await self.journal.sync()
+                    self.project.add_simulation(simulation)
+                    self.event_stream.publish(EVENT_COMPLETED, simulation)
+                finally:
+                    self.queue.task_done()
+                logger.debug(
+                    'Cached simulation "{}" added to project'.format(
+                        simulation.identifier
+                    )
+                )
+                continue
+
             # Create output directory
             if self.project.filepath is not None:
                 head, tail = os.path.split(self.project.filepath)
                 dirname = os.path.splitext(tail)[0] + "_simulations"
                 outputdir = os.path.join(head, dirname, simulation.identifier)
 
-                if os.path.exists(outputdir) and os.listdir(outputdir):
+                if await fileio.exists(outputdir) and await fileio.listdir(outputdir):
                     logger.debug("Removing content in {}".format(outputdir))
-                    shutil.rmtree(outputdir, ignore_errors=True)
+                    await fileio.rmtree(outputdir)
 
                 temporary = False
             else:
-                outputdir = tempfile.mkdtemp()
+                outputdir = await fileio.mkdtemp()
                 temporary = True
 
-            os.makedirs(outputdir, exist_ok=True)
+            await fileio.makedirs(outputdir, exist_ok=True)
             logger.debug("Created output directory: {}".format(outputdir))
 
+            if self.journal is not None:
+                self.journal.record_started(job_simulation, outputdir)
+                await self.journal.sync()
+            self.event_stream.publish(EVENT_STARTED, queued_simulation)
+
             # Run
+            self._attempts = 0
             try:
-                # Create worker
-                worker = simulation.options.program.worker
-
                 # Create token
                 token = self.token.create_subtoken(
                     simulation.identifier, category="simulation"
                 )
-
-                logger.debug(
-                    'Launching worker "{!r}" of simulation "{}"'.format(
-                        worker, simulation.identifier
+                self.event_stream.track(queued_simulation, token)
+
+                # Wait until enough CPU cores and memory are free
+                if self.resources is not None:
+                    async with self.resources.reserve(simulation.options):
+                        simulation = await self._run_attempts(
+                            token, simulation, outputdir
+                        )
+                else:
+                    simulation = await self._run_attempts(token, simulation, outputdir)
+
+                # Shard succeeded, so add to project once all shards are merged
+                if isinstance(queued_simulation, ShardSimulation):
+                    group = queued_simulation.group
+                    simulation = group.add_completed_shard(simulation)
+
+                # Save results in cache, before the task is marked as done
+                if simulation is not None and self.cache is not None:
+                    await self._put_in_cache(simulation)
+
+                if simulation is not None and self.journal is not None:
+                    # Only the results of a plain simulation, in a persistent
+                    # directory, can be imported again
+                    reimportable = (
+                        not temporary
+                        and self.convergence is None
+                        and job_simulation is queued_simulation
                     )
+                    self.journal.record_completed(
+                        job_simulation, outputdir if reimportable else None
+                    )
+                    await self.journal.sync()
+
+            except Exception as exc:
+                # Keep the dispatcher running for the other simulations
+                logger.exception(
+                    'Simulation "{}" failed'.format(queued_simulation.identifier)
                 )
 
-                await worker.run(token, simulation, outputdir)
+                # The simulation of a shard fails only once, with its first
+                # failed shard
+                failed = True
+                if isinstance(queued_simulation, ShardSimulation):
+                    failed = queued_simulation.group.fail()
 
-                logger.debug('Worker "{!r}" successfully terminated'.format(worker))
+                if failed:
+                    self.failed_simulations.append(
+                        FailedSimulation(job_simulation, exc, self._attempts)
+                    )
+                    self.metrics.record_failed()
+                    if self.journal is not None:
+                        self.journal.record_failed(job_simulation, exc)
+                        await self.journal.sync()
+                    self.event_stream.publish(EVENT_FAILED, job_simulation, error=exc)
+
+                simulation = None
 
             finally:
                 # Set "task done" flag
                 self.queue.task_done()
+                self.event_stream.untrack(queued_simulation)
 
-                # Remove temporary folder
+                # Remove temporary folder in the background
                 if temporary:
-                    shutil.rmtree(outputdir, ignore_errors=True)
-                    logger.debug(
-                        "Removed temporary output directory: {}".format(outputdir)
-                    )
+                    fileio.rmtree_later(outputdir)
+
+            if simulation is None:
+                continue
 
             # Simulation succeeded, so add to project
+            self.metrics.record_completed()
             self.project.add_simulation(simulation)
+            self.event_stream.publish(EVENT_COMPLETED, simulation)
             logger.debug(
                 'Simulation "{}" added to project'.format(simulation.identifier)
             )
 
+    def _is_recalculation_required(self):
+        return (
+            self.project.recalculate_required
+            and self.queue.empty()
+            and self.queue._finished.is_set()
+        )
+
+    async def _recalculate(self):
+        # Simulations added during a recalculation are recalculated once it
+        # is done, since the dispatcher may already wait for the next
+        # simulation
+        while True:
+            token = self.token.create_subtoken("Recalculate")
+
+            logger.debug("Starting recalculation of project")
+            start = time.perf_counter()
+            try:
+                await self.project.recalculate(token)
+            except Exception:
+                logger.exception("Recalculation of project failed")
+                return
+            self.metrics.record_recalculation(time.perf_counter() - start)
+            logger.debug("Recalculation done")
+
+            if not self._is_recalculation_required():
+                break
+
+    async def _run_attempts(self, token, simulation, outputdir):
+        """
+        Runs the worker until it succeeds, a non-transient exception is raised
+        or the maximum number of attempts is reached.
+        """
+        fault_tolerance = self.fault_tolerance
+        self._attempts = 1
+
+        while True:
+            try:
+                return await self._run_timed_worker(token, simulation, outputdir)
+            except Exception as exc:
+                if not fault_tolerance.should_retry(exc, self._attempts):
+                    raise
+
+                delay = fault_tolerance.get_delay(self._attempts)
+                logger.warning(
+                    'Attempt {} of simulation "{}" failed ({}), retrying in {:g} s'.format(
+                        self._attempts, simulation.identifier, exc, delay
+                    )
+                )
+
+            await asyncio.sleep(delay)
+
+            # Start again from an empty output directory
+            simulation.results.clear()
+            await fileio.rmtree(outputdir)
+            await fileio.makedirs(outputdir, exist_ok=True)
+
+            self._attempts += 1
+
+    async def _run_timed_worker(self, token, simulation, outputdir):
+        self.metrics.record_worker_started()
+        start = time.perf_counter()
+
+        with record_timings() as timings:
+            try:
+                return await self._run_worker(token, simulation, outputdir)
+            finally:
+                duration = time.perf_counter() - start
+                self.metrics.record_worker_finished(duration, timings)
+
+    async def _run_worker(self, token, simulation, outputdir):
+        """
+        Runs the worker of the simulation's program and returns the simulated
+        simulation.
+        """
+        worker = self._create_worker(simulation)
+
+        logger.debug(
+            'Launching worker "{!r}" of simulation "{}"'.format(
+                worker, simulation.identifier
+            )
+        )
+
+        simulation = await run_with_timeout(
+            worker.run(token, simulation, outputdir), self.fault_tolerance.timeout
+        )
+
+        logger.debug('Worker "{!r}" successfully terminated'.format(worker))
+
+        return simulation
+
+    async def _put_in_cache(self, simulation):
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, self.cache.put, simulation)
+        except Exception:
+            # The cache is only an optimization, so the simulation is not lost
+            logger.exception(
+                'Results of simulation "{}" could not be cached'.format(
+                    simulation.identifier
+                )
+            )
+
+    def _create_worker(self, simulation):
+        worker = simulation.options.program.worker
+
+        if self.convergence is not None:
+            worker = AdaptiveWorker(worker, self.convergence)
+
+        return worker
+
 
 class LocalSimulationRunner(SimulationRunnerBase):
-    def __init__(self, project=None, token=None, max_workers=1):
-        super().__init__(project, token, max_workers)
+    def __init__(
+        self,
+        project=None,
+        token=None,
+        max_workers=1,
+        shard_trajectories=None,
+        convergence=None,
+        cache=None,
+        journal=None,
+        max_queue_size=0,
+        resources=None,
+        scheduler=None,
+        fault_tolerance=None,
+    ):
+        """
+        Args:
+            shard_trajectories (int): if not ``None``, a simulation with more
+                trajectories than this number is split into shards running
+                concurrently (at most one shard per worker).
+                Their results are merged once all shards are done.
+            convergence (:class:`ConvergenceCriterion <pymontecarlo.runner.adaptive.ConvergenceCriterion>`):
+                if not ``None``, simulations are run in batches until the
+                target uncertainties of the criterion are reached.
+                The number of trajectories of the program is then the
+                maximum number of trajectories.
+            cache (:class:`SimulationCache <pymontecarlo.runner.cache.SimulationCache>`):
+                if not ``None``, the results of a simulation are taken from the
+                cache when available, instead of running the simulation.
+                The results of new simulations are saved in the cache.
+                The cache is disabled with shards or a convergence criterion,
+                since the results are then not produced with the number of
+                trajectories of the options.
+            journal (:class:`JobJournal <pymontecarlo.runner.journal.JobJournal>`):
+                see :class:`SimulationRunnerBase`.
+            max_queue_size (int): if greater than 0, maximum number of
+                simulations waiting in the queue.
+                :meth:`submit` and :meth:`submit_iter` then wait for room in
+                the queue, so the runner must be started before submitting.
+            resources (:class:`ResourceManager <pymontecarlo.runner.resource.ResourceManager>`):
+                if not ``None``, a simulation only starts when the CPU cores
+                and memory required by its program are free.
+                The number of workers is then not limited by the number of
+                CPUs, since the resource manager limits the concurrency.
+            scheduler (:class:`SimulationScheduler <pymontecarlo.runner.scheduler.SimulationScheduler>`):
+                if not ``None``, the simulations are run in the order of
+                priority of the scheduler, instead of in order of submission.
+            fault_tolerance (:class:`FaultTolerance <pymontecarlo.runner.fault.FaultTolerance>`):
+                timeout and retries of the simulations.
+                If ``None``, simulations have no timeout and are not retried.
+                In all cases, a failed simulation is added to
+                :attr:`failed_simulations` and the other simulations continue.
+        """
+        if shard_trajectories is not None and convergence is not None:
+            raise ValueError("Shards and convergence criterion cannot be combined")
+
+        # The results would be stored under options whose number of
+        # trajectories is only a budget (convergence) or a total (shards)
+        if cache is not None and (
+            shard_trajectories is not None or convergence is not None
+        ):
+            logger.warning(
+                "Cache disabled, since it cannot be used with shards or a "
+                "convergence criterion"
+            )
+            cache = None
+
+        super().__init__(project, token, max_workers, journal)
+
+        self.shard_trajectories = shard_trajectories
+        self.convergence = convergence
+        self.cache = cache
+        self.resources = resources
+        self.scheduler = scheduler
+        self.fault_tolerance = fault_tolerance
+        self.failed_simulations = []
 
         # Create queues
-        self._queue = asyncio.Queue()
+        if scheduler is None:
+            self._queue = asyncio.Queue(max_queue_size)
+        else:
+            self._queue = SimulationPriorityQueue(scheduler, max_queue_size)
 
         # Create dispatchers
         self._dispatchers = []
 
-        max_workers = max(1, min(multiprocessing.cpu_count() - 1, max_workers))
+        if resources is None:
+            max_workers = min(multiprocessing.cpu_count() - 1, max_workers)
+        max_workers = max(1, max_workers)
         for _ in range(max_workers):
-            dispatcher = LocalWorkerDispatcher(self.project, self.token, self._queue)
+            dispatcher = self._create_dispatcher()
             self._dispatchers.append(dispatcher)
 
         self._tasks = []
 
+        self.metrics.queue = self._queue
+        self.metrics.number_workers = len(self._dispatchers)
+
+    def _create_dispatcher(self):
+        return LocalWorkerDispatcher(
+            self.project,
+            self.token,
+            self._queue,
+            self.convergence,
+            self.cache,
+            self.journal,
+            self.resources,
+            self.fault_tolerance,
+            self.failed_simulations,
+            self.metrics,
+            self.event_stream,
+        )
+
+    def _register_simulations(self, simulations):
+        if self.scheduler is not None:
+            self.scheduler.register(simulations)
+
     async def _submit(self, simulation):
-        await self._queue.put(simulation)
+        if not simulation.results and self.cache is not None:
+            loop = asyncio.get_event_loop()
+            results = await loop.run_in_executor(
+                None, self.cache.get, simulation.options
+            )
+            if results is not None:
+                logger.debug(
+                    'Results of simulation "{}" found in cache'.format(
+                        simulation.identifier
+                    )
+                )
+                simulation.results += results
+
+        # Simulation with results does not need to run
+        if simulation.results:
+            self.metrics.record_queued(simulation)
+            await self._queue.put(simulation)
+            self.event_stream.publish(EVENT_QUEUED, simulation)
+            return
+
+        group = None
+        if self.shard_trajectories is not None:
+            group = create_shard_group(
+                simulation, self.shard_trajectories, len(self._dispatchers)
+            )
+
+        if group is None:
+            self.metrics.record_queued(simulation)
+            await self._queue.put(simulation)
+            self.event_stream.publish(EVENT_QUEUED, simulation)
+            return
+
+        for shard in group.shards:
+            self.metrics.record_queued(shard)
+            await self._queue.put(shard)
+            self.event_stream.publish(EVENT_QUEUED, shard)
+
+        logger.debug(
+            'Simulation "{}" split in {} shards'.format(
+                simulation.identifier, len(group.shards)
+            )
+        )
 
     async def start(self):
         # Check if already running
@@ -135,6 +517,8 @@ class LocalSimulationRunner(SimulationRunnerBase):
             logger.debug("Already started")
             return
 
+        self.metrics.start()
+
         # Create task for dispatchers
         for dispatcher in self._dispatchers:
             # Use ensure_future instead of create_task, because the latter does not work with qasync.
@@ -149,25 +533,37 @@ class LocalSimulationRunner(SimulationRunnerBase):
 
         await self._queue.join()
 
+        # Wait for the recalculation of the last simulations
+        await asyncio.gather(*self._get_recalculations(), return_exceptions=True)
+
         await self.cancel()
 
+        if self.journal is not None:
+            await fileio.run_io(self.journal.close)
+
         logger.debug("Runner is shutdown")
 
     async def cancel(self):
         logger.debug("Starting cancellation")
 
-        for task in self._tasks:
+        recalculations = self._get_recalculations()
+        for task in self._tasks + recalculations:
             task.cancel()
 
         # Wait until all dispatchers are cancelled.
         logger.debug("Waiting for dispatchers to cancel")
 
-        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*self._tasks, *recalculations, return_exceptions=True)
 
         self._tasks.clear()
+        for dispatcher in self._dispatchers:
+            dispatcher.recalculation = None
 
         logger.debug("All dispatchers are cancelled")
 
+        # Stop the iteration of the events
+        self.event_stream.close()
+
         # Empty queue
         logging.debug("Emptying queue")
 
@@ -177,6 +573,13 @@ class LocalSimulationRunner(SimulationRunnerBase):
 
         logging.debug("Queue was emptied")
 
+    def _get_recalculations(self):
+        return [
+            dispatcher.recalculation
+            for dispatcher in self._dispatchers
+            if dispatcher.recalculation is not None
+        ]
+
     async def set_project(self, project):
         await super().set_project(project)
 
@@ -0,0 +1,332 @@
+"""
+Metrics of a runner: throughput, queue depth and duration of each stage of
+the simulations.
+"""
+
+# Standard library modules.
+import os
+import json
+import time
+import logging
+import threading
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.util.threadutil import RepeatTimer
+from pymontecarlo.util.timing import STAGE_EXPORT, STAGE_WORKER, STAGE_IMPORT
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+STAGE_QUEUE = "queue"
+STAGE_RUN = "run"
+STAGE_RECALCULATION = "recalculation"
+
+STAGES = (
+    STAGE_QUEUE,
+    STAGE_EXPORT,
+    STAGE_RUN,
+    STAGE_IMPORT,
+    STAGE_WORKER,
+    STAGE_RECALCULATION,
+)
+
+
+class DurationSummary:
+    """
+    Count, sum, minimum and maximum of the durations of a stage.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, duration):
+        self.count += 1
+        self.sum += duration
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = duration if self.max is None else max(self.max, duration)
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+        }
+
+
+class RunnerMetrics:
+    """
+    Metrics collected by a runner and its dispatchers.
+
+    The duration of the program run is the duration of the worker minus the
+    durations of the export and import, as timed by
+    :class:`ExporterBase <pymontecarlo.options.program.exporter.ExporterBase>`
+    and :class:`ImporterBase <pymontecarlo.options.program.importer.ImporterBase>`.
+    When the worker runs in another process, the durations timed in this
+    process are returned with the simulation.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = None
+        self.number_workers = 1
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.start_time = None
+            self.queued = 0
+            self.completed = 0
+            self.failed = 0
+            self.busy_workers = 0
+            self.busy_time = 0.0
+            self.durations = dict((stage, DurationSummary()) for stage in STAGES)
+            self._queued_times = {}
+
+    def start(self):
+        with self.lock:
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+
+    def record_queued(self, simulation):
+        with self.lock:
+            self.queued += 1
+            self._queued_times[id(simulation)] = time.monotonic()
+
+    def record_dequeued(self, simulation):
+        with self.lock:
+            queued_time = self._queued_times.pop(id(simulation), None)
+            if queued_time is not None:
+                self.durations[STAGE_QUEUE].add(time.monotonic() - queued_time)
+
+    def record_worker_started(self):
+        with self.lock:
+            self.busy_workers += 1
+
+    def record_worker_finished(self, duration, timings):
+        """
+        Records the duration of one run of a worker and of the stages timed
+        during this run (see :func:`record_timings <pymontecarlo.util.timing.record_timings>`).
+        """
+        with self.lock:
+            self.busy_workers -= 1
+            self.busy_time += duration
+
+            worker_duration = timings.get(STAGE_WORKER, duration)
+            self.durations[STAGE_WORKER].add(worker_duration)
+
+            run_duration = worker_duration
+            for stage in (STAGE_EXPORT, STAGE_IMPORT):
+                if stage in timings:
+                    self.durations[stage].add(timings[stage])
+                    run_duration -= timings[stage]
+
+            self.durations[STAGE_RUN].add(max(0.0, run_duration))
+
+    def record_completed(self):
+        with self.lock:
+            self.completed += 1
+
+    def record_failed(self):
+        with self.lock:
+            self.failed += 1
+
+    def record_recalculation(self, duration):
+        with self.lock:
+            self.durations[STAGE_RECALCULATION].add(duration)
+
+    @property
+    def elapsed_time(self):
+        if self.start_time is None:
+            return 0.0
+        return time.monotonic() - self.start_time
+
+    @property
+    def queue_size(self):
+        if self.queue is None:
+            return 0
+        return self.queue.qsize()
+
+    @property
+    def simulations_per_hour(self):
+        elapsed_time = self.elapsed_time
+        if elapsed_time <= 0.0:
+            return 0.0
+        return self.completed / elapsed_time * 3600.0
+
+    @property
+    def utilization(self):
+        """
+        Fraction of the time the workers spent running simulations.
+        """
+        available_time = self.elapsed_time * self.number_workers
+        if available_time <= 0.0:
+            return 0.0
+        return min(1.0, self.busy_time / available_time)
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "elapsed_time": self.elapsed_time,
+                "queued": self.queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queue_size": self.queue_size,
+                "workers": self.number_workers,
+                "busy_workers": self.busy_workers,
+                "simulations_per_hour": self.simulations_per_hour,
+                "utilization": self.utilization,
+                "durations": dict(
+                    (stage, summary.as_dict())
+                    for stage, summary in self.durations.items()
+                ),
+            }
+
+    def to_prometheus(self, prefix="pymontecarlo_runner"):
+        """
+        Returns the metrics in the text exposition format of Prometheus.
+        """
+        values = self.as_dict()
+        lines = []
+
+        def add_metric(name, kind, description, samples):
+            name = "{}_{}".format(prefix, name)
+            lines.append("# HELP {} {}".format(name, description))
+            lines.append("# TYPE {} {}".format(name, kind))
+            for suffix, labels, value in samples:
+                lines.append("{}{}{} {}".format(name, suffix, labels, value))
+
+        add_metric(
+            "queued_total",
+            "counter",
+            "Number of simulations put in the queue.",
+            [("", "", values["queued"])],
+        )
+        add_metric(
+            "completed_total",
+            "counter",
+            "Number of completed simulations.",
+            [("", "", values["completed"])],
+        )
+        add_metric(
+            "failed_total",
+            "counter",
+            "Number of failed simulations.",
+            [("", "", values["failed"])],
+        )
+        add_metric(
+            "queue_size",
+            "gauge",
+            "Number of simulations waiting in the queue.",
+            [("", "", values["queue_size"])],
+        )
+        add_metric(
+            "busy_workers",
+            "gauge",
+            "Number of workers running a simulation.",
+            [("", "", values["busy_workers"])],
+        )
+        add_metric(
+            "simulations_per_hour",
+            "gauge",
+            "Number of completed simulations per hour.",
+            [("", "", values["simulations_per_hour"])],
+        )
+        add_metric(
+            "utilization",
+            "gauge",
+            "Fraction of the time the workers spent running simulations.",
+            [("", "", values["utilization"])],
+        )
+
+        samples = []
+        for stage, summary in values["durations"].items():
+            labels = '{{stage="{}"}}'.format(stage)
+            samples.append(("_sum", labels, summary["sum"]))
+            samples.append(("_count", labels, summary["count"]))
+        add_metric(
+            "stage_duration_seconds",
+            "summary",
+            "Duration of the stages of the simulations.",
+            samples,
+        )
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsWriter:
+    """
+    Writes periodically the metrics of a runner to a file, in JSON if the
+    file extension is ``.json``, otherwise in the text format of Prometheus
+    (e.g. for the textfile collector of the node exporter).
+    The file is replaced atomically, so it is never read partially written.
+
+    Args:
+        metrics (:class:`RunnerMetrics`): metrics to write
+        filepath (str): path of the file
+        interval (float): interval in seconds between two writes
+    """
+
+    def __init__(self, metrics, filepath, interval=10.0):
+        self.metrics = metrics
+        self.filepath = filepath
+        self.interval = interval
+        self._timer = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def write(self):
+        if os.path.splitext(self.filepath)[1] == ".json":
+            content = json.dumps(self.metrics.as_dict(), indent=2)
+        else:
+            content = self.metrics.to_prometheus()
+
+        tmpfilepath = self.filepath + ".tmp"
+        with open(tmpfilepath, "w", encoding="utf8") as fp:
+            fp.write(content)
+        os.replace(tmpfilepath, self.filepath)
+
+    def _write(self):
+        try:
+            self.write()
+        except Exception:
+            logger.exception("Metrics could not be written")
+
+    def start(self):
+        if self._timer is not None:
+            return
+
+        self._timer = RepeatTimer(self.interval, self._write)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop(self):
+        """
+        Stops writing and writes the final metrics.
+        """
+        if self._timer is None:
+            return
+
+        self._timer.cancel()
+        self._timer.join()
+        self._timer = None
+
+        self._write()
@@ -0,0 +1,191 @@
+"""
+Process pool runner.
+"""
+
+# Standard library modules.
+import asyncio
+import logging
+import multiprocessing
+import concurrent.futures
+
+# Third party modules.
+import psutil
+
+# Local modules.
+from pymontecarlo.runner.local import LocalWorkerDispatcher, LocalSimulationRunner
+from pymontecarlo.runner.fault import run_with_timeout
+from pymontecarlo.util.process import kill_process
+from pymontecarlo.util.token import Token
+from pymontecarlo.util.timing import record_timings, add_timings
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+def _run_worker_in_process(worker, simulation, outputdir, timeout=None):
+    """
+    Runs the worker of a simulation inside a process of the pool.
+    The simulation with its results and the durations of the stages are
+    returned (pickled) to the parent process.
+    The timeout is enforced inside the process of the pool, where the processes
+    created by the worker can be killed.
+    """
+    token = Token(simulation.identifier)
+    with record_timings() as timings:
+        simulation = asyncio.run(
+            run_with_timeout(worker.run(token, simulation, outputdir), timeout)
+        )
+    return simulation, timings
+
+
+class ProcessPoolWorkerDispatcher(LocalWorkerDispatcher):
+    def __init__(
+        self,
+        project,
+        token,
+        queue,
+        convergence=None,
+        cache=None,
+        journal=None,
+        resources=None,
+        fault_tolerance=None,
+        failed_simulations=None,
+        metrics=None,
+        event_stream=None,
+        executor=None,
+    ):
+        super().__init__(
+            project,
+            token,
+            queue,
+            convergence,
+            cache,
+            journal,
+            resources,
+            fault_tolerance,
+            failed_simulations,
+            metrics,
+            event_stream,
+        )
+        self.executor = executor
+
+    async def _run_worker(self, token, simulation, outputdir):
+        if self.executor is None:
+            raise RuntimeError("No process pool executor")
+
+        logger.debug(
+            'Launching simulation "{}" in process pool'.format(simulation.identifier)
+        )
+
+        worker = self._create_worker(simulation)
+
+        token.start("Running in separate process")
+
+        loop = asyncio.get_event_loop()
+        try:
+            simulation, timings = await loop.run_in_executor(
+                self.executor,
+                _run_worker_in_process,
+                worker,
+                simulation,
+                outputdir,
+                self.fault_tolerance.timeout,
+            )
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+        except Exception as exc:
+            token.error(str(exc))
+            raise
+
+        add_timings(timings)
+        token.done()
+
+        logger.debug(
+            'Simulation "{}" returned from process pool'.format(simulation.identifier)
+        )
+
+        return simulation
+
+
+class ProcessPoolSimulationRunner(LocalSimulationRunner):
+    """
+    Runner where the worker of each simulation (export, run and import) is
+    executed in a separate process.
+    Only the dispatching of the simulations remains in the event loop, while
+    the project is recalculated in a thread.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._executor = None
+        super().__init__(*args, **kwargs)
+
+    def _create_dispatcher(self):
+        return ProcessPoolWorkerDispatcher(
+            self.project,
+            self.token,
+            self._queue,
+            self.convergence,
+            self.cache,
+            self.journal,
+            self.resources,
+            self.fault_tolerance,
+            self.failed_simulations,
+            self.metrics,
+            self.event_stream,
+        )
+
+    def _create_executor(self):
+        # Spawn processes to avoid inheriting the running event loop and
+        # threads of the parent process.
+        context = multiprocessing.get_context("spawn")
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=len(self._dispatchers), mp_context=context
+        )
+
+    def _set_executor(self, executor):
+        self._executor = executor
+
+        for dispatcher in self._dispatchers:
+            dispatcher.executor = executor
+
+    async def start(self):
+        if self._executor is None:
+            self._set_executor(self._create_executor())
+            logger.debug("Process pool created")
+
+        await super().start()
+
+    async def shutdown(self):
+        await self._queue.join()
+
+        # All simulations are done, so the processes can exit normally
+        executor = self._executor
+        if executor is not None:
+            self._set_executor(None)
+
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, executor.shutdown)
+            logger.debug("Process pool shutdown")
+
+        await super().shutdown()
+
+    async def cancel(self):
+        await super().cancel()
+
+        executor = self._executor
+        if executor is None:
+            return
+
+        self._set_executor(None)
+
+        # Kill processes still running a cancelled simulation
+        processes = getattr(executor, "_processes", None) or {}
+        for pid in list(processes):
+            try:
+                kill_process(pid)
+            except psutil.NoSuchProcess:
+                pass
+
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.debug("Process pool killed")
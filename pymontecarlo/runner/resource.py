@@ -0,0 +1,178 @@
+"""
+Admission of simulations based on the available CPU cores and memory.
+"""
+
+# Standard library modules.
+import asyncio
+import logging
+import contextlib
+
+# Third party modules.
+import psutil
+
+# Local modules.
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+class ResourceAllocation:
+    """
+    CPU cores and memory reserved for a simulation.
+    """
+
+    def __init__(self, cores, memory_bytes):
+        self.cores = cores
+        self.memory_bytes = memory_bytes
+
+    def __repr__(self):
+        return "<{classname}({cores} cores, {memory_bytes} bytes)>".format(
+            classname=self.__class__.__name__,
+            cores=self.cores,
+            memory_bytes=self.memory_bytes,
+        )
+
+
+class ResourceManager:
+    """
+    Admits a simulation only when enough CPU cores and memory are free for
+    it.
+
+    The requirements of a simulation are declared by its program (see
+    :attr:`ProgramBase.required_cores <pymontecarlo.options.program.base.ProgramBase.required_cores>`
+    and :attr:`ProgramBase.required_memory_bytes <pymontecarlo.options.program.base.ProgramBase.required_memory_bytes>`).
+    The memory is checked against both the memory declared by the running
+    simulations and the memory available on the computer, measured with
+    :mod:`psutil`.
+    When the memory usage of the computer is above *memory_pressure_percent*,
+    no new simulation is admitted until it goes down, instead of risking
+    that a running simulation is killed by the system.
+
+    To guarantee progress, a simulation is always admitted when no other
+    simulation is running.
+
+    Args:
+        max_cores (int): number of CPU cores available for the simulations.
+            If ``None``, the number of logical CPUs minus one is used.
+        reserved_memory_bytes (int): memory left to the other processes of
+            the computer.
+        memory_pressure_percent (float): memory usage (in percent) above which
+            the admission is paused.
+        poll_interval (float): interval in seconds between two measurements
+            of the memory, while simulations are waiting.
+    """
+
+    def __init__(
+        self,
+        max_cores=None,
+        reserved_memory_bytes=512 * 1024**2,
+        memory_pressure_percent=90.0,
+        poll_interval=0.5,
+    ):
+        if max_cores is None:
+            max_cores = max(1, (psutil.cpu_count() or 1) - 1)
+        self.max_cores = max_cores
+        self.reserved_memory_bytes = reserved_memory_bytes
+        self.memory_pressure_percent = memory_pressure_percent
+        self.poll_interval = poll_interval
+
+        self._allocations = []
+        self._condition = None
+
+    @property
+    def used_cores(self):
+        return sum(allocation.cores for allocation in self._allocations)
+
+    @property
+    def used_memory_bytes(self):
+        return sum(allocation.memory_bytes for allocation in self._allocations)
+
+    def _get_virtual_memory(self):
+        return psutil.virtual_memory()
+
+    def _get_condition(self):
+        loop = asyncio.get_event_loop()
+        if self._condition is None or self._condition[0] is not loop:
+            self._condition = (loop, asyncio.Condition())
+        return self._condition[1]
+
+    def _get_requirements(self, options):
+        program = options.program
+        cores = min(max(1, program.required_cores), self.max_cores)
+        memory_bytes = max(0, program.required_memory_bytes)
+        return cores, memory_bytes
+
+    def can_admit(self, cores, memory_bytes):
+        """
+        Returns whether a simulation requiring *cores* and *memory_bytes*
+        can start now.
+        """
+        if not self._allocations:
+            return True
+
+        if self.used_cores + cores > self.max_cores:
+            return False
+
+        memory = self._get_virtual_memory()
+        if memory.percent >= self.memory_pressure_percent:
+            logger.debug(
+                "Admission paused, memory usage at {:.1f}%".format(memory.percent)
+            )
+            return False
+
+        if memory_bytes > memory.available - self.reserved_memory_bytes:
+            return False
+
+        free_memory_bytes = (
+            memory.total - self.reserved_memory_bytes - self.used_memory_bytes
+        )
+        if memory_bytes > free_memory_bytes:
+            return False
+
+        return True
+
+    async def acquire(self, options):
+        """
+        Waits until the resources required by the options are free, reserves
+        them and returns a :class:`ResourceAllocation`.
+        """
+        cores, memory_bytes = self._get_requirements(options)
+        condition = self._get_condition()
+
+        async with condition:
+            while not self.can_admit(cores, memory_bytes):
+                # The memory is measured again after the interval, even if no
+                # simulation finished
+                try:
+                    await asyncio.wait_for(condition.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            allocation = ResourceAllocation(cores, memory_bytes)
+            self._allocations.append(allocation)
+
+        logger.debug("Resources reserved: {!r}".format(allocation))
+        return allocation
+
+    async def release(self, allocation):
+        """
+        Frees the resources of an allocation returned by :meth:`acquire`.
+        """
+        self._allocations.remove(allocation)
+
+        condition = self._get_condition()
+        async with condition:
+            condition.notify_all()
+
+        logger.debug("Resources released: {!r}".format(allocation))
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, options):
+        """
+        Context manager reserving the resources required by the options.
+        """
+        allocation = await self.acquire(options)
+        try:
+            yield allocation
+        finally:
+            await self.release(allocation)
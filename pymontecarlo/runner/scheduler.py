@@ -0,0 +1,108 @@
+"""
+Priority scheduling of the simulations of a runner.
+"""
+
+# Standard library modules.
+import asyncio
+import heapq
+import itertools
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.analysis.kratio import TAG_STANDARD
+from pymontecarlo.options.options import OptionsIndex
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+def estimate_cost(options):
+    """
+    Returns the relative cost of simulating the options.
+    The cost is proportional to the number of trajectories, the beam energy
+    (longer trajectories) and the number of materials of the sample (more
+    complex geometry).
+    """
+    number_trajectories = getattr(options.program, "number_trajectories", 1)
+    energy_keV = options.beam.energy_eV / 1e3
+    number_materials = max(1, len(options.sample.materials))
+    return number_trajectories * energy_keV * number_materials
+
+
+class SimulationScheduler:
+    """
+    Orders the simulations of a runner.
+
+    Simulations required by the analyses of other simulations, e.g. the
+    standards of k-ratio analyses, are run first, starting with those required
+    by the largest number of simulations (fan-out).
+    Then, the simulations are run from the most to the least expensive
+    (longest job first), so that the longest simulation does not start last
+    while the other workers are idle.
+
+    Args:
+        cost_function: function taking an :class:`Options` and returning its
+            relative cost. By default, :func:`estimate_cost`.
+    """
+
+    def __init__(self, cost_function=estimate_cost):
+        self.cost_function = cost_function
+        self._fanouts = OptionsIndex()
+
+    def register(self, simulations):
+        """
+        Counts the simulations requiring each options, based on the analyses
+        of the simulations.
+        Simulations should be registered before they are queued.
+        """
+        for simulation in simulations:
+            options = simulation.options
+            for analysis in options.analyses:
+                for dependency in analysis.dependencies(options) or []:
+                    count = self._fanouts.get(dependency, 0)
+                    self._fanouts[dependency] = count + 1
+
+    def get_fanout(self, options):
+        """
+        Returns the number of registered simulations requiring the options.
+        """
+        fanout = self._fanouts.get(options, 0)
+        if fanout == 0 and TAG_STANDARD in options.tags:
+            fanout = 1
+        return fanout
+
+    def get_priority(self, simulation):
+        """
+        Returns the priority of the simulation; the smallest priority runs
+        first.
+        """
+        options = simulation.options
+        return (-self.get_fanout(options), -self.cost_function(options))
+
+    def clear(self):
+        self._fanouts.clear()
+
+
+class SimulationPriorityQueue(asyncio.Queue):
+    """
+    Queue returning the simulations in the order of a
+    :class:`SimulationScheduler`, instead of first in, first out.
+    Simulations with the same priority are returned in order of insertion.
+    """
+
+    def __init__(self, scheduler, maxsize=0):
+        super().__init__(maxsize)
+        self.scheduler = scheduler
+        self._counter = itertools.count()
+
+    def _init(self, maxsize):
+        self._queue = []
+
+    def _put(self, simulation):
+        priority = self.scheduler.get_priority(simulation)
+        heapq.heappush(self._queue, (priority, next(self._counter), simulation))
+
+    def _get(self):
+        return heapq.heappop(self._queue)[-1]
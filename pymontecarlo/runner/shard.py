@@ -0,0 +1,238 @@
+"""
+Split a simulation with a large number of trajectories into shards, which can
+run concurrently, and merge their results.
+"""
+
+# Standard library modules.
+import math
+import copy
+import random
+import logging
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.options.options import Options
+from pymontecarlo.results.photonintensity import PhotonIntensityResultBase
+from pymontecarlo.simulation import Simulation
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+
+def create_options_with_trajectories(options, number_trajectories):
+    """
+    Returns a copy of the options where the program has the specified number
+    of trajectories and a new random seed.
+    """
+    program = copy.copy(options.program)
+    program.number_trajectories = number_trajectories
+
+    program.seed = random.randrange(1, 2**31)
+
+    return Options(
+        program, options.beam, options.sample, options.analyses, options.tags
+    )
+
+
+def split_options(options, number_shards):
+    """
+    Returns a :class:`list` of options, one per shard, where the number of
+    trajectories of the program is split between the shards.
+    Each shard gets a different random seed, so the program must have a
+    ``seed`` attribute.
+    """
+    number_trajectories = int(options.program.number_trajectories)
+    number_shards = max(1, min(number_shards, number_trajectories))
+
+    quotient, remainder = divmod(number_trajectories, number_shards)
+
+    list_options = []
+    for i in range(number_shards):
+        shard_number_trajectories = quotient + (1 if i < remainder else 0)
+        list_options.append(
+            create_options_with_trajectories(options, shard_number_trajectories)
+        )
+
+    return list_options
+
+
+def merge_photon_intensity_results(results, weights):
+    """
+    Merges photon intensity results of the same analysis.
+    The intensities are expressed per electron, so the merged intensity is the
+    mean of the intensities weighted by the number of trajectories of each
+    shard. Uncertainties are propagated assuming independent shards.
+    """
+    total_weight = sum(weights)
+
+    xraylines = []
+    for result in results:
+        xraylines.extend(xrayline for xrayline in result if xrayline not in xraylines)
+
+    data = {}
+    for xrayline in xraylines:
+        data[xrayline] = (
+            sum(
+                weight * result.get(xrayline)
+                for result, weight in zip(results, weights)
+            )
+            / total_weight
+        )
+
+    return results[0].__class__(results[0].analysis, data)
+
+
+MERGE_METHODS = {PhotonIntensityResultBase: merge_photon_intensity_results}
+
+
+def merge_results(list_results, weights):
+    """
+    Merges the results of each shard.
+
+    Args:
+        list_results (list): list of the results of each shard
+        weights (list): weight of each shard (e.g. number of trajectories)
+
+    Returns:
+        :class:`list` of merged results
+    """
+    # Group the results of the same type and analysis
+    groups = []
+    for results, weight in zip(list_results, weights):
+        for result in results:
+            for group in groups:
+                first_result = group[0][0]
+                if (
+                    type(result) is type(first_result)
+                    and result.analysis == first_result.analysis
+                ):
+                    group.append((result, weight))
+                    break
+            else:
+                groups.append([(result, weight)])
+
+    merged_results = []
+    for group in groups:
+        results, group_weights = zip(*group)
+        result_class = type(results[0])
+
+        for clasz, method in MERGE_METHODS.items():
+            if issubclass(result_class, clasz):
+                break
+        else:
+            raise ValueError(
+                "Result ({0}) cannot be merged.".format(result_class.__name__)
+            )
+
+        merged_results.append(method(results, group_weights))
+
+    return merged_results
+
+
+class ShardSimulation(Simulation):
+    """
+    Simulation of one shard, which is not added to the project.
+    """
+
+    def __init__(self, options, group, identifier):
+        super().__init__(options, identifier=identifier)
+        self.group = group
+
+    def __getstate__(self):
+        # The group is not sent with the shard, e.g. to another process
+        state = self.__dict__.copy()
+        state["group"] = None
+        return state
+
+
+class ShardGroup:
+    """
+    Shards of a simulation.
+    """
+
+    def __init__(self, simulation, number_shards):
+        self.simulation = simulation
+
+        self.shards = []
+        for i, options in enumerate(split_options(simulation.options, number_shards)):
+            identifier = "{}_shard{:d}".format(simulation.identifier, i + 1)
+            self.shards.append(ShardSimulation(options, self, identifier))
+
+        self._completed_shards = []
+        self.failed = False
+
+    def add_completed_shard(self, shard):
+        """
+        Registers a simulated shard.
+        Once all shards are completed, their results are merged in the
+        simulation, which is returned. Otherwise ``None`` is returned.
+        The shards of a failed group are discarded.
+        """
+        if self.failed:
+            return None
+
+        self._completed_shards.append(shard)
+
+        if len(self._completed_shards) < len(self.shards):
+            return None
+
+        list_results = [shard.results for shard in self._completed_shards]
+        weights = [
+            shard.options.program.number_trajectories
+            for shard in self._completed_shards
+        ]
+        self.simulation.results += merge_results(list_results, weights)
+
+        logger.debug(
+            'Merged {} shards of simulation "{}"'.format(
+                len(self.shards), self.simulation.identifier
+            )
+        )
+
+        self._completed_shards.clear()
+        return self.simulation
+
+    def fail(self):
+        """
+        Marks the group as failed, when one of its shards failed, and releases
+        the completed shards and their results.
+        The remaining shards should not be run.
+        Returns ``True`` if the group was not already failed.
+        """
+        if self.failed:
+            return False
+
+        self.failed = True
+        self._completed_shards.clear()
+        return True
+
+
+def create_shard_group(simulation, shard_trajectories, max_shards):
+    """
+    Returns a :class:`ShardGroup` if the simulation has more than
+    *shard_trajectories* trajectories, ``None`` otherwise.
+    The number of shards is at most *max_shards*.
+
+    Programs without a ``seed`` attribute are not split, since all shards
+    would run the same simulation and the uncertainty of the merged results
+    would be underestimated.
+    """
+    program = simulation.options.program
+    number_trajectories = getattr(program, "number_trajectories", None)
+    if number_trajectories is None or number_trajectories <= shard_trajectories:
+        return None
+
+    if not hasattr(program, "seed"):
+        logger.warning(
+            'Simulation "{}" not split in shards, since program {} has no seed'.format(
+                simulation.identifier, program.name
+            )
+        )
+        return None
+
+    number_shards = min(max_shards, math.ceil(number_trajectories / shard_trajectories))
+    if number_shards < 2:
+        return None
+
+    return ShardGroup(simulation, number_shards)
@@ -58,7 +58,13 @@ class Simulation(EntityBase, EntityHDF5Mixin):
         self.options.convert_hdf5(group_options)
 
         group_results = group.create_group(self.GROUP_RESULTS)
-        for result in self.results:
+        self.convert_hdf5_results(group_results, self.results)
+
+    def convert_hdf5_results(self, group_results, results):
+        """
+        Adds the results to the results group of this simulation.
+        """
+        for result in results:
             name = "{} [{:d}]".format(result.__class__.__name__, id(result))
             group_result = group_results.create_group(name)
             result.convert_hdf5(group_result)
@@ -0,0 +1,99 @@
+"""
+Asynchronous file system operations.
+
+The blocking operations are performed in a thread pool dedicated to file
+input/output, so that slow file systems (e.g. network drives) do not block
+the event loop.
+"""
+
+# Standard library modules.
+import os
+import shutil
+import asyncio
+import logging
+import tempfile
+import functools
+import threading
+import concurrent.futures
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending_removals = set()
+
+
+def get_io_executor():
+    """
+    Returns the thread pool executor of the file operations.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                thread_name_prefix="pymontecarlo-io"
+            )
+        return _executor
+
+
+async def run_io(func, *args, **kwargs):
+    """
+    Runs the blocking function in the thread pool of the file operations and
+    returns its result.
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_io_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def exists(path):
+    return await run_io(os.path.exists, path)
+
+
+async def listdir(path):
+    return await run_io(os.listdir, path)
+
+
+async def makedirs(path, exist_ok=False):
+    await run_io(os.makedirs, path, exist_ok=exist_ok)
+
+
+async def mkdtemp():
+    return await run_io(tempfile.mkdtemp)
+
+
+async def rmtree(path):
+    """
+    Removes the directory and all its content, ignoring errors.
+    """
+    await run_io(shutil.rmtree, path, ignore_errors=True)
+
+
+def rmtree_later(path):
+    """
+    Removes the directory and all its content in the background, ignoring
+    errors, and returns immediately a :class:`concurrent.futures.Future`.
+    The pending removals are completed before the interpreter exits.
+    """
+    future = get_io_executor().submit(shutil.rmtree, path, ignore_errors=True)
+
+    _pending_removals.add(future)
+    future.add_done_callback(_pending_removals.discard)
+
+    logger.debug("Removal of {} scheduled".format(path))
+    return future
+
+
+def wait_removals(timeout=None):
+    """
+    Waits until the removals scheduled with :func:`rmtree_later` are
+    completed.
+    """
+    concurrent.futures.wait(list(_pending_removals), timeout)
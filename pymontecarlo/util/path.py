@@ -72,3 +72,39 @@ def get_config_dir():
 
     os.makedirs(configdir, exist_ok=True)
     return configdir
+
+
+def _get_xdg_cache_dir():
+    """
+    Returns the XDG cache directory, according to the `XDG
+    base directory spec
+    <http://standards.freedesktop.org/basedir-spec/basedir-spec-latest.html>`_.
+    """
+    path = os.environ.get("XDG_CACHE_HOME")
+    if path is None:
+        path = get_home()
+        if path is not None:
+            path = os.path.join(path, ".cache")
+    return path
+
+
+def get_cache_dir():
+    cachedir = os.environ.get("PYMONTECARLO_CACHEDIR")
+    if cachedir is not None:
+        cachedir = os.path.abspath(cachedir)
+
+    else:
+        h = get_home()
+        if h is not None:
+            cachedir = os.path.join(h, ".pymontecarlo", "cache")
+
+        if sys.platform.startswith("linux"):
+            xdg_base = _get_xdg_cache_dir()
+            if xdg_base is not None:
+                cachedir = os.path.join(xdg_base, "pymontecarlo")
+
+    if cachedir is None:
+        raise IOError("Could not find cache dir")
+
+    os.makedirs(cachedir, exist_ok=True)
+    return cachedir
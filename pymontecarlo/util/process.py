@@ -2,7 +2,10 @@
 
 # Standard library modules.
 import sys
+import asyncio
 import subprocess
+import contextlib
+import contextvars
 
 # Third party modules.
 
@@ -11,6 +14,11 @@ import psutil
 
 # Globals and constants variables.
 
+_tracked_pids = contextvars.ContextVar("tracked_pids", default=None)
+
+# Sets of pids of all the contexts tracking processes
+_active_tracked_pids = []
+
 
 def create_startupinfo():
     if sys.platform == "win32":
@@ -27,3 +35,71 @@ def kill_process(pid):
     for subpsprocess in psprocess.children(recursive=True):
         subpsprocess.kill()
     psprocess.kill()
+
+
+def kill_processes(pids):
+    """
+    Kills the processes and their children, ignoring the processes which
+    already exited.
+    """
+    for pid in pids:
+        try:
+            kill_process(pid)
+        except psutil.NoSuchProcess:
+            pass
+
+
+@contextlib.contextmanager
+def track_processes():
+    """
+    Context manager returning a :class:`set` where the pid of the processes
+    created with :func:`create_subprocess_exec` in the current context (e.g.
+    asyncio task) are added.
+    """
+    pids = set()
+    token = _tracked_pids.set(pids)
+    _active_tracked_pids.append(pids)
+    try:
+        yield pids
+    finally:
+        _active_tracked_pids.remove(pids)
+        _tracked_pids.reset(token)
+
+
+def get_children_pids():
+    """
+    Returns the pids of the child processes of the current process.
+    """
+    return set(psprocess.pid for psprocess in psutil.Process().children())
+
+
+def find_untracked_children(existing_pids):
+    """
+    Returns the pids of the child processes of the current process, which are
+    not in *existing_pids* and were not created with
+    :func:`create_subprocess_exec`, e.g. with :func:`asyncio.create_subprocess_exec`.
+    These processes can only be attributed to the current context if no
+    other context is tracking processes; otherwise an empty set is returned.
+    """
+    if len(_active_tracked_pids) > 1:
+        return set()
+
+    pids = get_children_pids() - existing_pids
+    for tracked_pids in _active_tracked_pids:
+        pids -= tracked_pids
+    return pids
+
+
+async def create_subprocess_exec(*args, **kwargs):
+    """
+    Same as :func:`asyncio.create_subprocess_exec`, but the process is
+    tracked (see :func:`track_processes`), so that it can be killed if the
+    simulation times out.
+    """
+    process = await asyncio.create_subprocess_exec(*args, **kwargs)
+
+    pids = _tracked_pids.get()
+    if pids is not None:
+        pids.add(process.pid)
+
+    return process
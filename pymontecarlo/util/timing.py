@@ -0,0 +1,74 @@
+"""
+Timing of the stages of a simulation.
+
+The durations are recorded in the current context (e.g. asyncio task), so
+that the exporter, worker and importer of a simulation can report their
+durations to the runner without knowing about it.
+"""
+
+# Standard library modules.
+import time
+import contextlib
+import contextvars
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+
+_timings = contextvars.ContextVar("timings", default=None)
+_stages = contextvars.ContextVar("timed_stages", default=frozenset())
+
+STAGE_EXPORT = "export"
+STAGE_WORKER = "worker"
+STAGE_IMPORT = "import"
+
+
+@contextlib.contextmanager
+def record_timings():
+    """
+    Context manager returning a :class:`dict` where the durations (in seconds)
+    of the stages timed with :func:`timed` in the current context are added.
+    """
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def add_timings(timings):
+    """
+    Adds durations, e.g. timed in another process, to the durations recorded
+    in the current context.
+    """
+    current = _timings.get()
+    if current is None:
+        return
+
+    for stage, duration in timings.items():
+        current[stage] = current.get(stage, 0.0) + duration
+
+
+@contextlib.contextmanager
+def timed(stage):
+    """
+    Context manager measuring the duration of a stage.
+    The duration is only recorded within :func:`record_timings`.
+    A stage nested in the same stage (e.g. a worker running another worker)
+    is only counted once, by the outer one.
+    """
+    stages = _stages.get()
+    if stage in stages:
+        yield
+        return
+
+    token = _stages.set(stages | {stage})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stages.reset(token)
+        add_timings({stage: time.perf_counter() - start})
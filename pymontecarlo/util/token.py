@@ -4,6 +4,7 @@
 import time
 import threading
 import enum
+import collections
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,8 +31,29 @@ class TokenState(enum.IntEnum):
     RUNNING = 4
 
 
+FINISHED_STATES = frozenset([TokenState.DONE, TokenState.CANCELLED, TokenState.ERROR])
+
+
 class Token:
-    def __init__(self, name):
+    """
+    Progress, status and state of a task and its sub-tasks (sub-tokens).
+
+    The progress, status and state of the sub-tokens are aggregated
+    incrementally when a token is updated, so reading them does not depend
+    on the number of sub-tokens.
+    All the tokens of a tree share the same lock.
+
+    Args:
+        name (str): name of the token
+        collapse_finished (bool): whether finished sub-tokens (done,
+            cancelled or in error) are removed from the sub-tokens.
+            They are still accounted in the progress, state and
+            :meth:`get_state_counts` of this token, so a token with many
+            sub-tokens (e.g. one per simulation) does not grow without bound.
+            The sub-tokens themselves do not collapse their sub-tokens.
+    """
+
+    def __init__(self, name, collapse_finished=False):
         self._name = name
         self._state = TokenState.NOTSTARTED
         self._progress = 0.0
@@ -39,7 +61,16 @@ class Token:
         self._latest_update = None
         self._category = None
         self._lock = threading.Lock()
-        self._subtokens = []
+        self._parent = None
+        self._subtokens = {}
+        self._collapse_finished = collapse_finished
+
+        # Aggregates of the sub-tokens
+        self._state_counts = collections.Counter()
+        self._category_state_counts = collections.Counter()
+        self._progress_sum = 0.0
+        self._progress_count = 0
+        self._latest = None
 
     def _create_subtoken(self, name, category):
         subtoken = self.__class__(name)
@@ -51,10 +82,88 @@ class Token:
         Creates a new sub-token, with the specified name (thread-safe).
         """
         subtoken = self._create_subtoken(name, category)
+
         with self._lock:
-            self._subtokens.append(subtoken)
+            subtoken._lock = self._lock
+            subtoken._parent = self
+            self._subtokens[id(subtoken)] = subtoken
+            subtoken._propagate(None, subtoken._get_contribution())
+
         return subtoken
 
+    def _get_state(self):
+        states = [state for state, count in self._state_counts.items() if count > 0]
+        if self._latest_update is not None:
+            states.append(self._state)
+
+        if not states:
+            return TokenState.NOTSTARTED
+        return max(states)
+
+    def _get_progress(self):
+        progress_sum = self._progress_sum
+        progress_count = self._progress_count
+        if self._latest_update is not None:
+            progress_sum += self._progress
+            progress_count += 1
+
+        if progress_count == 0:
+            return 0.0
+        return max(0.0, min(1.0, progress_sum / progress_count))
+
+    def _get_latest(self):
+        latest = self._latest
+        if self._latest_update is not None:
+            if latest is None or self._latest_update >= latest[0]:
+                latest = (self._latest_update, self._status)
+        return latest
+
+    def _get_contribution(self):
+        """
+        Returns what this token adds to the aggregates of its parent.
+        Only tokens which were updated contribute to the progress.
+        """
+        progress = self._get_progress() if self._latest_update is not None else None
+        return self._get_state(), progress, self._get_latest(), self._category
+
+    def _add_contribution(self, contribution, sign):
+        state, progress, _latest, category = contribution
+        self._state_counts[state] += sign
+        self._category_state_counts[(category, state)] += sign
+        if progress is not None:
+            self._progress_sum += sign * progress
+            self._progress_count += sign
+            if self._progress_count == 0:
+                self._progress_sum = 0.0
+
+    def _propagate(self, old, new):
+        """
+        Replaces the contribution of this token in the aggregates of its
+        parents (lock must be acquired).
+        """
+        child = self
+        parent = self._parent
+
+        while parent is not None and old != new:
+            parent_old = parent._get_contribution()
+
+            if old is not None:
+                parent._add_contribution(old, -1)
+            parent._add_contribution(new, +1)
+
+            latest = new[2]
+            if latest is not None and (
+                parent._latest is None or latest[0] >= parent._latest[0]
+            ):
+                parent._latest = latest
+
+            if parent._collapse_finished and new[0] in FINISHED_STATES:
+                parent._subtokens.pop(id(child), None)
+
+            old, new = parent_old, parent._get_contribution()
+            child = parent
+            parent = parent._parent
+
     def update(self, progress, status, state=None):
         """
         Updates the progress and status of this token (thread-safe).
@@ -69,11 +178,15 @@ class Token:
             state = TokenState.RUNNING
 
         with self._lock:
+            old = self._get_contribution()
+
             self._state = state
             self._progress = progress
             self._status = status
             self._latest_update = time.monotonic()
 
+            self._propagate(old, self._get_contribution())
+
             logger.debug(
                 'Token "{}" updated: progress={:.1f}%, status="{}", state={}'.format(
                     self._name, progress * 100, status, state.name
@@ -93,48 +206,75 @@ class Token:
         self.update(1.0, status or "Error", TokenState.ERROR)
 
     def reset(self):
-        self._state = TokenState.NOTSTARTED
-        self._progress = 0.0
-        self._status = "Not started"
-        self._latest_update = None
-        self._subtokens.clear()
+        with self._lock:
+            old = self._get_contribution()
+
+            self._state = TokenState.NOTSTARTED
+            self._progress = 0.0
+            self._status = "Not started"
+            self._latest_update = None
+            self._subtokens.clear()
+            self._state_counts.clear()
+            self._category_state_counts.clear()
+            self._progress_sum = 0.0
+            self._progress_count = 0
+            self._latest = None
+
+            self._propagate(old, self._get_contribution())
 
     def get_subtokens(self, category=None):
+        """
+        Returns the sub-tokens, sorted by state and latest update.
+        Finished sub-tokens are not returned if they were collapsed.
+        """
         # Get subtokens
         with self._lock:
             if category is None:
-                subtokens = tuple(self._subtokens)
+                subtokens = tuple(self._subtokens.values())
             else:
                 subtokens = tuple(
                     subtoken
-                    for subtoken in self._subtokens
+                    for subtoken in self._subtokens.values()
                     if subtoken._category == category
                 )
 
         # Sort
         return sorted(
-            subtokens, key=lambda x: (x.state, x._latest_update), reverse=True
+            subtokens,
+            key=lambda x: (x.state, x._latest_update or 0.0),
+            reverse=True,
         )
 
+    def get_state_counts(self, category=None):
+        """
+        Returns a :class:`dict` of the number of sub-tokens in each state,
+        including the collapsed sub-tokens, optionally only of sub-tokens of
+        the specified category.
+        """
+        with self._lock:
+            if category is None:
+                counts = self._state_counts.items()
+            else:
+                counts = (
+                    (state, count)
+                    for (other, state), count in self._category_state_counts.items()
+                    if other == category
+                )
+
+            return dict((state, count) for state, count in counts if count > 0)
+
     @property
     def name(self):
         return self._name
 
     @property
     def state(self):
-        # Get state of all sub-tokens
+        """
+        Returns the highest state of this token, if it was updated, and of its
+        sub-tokens.
+        """
         with self._lock:
-            states = [subtoken.state for subtoken in self._subtokens]
-
-        # Add state of current token, if it was updated
-        if self._latest_update is not None:
-            states.append(self._state)
-
-        # Return highest state
-        if not states:
-            return TokenState.NOTSTARTED
-        else:
-            return max(states)
+            return self._get_state()
 
     @property
     def progress(self):
@@ -142,55 +282,27 @@ class Token:
         Returns the overall progress of this token and its sub-tokens.
         Only sub-tokens where the progress was updated are considered.
         """
-        # Get progress of all sub-tokens, if it was updated
         with self._lock:
-            progresses = [
-                subtoken.progress
-                for subtoken in self._subtokens
-                if subtoken._latest_update is not None
-            ]
-
-        # Add progress of current token, if it was updated
-        if self._latest_update is not None:
-            progresses.append(self._progress)
-
-        # Calculate total progress as the average of all progresses
-        if not progresses:
-            return 0.0
-        else:
-            return sum(progresses) / len(progresses)
+            return self._get_progress()
 
     @property
     def status(self):
         """
         Returns the latest status of this token and its sub-tokens.
         """
-        # Get status and latest update time of all sub-tokens, if it was updated
         with self._lock:
-            statuses = [
-                (subtoken._latest_update, subtoken.status)
-                for subtoken in self._subtokens
-                if subtoken._latest_update is not None
-            ]
-
-        # Add status of current token, if it was updated
-        if self._latest_update is not None:
-            statuses.append((self._latest_update, self._status))
+            latest = self._get_latest()
 
-        # Return status of current token if no status exists
-        # or the status of the latest updated sub-token.
-        if not statuses:
+        if latest is None:
             return self._status
-        else:
-            statuses.sort()
-            return statuses[-1][1]
+        return latest[1]
 
 
 class TqdmToken(Token):
     NAME_MAX_LENGTH = 30
 
-    def __init__(self, name):
-        super().__init__(name)
+    def __init__(self, name, collapse_finished=False):
+        super().__init__(name, collapse_finished)
         self._tqdm = None
         self._thread = None
 
@@ -218,7 +330,17 @@ class TqdmToken(Token):
 
     def done(self, status=None):
         super().done(status)
+        self._close()
+
+    def cancel(self, status=None):
+        super().cancel(status)
+        self._close()
+
+    def error(self, status=None):
+        super().error(status)
+        self._close()
 
+    def _close(self):
         if self._thread is not None:
             self._thread.cancel()
             self._thread.join()
@@ -9,6 +9,75 @@ import math
 
 # Globals and constants variables.
 
+# Width of a cell, in tolerances. Cells wider than two tolerances ensure that
+# values within tolerance are at most in adjacent cells. An odd width avoids
+# round values falling on cell boundaries.
+CELL_WIDTH = 97.0
+
+# Relative tolerance of values without tolerance, as in math.isclose()
+REL_TOLERANCE = 1e-9
+
 
 def tolerance_to_decimals(tolerance):
     return math.ceil(abs(math.log10(tolerance)))
+
+
+def _quantize(value, tolerance):
+    """
+    Returns the cell of *value* and the cells of the values within
+    *tolerance* of *value*, as a :class:`tuple` starting with the cell of
+    *value*.
+    Cells are centred on multiples of their width, so zero is never on a
+    boundary.
+    """
+    position = value / (tolerance * CELL_WIDTH)
+    cell = math.floor(position + 0.5)
+
+    # Offset from the centre of the cell, in tolerances (with a margin for
+    # rounding errors)
+    offset = (position - cell) * CELL_WIDTH
+    margin = 1.0 + 1e-6
+    cells = [cell]
+    if offset - margin <= -CELL_WIDTH / 2:
+        cells.append(cell - 1)
+    if offset + margin >= CELL_WIDTH / 2:
+        cells.append(cell + 1)
+
+    return tuple(cells)
+
+
+def quantize_candidates(value, tolerance=None):
+    """
+    Returns the possible quantized values of *value* given a *tolerance*,
+    as a :class:`tuple` starting with the quantized value of *value*.
+
+    Two values closer than *tolerance* do not necessarily have the same
+    quantized value, when they fall on either side of a cell boundary, but
+    the quantized value of one is always among the candidates of the other.
+    Usually, there is only one candidate.
+
+    Without *tolerance*, values are compared with a relative tolerance of
+    :data:`REL_TOLERANCE`, like :func:`math.isclose`.
+    Values that are not finite are returned as is.
+    """
+    if not math.isfinite(value):
+        return (value,)
+
+    if tolerance is not None and tolerance > 0.0:
+        return _quantize(value, tolerance)
+
+    if value == 0.0:
+        return (0,)
+
+    # Relative tolerance is an absolute tolerance of the logarithm
+    sign = 1 if value > 0.0 else -1
+    cells = _quantize(math.log(abs(value)), 2 * REL_TOLERANCE)
+    return tuple((sign, cell) for cell in cells)
+
+
+def quantize(value, tolerance=None):
+    """
+    Returns the quantized value of *value*, i.e. the first candidate of
+    :func:`quantize_candidates`.
+    """
+    return quantize_candidates(value, tolerance)[0]
@@ -0,0 +1,215 @@
+"""
+Tracing of the stages of the simulations in the Chrome trace event format.
+
+The trace can be opened in ``chrome://tracing`` or https://ui.perfetto.dev.
+Each asyncio task (e.g. each dispatcher of a runner) is shown as its own
+track, so that the interleaving of the simulations on the event loop is
+visible.
+
+Tracing is disabled by default and costs almost nothing when disabled.
+It is enabled with :func:`enable_tracing` or by setting the environment
+variable ``PYMONTECARLO_TRACE`` to the path of the trace file, which is
+then written when the interpreter exits.
+The environment variable only enables tracing in the main process, so that
+the child processes of a runner, which inherit it, do not overwrite the
+trace file.
+"""
+
+# Standard library modules.
+import os
+import json
+import time
+import atexit
+import asyncio
+import logging
+import functools
+import threading
+import multiprocessing
+import contextlib
+import contextvars
+
+# Third party modules.
+
+# Local modules.
+
+# Globals and constants variables.
+logger = logging.getLogger(__name__)
+
+ENVIRON_TRACE = "PYMONTECARLO_TRACE"
+
+_simulation = contextvars.ContextVar("trace_simulation", default=None)
+_tracer = None
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    """
+    Collects complete events (``"ph": "X"``) in memory.
+    """
+
+    def __init__(self, filepath=None):
+        self.filepath = filepath
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.events = []
+        self._start = time.perf_counter()
+        self._tracks = {}
+
+    def _get_track(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+
+        if task is not None:
+            key = id(task)
+            name = task.get_name() if hasattr(task, "get_name") else repr(task)
+        else:
+            key = threading.get_ident()
+            name = threading.current_thread().name
+
+        with self.lock:
+            tid = self._tracks.get(key)
+            if tid is None:
+                tid = self._tracks[key] = len(self._tracks) + 1
+                self.events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self.pid,
+                        "tid": tid,
+                        "args": {"name": name},
+                    }
+                )
+
+        return tid
+
+    @contextlib.contextmanager
+    def span(self, name, category, args):
+        identifier = args.get("simulation")
+        if identifier is None:
+            identifier = _simulation.get()
+            if identifier is not None:
+                args["simulation"] = identifier
+            token = None
+        else:
+            token = _simulation.set(identifier)
+
+        tid = self._get_track()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if token is not None:
+                _simulation.reset(token)
+
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self._start) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": self.pid,
+                "tid": tid,
+                "args": args,
+            }
+            with self.lock:
+                self.events.append(event)
+
+    def as_dict(self):
+        with self.lock:
+            return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def write(self, filepath=None):
+        if filepath is None:
+            filepath = self.filepath
+        if filepath is None:
+            raise RuntimeError("No file path given")
+
+        # A forked child process has a copy of the tracer of its parent
+        if os.getpid() != self.pid:
+            logger.debug("Trace of parent process not written")
+            return
+
+        with open(filepath, "w", encoding="utf8") as fp:
+            json.dump(self.as_dict(), fp, default=str)
+
+        logger.debug("Trace written to {}".format(filepath))
+
+
+def span(name, category="pymontecarlo", **args):
+    """
+    Context manager tracing the duration of *name*.
+    The keyword arguments are added to the ``args`` of the event.
+    If *simulation* (identifier) is given, it is also added to the spans
+    nested in this one, e.g. the export of a simulation within its worker.
+    Does nothing if tracing is disabled.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, args)
+
+
+def traced(name=None, category="pymontecarlo"):
+    """
+    Decorator tracing each call of a function as a span, named after the
+    function if *name* is not given.
+    """
+
+    def decorator(func):
+        spanname = func.__name__ if name is None else name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(spanname, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def is_tracing_enabled():
+    return _tracer is not None
+
+
+def get_tracer():
+    """
+    Returns the current :class:`Tracer` or ``None`` if tracing is disabled.
+    """
+    return _tracer
+
+
+def enable_tracing(filepath=None):
+    """
+    Starts tracing and returns the new :class:`Tracer`.
+    If *filepath* is given, the trace is written to this file by
+    :func:`disable_tracing`.
+    """
+    global _tracer
+    _tracer = Tracer(filepath)
+    return _tracer
+
+
+def disable_tracing():
+    """
+    Stops tracing, writes the trace if the tracer has a file path, and
+    returns the tracer (or ``None`` if tracing was not enabled).
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+
+    if tracer is not None and tracer.filepath is not None:
+        try:
+            tracer.write()
+        except Exception:
+            logger.exception("Trace could not be written")
+
+    return tracer
+
+
+if os.environ.get(ENVIRON_TRACE) and multiprocessing.parent_process() is None:
+    enable_tracing(os.environ[ENVIRON_TRACE])
+    atexit.register(disable_tracing)
@@ -0,0 +1,67 @@
+""""""
+
+# Standard library modules.
+import json
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.benchmark.micro import time_benchmark, run_suite, compare
+
+# Globals and constants variables.
+BENCHMARKS = [
+    "options_eq",
+    "options_builder_build",
+    "create_identifiers",
+    "project_write",
+    "project_read",
+    "create_options_dataframe",
+    "create_results_dataframe",
+    "recalculate_kratio",
+    "token_progress",
+]
+
+
+@pytest.mark.parametrize("name", BENCHMARKS)
+def test_time_benchmark(name):
+    result = time_benchmark(name, 3, repeat=2)
+
+    assert result["benchmark"] == name
+    assert result["size"] == 3
+    assert result["repeat"] == 2
+    assert 0.0 < result["min"] <= result["median"]
+    assert result["per_item"] == pytest.approx(result["min"] / 3)
+
+
+def test_run_suite():
+    data = run_suite(["options_eq", "token_progress"], [2, 4], repeat=1)
+
+    assert len(data["results"]) == 4
+    assert "version" in data
+
+    # Serializable
+    json.dumps(data)
+
+
+def test_compare():
+    baseline = {
+        "results": [
+            {"benchmark": "a", "size": 10, "min": 1.0},
+            {"benchmark": "b", "size": 10, "min": 1.0},
+        ]
+    }
+    data = {
+        "results": [
+            {"benchmark": "a", "size": 10, "min": 1.1},
+            {"benchmark": "b", "size": 10, "min": 2.0},
+            {"benchmark": "c", "size": 10, "min": 5.0},
+        ]
+    }
+
+    regressions = compare(data, baseline, tolerance=0.25)
+
+    assert len(regressions) == 1
+    result, ratio = regressions[0]
+    assert result["benchmark"] == "b"
+    assert ratio == pytest.approx(2.0)
@@ -0,0 +1,47 @@
+""""""
+
+# Standard library modules.
+import json
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.benchmark.scaling import (
+    create_builder,
+    run_benchmark_async,
+    run_suite,
+)
+
+# Globals and constants variables.
+
+
+def test_create_builder():
+    assert len(create_builder(5)) == 5
+    assert len(create_builder(5, kratio=True)) == 5
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark(event_loop):
+    result = await run_benchmark_async(1, 3)
+
+    assert result["simulations"] == 3
+    assert result["completed"] == 3
+    assert result["failed"] == 0
+    assert result["throughput"] > 0.0
+    assert set(result["latency"]) == {"p50", "p90", "p99", "max"}
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_kratio(event_loop):
+    result = await run_benchmark_async(2, 2, kratio=True)
+
+    assert result["simulations"] == 4
+    assert result["completed"] == 4
+
+
+def test_run_suite():
+    data = run_suite([1], [2], [False])
+
+    assert len(data["results"]) == 1
+    json.dumps(data)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+import copy
+
+# Third party modules.
+
+# Local modules.
+from pymontecarlo.formats.fingerprint import (
+    create_fingerprint,
+    create_candidate_fingerprints,
+)
+from pymontecarlo.util.tolerance import CELL_WIDTH
+
+# Globals and constants variables.
+
+
+def test_create_fingerprint(options):
+    fingerprint = create_fingerprint(options)
+    assert hash(fingerprint) == hash(create_fingerprint(copy.deepcopy(options)))
+
+
+def test_create_fingerprint_within_tolerance(options):
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV += options.beam.ENERGY_TOLERANCE_eV / 10
+    assert options == options2
+    assert create_fingerprint(options) == create_fingerprint(options2)
+
+
+def test_create_fingerprint_different(options):
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = 20e3
+    assert create_fingerprint(options) != create_fingerprint(options2)
+
+
+def test_create_fingerprint_tags_order(options):
+    options2 = copy.deepcopy(options)
+    options2.tags.reverse()
+    assert options == options2
+    assert create_fingerprint(options) == create_fingerprint(options2)
+
+
+def test_create_fingerprint_boundary(options):
+    # Either side of a quantization boundary of the beam energy
+    tolerance = options.beam.ENERGY_TOLERANCE_eV
+    boundary = (154 + 0.5) * CELL_WIDTH * tolerance
+
+    options.beam.energy_eV = boundary - tolerance * 0.3
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = boundary + tolerance * 0.3
+    assert options == options2
+
+    fingerprint = create_fingerprint(options)
+    fingerprint2 = create_fingerprint(options2)
+    assert fingerprint != fingerprint2
+
+    candidates = create_candidate_fingerprints(options)
+    assert candidates[0] == fingerprint
+    assert fingerprint2 in candidates
+    assert fingerprint in create_candidate_fingerprints(options2)
+
+
+def test_create_candidate_fingerprints(options):
+    assert create_candidate_fingerprints(options) == [create_fingerprint(options)]
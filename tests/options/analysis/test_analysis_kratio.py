@@ -129,3 +129,70 @@ def test_kratioanalysis_calculate(analysis):
     testutil.assert_ufloats(
         result[("O", "Ka")], ufloat(0.484232 / 0.470749, 0.066579), abs=1e-4
     )
+
+
+def test_kratioanalysis_calculate_many(analysis):
+    program = ProgramMock()
+    unkoptions1 = Options(
+        program, GaussianBeam(20e3, 10.0e-9), SubstrateSample(Material.pure(29))
+    )
+    unkoptions2 = Options(
+        program, GaussianBeam(20e3, 10.0e-9), SubstrateSample(Material.pure(26))
+    )
+    list_standard_options = analysis.apply(unkoptions1) + analysis.apply(unkoptions2)
+
+    def create_simulation(options, intensity):
+        builder = EmittedPhotonIntensityResultBuilder(analysis)
+        z = next(iter(options.sample.material.composition))
+        builder.add_intensity((z, "Ka"), intensity, 10.0)
+        return Simulation(options, [builder.build()], "sim")
+
+    unksim1 = create_simulation(unkoptions1, 500.0)
+    unksim2 = create_simulation(unkoptions2, 300.0)
+    stdsims = [create_simulation(list_standard_options[0], 1000.0)]
+
+    # Standard with zero intensity
+    stdsims.append(create_simulation(list_standard_options[1], 0.0))
+
+    items = [(analysis, unksim1, stdsims), (analysis, unksim2, stdsims)]
+    newresults = KRatioAnalysis.calculate_many(items)
+    assert newresults == [True, False]
+
+    results = unksim1.find_result(KRatioResult)
+    assert len(results) == 1
+    testutil.assert_ufloats(
+        results[0][(29, "Ka")], ufloat(500.0, 10.0) / ufloat(1000.0, 10.0), abs=1e-6
+    )
+
+    assert len(unksim2.find_result(KRatioResult)) == 0
+
+
+def test_kratioanalysis_calculate_direct(analysis, monkeypatch):
+    program = ProgramMock()
+    unkoptions = Options(
+        program, GaussianBeam(20e3, 10.0e-9), SubstrateSample(Material.pure(29))
+    )
+    stdoptions = analysis.apply(unkoptions)[0]
+
+    unkbuilder = EmittedPhotonIntensityResultBuilder(analysis)
+    unkbuilder.add_intensity((29, "Ka1"), 500.0, 10.0)
+    unkbuilder.add_intensity((29, "La1"), 200.0, 10.0)
+    unksim = Simulation(unkoptions, [unkbuilder.build()], "unknown")
+
+    # Standard without the La1 line
+    stdbuilder = EmittedPhotonIntensityResultBuilder(analysis)
+    stdbuilder.add_intensity((29, "Ka1"), 1000.0, 10.0)
+    stdsim = Simulation(stdoptions, [stdbuilder.build()], "standard")
+
+    # No index of the standards is created for a single simulation
+    monkeypatch.setattr(
+        "pymontecarlo.options.analysis.kratio._StandardIndex", None, raising=True
+    )
+
+    assert analysis.calculate(unksim, [unksim, stdsim])
+
+    result = unksim.find_result(KRatioResult)[0]
+    testutil.assert_ufloats(
+        result[(29, "Ka1")], ufloat(500.0, 10.0) / ufloat(1000.0, 10.0), abs=1e-6
+    )
+    assert (29, "La1") not in result
@@ -9,6 +9,7 @@
 from pymontecarlo.options.program.expander import (
     expand_to_single,
     expand_analyses_to_single_detector,
+    SingleDetectorExpander,
 )
 from pymontecarlo.options.detector import PhotonDetector
 from pymontecarlo.options.analysis import PhotonIntensityAnalysis, KRatioAnalysis
@@ -60,3 +61,21 @@ def testexpand_analyses_to_single_detector():
 
     combinations = expand_to_single(analyses)
     assert len(combinations) == 4
+
+
+def testsingledetectorexpander(monkeypatch):
+    det1 = PhotonDetector("det1", 0.1)
+    det2 = PhotonDetector("det2", 3.3)
+
+    analyses = [
+        PhotonIntensityAnalysis(det1),
+        PhotonIntensityAnalysis(det2),
+        KRatioAnalysis(det1),
+    ]
+
+    expander = SingleDetectorExpander()
+    assert len(expander.expand_analyses(analyses)) == 2
+
+    # Counted without expanding
+    monkeypatch.setattr(expander, "expand_analyses", None)
+    assert expander.count_analyses(analyses) == 2
@@ -3,6 +3,7 @@
 
 # Standard library modules.
 import math
+import copy
 
 # Third party modules.
 import pytest
@@ -10,9 +11,10 @@ import pytest
 # Local modules.
 from pymontecarlo.options.detector import PhotonDetector
 from pymontecarlo.options.detector.base import DetectorBase
-from pymontecarlo.options.options import OptionsBuilder
+from pymontecarlo.options.options import OptionsBuilder, OptionsIndex
 from pymontecarlo.options.analysis import PhotonIntensityAnalysis, KRatioAnalysis
 from pymontecarlo.options.analysis.base import AnalysisBase
+from pymontecarlo.util.tolerance import CELL_WIDTH
 import pymontecarlo.util.testutil as testutil
 
 # Globals and constants variables.
@@ -125,3 +127,98 @@ def test_optionsbuilder_twokratioanalysis(builder, options):
 
     assert len(builder) == 2
     assert len(builder.build()) == 4
+
+
+def test_optionsbuilder_build_combination(builder, options):
+    builder.add_program(options.program)
+    for energy_eV in [5e3, 10e3, 15e3]:
+        beam = copy.deepcopy(options.beam)
+        beam.energy_eV = energy_eV
+        builder.add_beam(beam)
+    builder.add_sample(options.sample)
+
+    builder.add_analysis(PhotonIntensityAnalysis(PhotonDetector("det", 0.1)))
+    builder.add_analysis(PhotonIntensityAnalysis(PhotonDetector("det2", 0.2)))
+
+    assert len(builder) == 6
+
+    list_options = builder.build()
+    for index in range(len(builder)):
+        assert builder.build_combination(index) == list_options[index]
+    assert builder.build_combination(-1) == list_options[-1]
+
+    with pytest.raises(IndexError):
+        builder.build_combination(6)
+
+
+@pytest.mark.parametrize("num_shards", [1, 2, 4, 7])
+def test_optionsbuilder_iterbuild_shard(builder, options, num_shards):
+    builder.add_program(options.program)
+    for energy_eV in [5e3, 10e3, 15e3, 20e3, 25e3]:
+        beam = copy.deepcopy(options.beam)
+        beam.energy_eV = energy_eV
+        builder.add_beam(beam)
+    builder.add_sample(options.sample)
+
+    list_options = []
+    for shard in range(num_shards):
+        list_options += builder.iterbuild(shard, num_shards)
+
+    assert list_options == builder.build()
+
+
+def test_optionsbuilder_iterbuild_shard_invalid(builder):
+    with pytest.raises(ValueError):
+        list(builder.iterbuild(2, 2))
+
+
+def test_optionsindex(options):
+    index = OptionsIndex()
+    assert options not in index
+
+    assert index.add(options, "a")
+    assert options in index
+    assert index[options] == "a"
+    assert len(index) == 1
+
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV += options.beam.ENERGY_TOLERANCE_eV / 10
+    assert not index.add(options2, "b")
+    assert index[options2] == "a"
+    assert len(index) == 1
+
+    options3 = copy.deepcopy(options)
+    options3.beam.energy_eV = 20e3
+    assert options3 not in index
+
+    index[options3] = "c"
+    assert len(index) == 2
+    assert list(index.values()) == ["a", "c"]
+
+    del index[options]
+    assert options not in index
+    assert len(index) == 1
+
+
+@pytest.mark.parametrize(
+    "energy_eV, other_energy_eV",
+    [
+        (15000.004, 15000.006),
+        # Either side of a quantization boundary
+        (
+            (154 + 0.5) * CELL_WIDTH * 1e-2 - 3e-3,
+            (154 + 0.5) * CELL_WIDTH * 1e-2 + 3e-3,
+        ),
+    ],
+)
+def test_optionsindex_boundary(options, energy_eV, other_energy_eV):
+    options.beam.energy_eV = energy_eV
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = other_energy_eV
+    assert options == options2
+
+    index = OptionsIndex([(options, "a")])
+    assert options2 in index
+    assert index[options2] == "a"
+    assert not index.add(options2, "b")
+    assert len(index) == 1
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.runner.adaptive import ConvergenceCriterion, AdaptiveWorker
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.results.photonintensity import (
+    EmittedPhotonIntensityResult,
+    EmittedPhotonIntensityResultBuilder,
+)
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.token import Token, TokenState
+
+# Globals and constants variables.
+
+
+@pytest.fixture
+def results(options):
+    builder = EmittedPhotonIntensityResultBuilder(options.analyses[0])
+    builder.add_intensity((29, "Ka1"), 100.0, 10.0)
+    builder.add_intensity((29, "La1"), 100.0, 1.0)
+    return [builder.build()]
+
+
+def test_convergence_criterion(results):
+    criterion = ConvergenceCriterion({(29, "Ka1"): 0.05, (29, "La1"): 0.05})
+
+    uncertainties = criterion.relative_uncertainties(results)
+    assert len(uncertainties) == 2
+    assert not criterion.is_converged(results)
+    assert criterion.estimate_trajectories(results, 1000) == 4000
+
+
+def test_convergence_criterion_converged(results):
+    criterion = ConvergenceCriterion({(29, "La1"): 0.05})
+    assert criterion.is_converged(results)
+    assert criterion.estimate_trajectories(results, 1000) == 1000
+
+
+def test_convergence_criterion_missing_xrayline(results):
+    criterion = ConvergenceCriterion({(13, "Ka1"): 0.05, (29, "La1"): 0.05})
+    assert len(criterion.relative_uncertainties(results)) == 1
+    assert len(criterion.find_missing(results)) == 1
+    assert not criterion.is_converged(results)
+    assert criterion.estimate_trajectories(results, 1000) == 2000
+
+
+@pytest.mark.asyncio
+async def test_adaptive_worker(event_loop, options, tmpdir):
+    options.program.number_trajectories = 100000
+    criterion = ConvergenceCriterion({(29, "Ka1"): 0.002}, pilot_trajectories=100)
+
+    worker = AdaptiveWorker(options.program.worker, criterion)
+    token = Token("test")
+    simulation = Simulation(options)
+
+    await worker.run(token, simulation, str(tmpdir))
+
+    assert token.state == TokenState.DONE
+    assert len(token.get_subtokens()) > 1
+    assert len(simulation.find_result(EmittedPhotonIntensityResult)) == 1
+
+
+@pytest.mark.asyncio
+async def test_adaptive_worker_max_trajectories(event_loop, options, tmpdir):
+    criterion = ConvergenceCriterion(
+        {(29, "Ka1"): 1e-9}, pilot_trajectories=100, max_trajectories=300
+    )
+
+    worker = AdaptiveWorker(options.program.worker, criterion)
+    token = Token("test")
+    simulation = Simulation(options)
+
+    await worker.run(token, simulation, str(tmpdir))
+
+    assert len(token.get_subtokens()) == 2
+    assert len(simulation.find_result(EmittedPhotonIntensityResult)) == 1
+
+
+@pytest.mark.asyncio
+async def test_adaptive_worker_missing_xrayline(event_loop, options, tmpdir, caplog):
+    criterion = ConvergenceCriterion(
+        {(13, "Ka1"): 0.05}, pilot_trajectories=100, max_trajectories=300
+    )
+
+    worker = AdaptiveWorker(options.program.worker, criterion)
+    token = Token("test")
+    simulation = Simulation(options)
+
+    await worker.run(token, simulation, str(tmpdir))
+
+    # Not stopped after the pilot batch, but run up to the maximum
+    assert len(token.get_subtokens()) == 3
+    assert "not found" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_local_runner_convergence(event_loop, options):
+    criterion = ConvergenceCriterion({(29, "Ka1"): 0.01}, pilot_trajectories=100)
+    runner = LocalSimulationRunner(max_workers=2, convergence=criterion)
+
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 1
+
+
+def test_local_runner_convergence_and_shards():
+    criterion = ConvergenceCriterion({(29, "Ka1"): 0.01})
+    with pytest.raises(ValueError):
+        LocalSimulationRunner(shard_trajectories=100, convergence=criterion)
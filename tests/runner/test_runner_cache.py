@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+import copy
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.runner.adaptive import ConvergenceCriterion
+from pymontecarlo.runner.cache import SimulationCache
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.token import TokenState
+
+# Globals and constants variables.
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SimulationCache(str(tmp_path))
+
+
+def test_cache_put_get(cache, simulation):
+    assert cache.get(simulation.options) is None
+    assert simulation.options not in cache
+
+    assert cache.put(simulation)
+    assert simulation.options in cache
+
+    results = cache.get(simulation.options)
+    assert len(results) == len(simulation.results)
+    for xrayline, q in simulation.results[0].items():
+        assert results[0][xrayline].n == pytest.approx(q.n, abs=1e-4)
+        assert results[0][xrayline].s == pytest.approx(q.s, abs=1e-4)
+
+
+def test_cache_put_twice(cache, simulation):
+    assert cache.put(simulation)
+    assert not cache.put(simulation)
+
+
+def test_cache_put_no_results(cache, options):
+    assert not cache.put(Simulation(options))
+
+
+def test_cache_get_other_options(cache, simulation):
+    cache.put(simulation)
+
+    options = copy.deepcopy(simulation.options)
+    options.beam.energy_eV += 1000.0
+    assert cache.get(options) is None
+
+
+def test_cache_clear(cache, simulation):
+    cache.put(simulation)
+    cache.clear()
+    assert cache.get(simulation.options) is None
+
+
+@pytest.mark.asyncio
+async def test_local_runner_cache(event_loop, cache, options):
+    runner = LocalSimulationRunner(cache=cache)
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 1
+    assert options in cache
+
+    runner = LocalSimulationRunner(cache=cache)
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 1
+    assert len(runner.project.simulations[0].results) == 1
+    assert runner.token.state == TokenState.DONE
+
+    # Only the submission token, the simulation was not run
+    assert not any(runner.token.get_subtokens(category="simulation"))
+
+
+def test_local_runner_cache_disabled(cache):
+    runner = LocalSimulationRunner(cache=cache, shard_trajectories=1000)
+    assert runner.cache is None
+
+    criterion = ConvergenceCriterion({(29, "Ka1"): 0.05})
+    runner = LocalSimulationRunner(cache=cache, convergence=criterion)
+    assert runner.cache is None
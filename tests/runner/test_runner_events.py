@@ -0,0 +1,144 @@
+""""""
+
+# Standard library modules.
+import copy
+import asyncio
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.exceptions import ExportError
+from pymontecarlo.mock import WorkerMock
+from pymontecarlo.options.analysis import KRatioAnalysis
+from pymontecarlo.runner.events import (
+    RunnerEventStream,
+    EVENT_QUEUED,
+    EVENT_STARTED,
+    EVENT_PROGRESS,
+    EVENT_COMPLETED,
+    EVENT_FAILED,
+    EVENT_RECALCULATED,
+)
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.token import Token
+
+# Globals and constants variables.
+
+
+class WorkerExportErrorMock(WorkerMock):
+    async def _run(self, token, simulation, outputdir):
+        raise ExportError("failure")
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+async def test_event_stream(event_loop, options):
+    stream = RunnerEventStream()
+    simulation = Simulation(options, identifier="sim1")
+
+    # Not published, no subscription
+    stream.publish(EVENT_QUEUED, simulation)
+
+    subscription_all = stream.subscribe()
+    subscription_completed = stream.subscribe([EVENT_COMPLETED])
+
+    stream.publish(EVENT_STARTED, simulation)
+    stream.publish(EVENT_COMPLETED, simulation)
+    stream.close()
+
+    events = await collect(subscription_all)
+    assert [event.kind for event in events] == [EVENT_STARTED, EVENT_COMPLETED]
+    assert events[0].identifier == "sim1"
+
+    events = await collect(subscription_completed)
+    assert [event.kind for event in events] == [EVENT_COMPLETED]
+
+
+@pytest.mark.asyncio
+async def test_event_stream_progress(event_loop, options):
+    stream = RunnerEventStream(progress_interval=0.01)
+    simulation = Simulation(options, identifier="sim1")
+    token = Token("sim1")
+
+    subscription = stream.subscribe([EVENT_PROGRESS])
+    stream.track(simulation, token)
+
+    token.update(0.5, "Half way")
+    event = await asyncio.wait_for(subscription.__anext__(), 1.0)
+    assert event.progress == pytest.approx(0.5)
+    assert event.status == "Half way"
+
+    stream.untrack(simulation)
+    stream.close()
+    assert await collect(subscription) == []
+
+
+@pytest.mark.asyncio
+async def test_local_runner_events(event_loop, options):
+    options_failed = copy.deepcopy(options)
+    options_failed.program._worker = WorkerExportErrorMock()
+    options_failed.beam.energy_eV = 10e3
+
+    runner = LocalSimulationRunner(max_workers=2)
+    subscription = runner.events(
+        EVENT_QUEUED, EVENT_STARTED, EVENT_COMPLETED, EVENT_FAILED
+    )
+
+    async with runner:
+        task = asyncio.ensure_future(collect(subscription))
+        await runner.submit(options, options_failed)
+
+    events = await task
+
+    kinds = {}
+    for event in events:
+        energy_eV = event.simulation.options.beam.energy_eV
+        kinds.setdefault(energy_eV, []).append(event.kind)
+
+    assert kinds[15e3] == [EVENT_QUEUED, EVENT_STARTED, EVENT_COMPLETED]
+    assert kinds[10e3] == [EVENT_QUEUED, EVENT_STARTED, EVENT_FAILED]
+
+    event_failed = [event for event in events if event.kind == EVENT_FAILED][0]
+    assert isinstance(event_failed.error, ExportError)
+
+
+@pytest.mark.asyncio
+async def test_local_runner_as_completed(event_loop, options):
+    options = copy.deepcopy(options)
+    options.analyses.append(KRatioAnalysis(options.detectors[0]))
+
+    runner = LocalSimulationRunner(max_workers=2)
+    iterator = runner.as_completed()
+    subscription = runner.events(EVENT_RECALCULATED)
+
+    async with runner:
+        task = asyncio.gather(collect(iterator), collect(subscription))
+        await runner.submit(options)
+
+    simulations, events = await task
+
+    assert len(simulations) == 2
+    assert all(simulation in runner.project.simulations for simulation in simulations)
+    assert len(events) > 0
+
+
+@pytest.mark.asyncio
+async def test_local_runner_as_completed_break(event_loop, options):
+    runner = LocalSimulationRunner(max_workers=2)
+    iterator = runner.as_completed()
+    assert len(runner.event_stream._subscriptions) == 1
+
+    async with runner:
+        await runner.submit(options)
+
+        async for simulation in iterator:
+            break
+        await iterator.aclose()
+
+        assert simulation in runner.project.simulations
+        assert len(runner.event_stream._subscriptions) == 0
@@ -0,0 +1,168 @@
+""""""
+
+# Standard library modules.
+import sys
+import copy
+import asyncio
+
+# Third party modules.
+import pytest
+import psutil
+
+# Local modules.
+from pymontecarlo.exceptions import WorkerError, WorkerTimeoutError, ExportError
+from pymontecarlo.mock import WorkerMock
+from pymontecarlo.runner.fault import FaultTolerance, run_with_timeout
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.util.process import create_subprocess_exec, track_processes
+
+# Globals and constants variables.
+
+
+class WorkerFailingMock(WorkerMock):
+    def __init__(self, number_failures, exception_class=WorkerError):
+        super().__init__()
+        self.number_failures = number_failures
+        self.exception_class = exception_class
+        self.number_runs = 0
+
+    async def _run(self, token, simulation, outputdir):
+        self.number_runs += 1
+        if self.number_runs <= self.number_failures:
+            raise self.exception_class("failure {}".format(self.number_runs))
+        await super()._run(token, simulation, outputdir)
+
+
+def test_faulttolerance():
+    fault_tolerance = FaultTolerance(max_attempts=3, backoff=1.0, max_backoff=3.0)
+
+    assert fault_tolerance.should_retry(WorkerError(), 1)
+    assert fault_tolerance.should_retry(OSError(), 2)
+    assert not fault_tolerance.should_retry(WorkerError(), 3)
+    assert not fault_tolerance.should_retry(ValueError(), 1)
+
+    assert fault_tolerance.get_delay(1) == pytest.approx(1.0)
+    assert fault_tolerance.get_delay(2) == pytest.approx(2.0)
+    assert fault_tolerance.get_delay(3) == pytest.approx(3.0)
+
+
+def test_faulttolerance_invalid():
+    with pytest.raises(ValueError):
+        FaultTolerance(max_attempts=0)
+
+
+@pytest.mark.asyncio
+async def test_run_with_timeout(event_loop):
+    processes = []
+
+    async def run():
+        args = [sys.executable, "-c", "import time; time.sleep(30)"]
+        process = await create_subprocess_exec(*args)
+        processes.append(process)
+        await process.wait()
+
+    with pytest.raises(WorkerTimeoutError):
+        await run_with_timeout(run(), 0.5)
+
+    assert len(processes) == 1
+    assert await asyncio.wait_for(processes[0].wait(), 5.0) != 0
+    assert not psutil.pid_exists(processes[0].pid) or (
+        psutil.Process(processes[0].pid).status() == psutil.STATUS_ZOMBIE
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_with_timeout_untracked(event_loop):
+    processes = []
+
+    async def run():
+        args = [sys.executable, "-c", "import time; time.sleep(30)"]
+        process = await asyncio.create_subprocess_exec(*args)
+        processes.append(process)
+        await process.wait()
+
+    with pytest.raises(WorkerTimeoutError):
+        await run_with_timeout(run(), 0.5)
+
+    assert len(processes) == 1
+    assert await asyncio.wait_for(processes[0].wait(), 5.0) != 0
+
+
+@pytest.mark.asyncio
+async def test_run_with_timeout_untracked_concurrent(event_loop):
+    processes = []
+
+    async def run():
+        args = [sys.executable, "-c", "import time; time.sleep(30)"]
+        process = await asyncio.create_subprocess_exec(*args)
+        processes.append(process)
+        await process.wait()
+
+    # Another simulation is running, so the process cannot be attributed
+    with track_processes():
+        with pytest.raises(WorkerTimeoutError):
+            await run_with_timeout(run(), 0.5)
+
+    try:
+        assert processes[0].returncode is None
+    finally:
+        processes[0].kill()
+        await processes[0].wait()
+
+
+def create_options(options, worker, energy_eV):
+    options = copy.deepcopy(options)
+    options.program._worker = worker
+    options.beam.energy_eV = energy_eV
+    return options
+
+
+@pytest.mark.asyncio
+async def test_local_runner_retry(event_loop, options):
+    worker = WorkerFailingMock(2)
+    options = create_options(options, worker, 10e3)
+
+    fault_tolerance = FaultTolerance(max_attempts=3, backoff=0.01)
+    runner = LocalSimulationRunner(fault_tolerance=fault_tolerance)
+
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 1
+    assert len(runner.failed_simulations) == 0
+
+
+@pytest.mark.asyncio
+async def test_local_runner_failed_simulations(event_loop, options):
+    options1 = create_options(options, WorkerFailingMock(5), 10e3)
+    options2 = create_options(options, WorkerFailingMock(5, ExportError), 11e3)
+    options3 = create_options(options, WorkerMock(), 12e3)
+
+    fault_tolerance = FaultTolerance(max_attempts=2, backoff=0.01)
+    runner = LocalSimulationRunner(max_workers=1, fault_tolerance=fault_tolerance)
+
+    async with runner:
+        await runner.submit(options1, options2, options3)
+
+    # The dispatcher kept running after the failures
+    assert len(runner.project.simulations) == 1
+
+    failed_simulations = runner.failed_simulations
+    assert len(failed_simulations) == 2
+    assert failed_simulations[0].attempts == 2
+    assert isinstance(failed_simulations[0].error, WorkerError)
+    assert failed_simulations[1].attempts == 1
+    assert isinstance(failed_simulations[1].error, ExportError)
+
+
+@pytest.mark.asyncio
+async def test_local_runner_timeout(event_loop, options):
+    fault_tolerance = FaultTolerance(timeout=0.01)
+    runner = LocalSimulationRunner(fault_tolerance=fault_tolerance)
+
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 0
+    assert len(runner.failed_simulations) == 1
+    assert isinstance(runner.failed_simulations[0].error, WorkerTimeoutError)
@@ -1,6 +1,7 @@
 """"""
 
 # Standard library modules.
+import copy
 
 # Third party modules.
 import pytest
@@ -16,3 +17,13 @@ async def test_run_async(event_loop, options):
     project = await run_async([options], progress=True)
 
     assert len(project.simulations) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_async_iterator(event_loop, options):
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = 10e3
+
+    project = await run_async(iter([options, options2]), progress=False)
+
+    assert len(project.simulations) == 2
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+import os
+import copy
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.project import Project
+from pymontecarlo.runner.journal import JobJournal, JobState
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.runner.scheduler import SimulationScheduler
+from pymontecarlo.options.analysis import KRatioAnalysis
+from pymontecarlo.simulation import Simulation
+import pymontecarlo.util.fileio as fileio
+
+# Globals and constants variables.
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return JobJournal(str(tmp_path / "journal"))
+
+
+def test_journal_states(journal, options, tmp_path):
+    simulation1 = Simulation(options, identifier="sim1")
+    simulation2 = Simulation(options, identifier="sim2")
+
+    journal.record_submitted(simulation1)
+    journal.record_submitted(simulation2)
+    journal.record_started(simulation1, str(tmp_path))
+    journal.record_completed(simulation1, str(tmp_path))
+    journal.record_started(simulation2, str(tmp_path))
+    journal.record_failed(simulation2, RuntimeError("error"))
+    journal.close()
+
+    jobs = journal.read_jobs()
+    assert len(jobs) == 2
+
+    assert jobs[0].identifier == "sim1"
+    assert jobs[0].state == JobState.COMPLETED
+    assert jobs[0].outputdir == str(tmp_path)
+    assert jobs[0].finished
+
+    assert jobs[1].identifier == "sim2"
+    assert jobs[1].state == JobState.FAILED
+    assert jobs[1].error == "error"
+    assert jobs[1].finished
+
+    simulation = journal.load_simulation(jobs[0])
+    assert simulation.options == options
+    assert simulation.identifier == "sim1"
+
+
+def test_journal_flush(journal, options, monkeypatch):
+    # Records are written in the background
+    futures = []
+    executor = fileio.get_io_executor()
+    monkeypatch.setattr(
+        executor, "submit", lambda func, *args: futures.append(func) or func
+    )
+
+    simulation = Simulation(options, identifier="sim1")
+    key = journal.record_submitted(simulation)
+    journal.record_started(simulation, "output")
+    assert len(futures) == 1
+    assert not os.path.exists(journal.filepath)
+
+    journal.flush()
+    jobs = journal.read_jobs()
+    assert len(jobs) == 1
+    assert jobs[0].key == key
+    assert jobs[0].state == JobState.STARTED
+    assert journal.load_simulation(jobs[0]).options == options
+
+    # Nothing left to write
+    futures[0]()
+    assert len(journal.read_jobs()) == 1
+
+
+def test_journal_truncated(journal, options):
+    journal.record_submitted(Simulation(options, identifier="sim1"))
+    journal.close()
+
+    with open(journal.filepath, "a") as fp:
+        fp.write('{"state": "sta')
+
+    jobs = journal.read_jobs()
+    assert len(jobs) == 1
+    assert jobs[0].state == JobState.SUBMITTED
+    assert not jobs[0].finished
+
+
+def test_journal_clear(journal, options):
+    journal.record_submitted(Simulation(options, identifier="sim1"))
+    journal.clear()
+    assert journal.read_jobs() == []
+
+
+@pytest.mark.asyncio
+async def test_local_runner_journal(event_loop, journal, options):
+    runner = LocalSimulationRunner(journal=journal)
+    async with runner:
+        await runner.submit(options)
+
+    jobs = journal.read_jobs()
+    assert len(jobs) == 1
+    assert jobs[0].state == JobState.COMPLETED
+
+    # Temporary output directory
+    assert jobs[0].outputdir is None
+
+
+@pytest.mark.asyncio
+async def test_local_runner_journal_synced(event_loop, journal, options):
+    runner = LocalSimulationRunner(journal=journal)
+    await runner.submit(options)
+
+    # Read from disk by another journal, without flushing this one
+    jobs = JobJournal(journal.dirpath).read_jobs()
+    assert len(jobs) == 1
+    assert jobs[0].state == JobState.SUBMITTED
+
+    await runner.start()
+    await runner._queue.join()
+
+    jobs = JobJournal(journal.dirpath).read_jobs()
+    assert jobs[0].state == JobState.COMPLETED
+
+    await runner.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_local_runner_resume_scheduler(event_loop, journal, options):
+    options = copy.deepcopy(options)
+    analysis = KRatioAnalysis(options.detectors[0])
+    options.analyses.append(analysis)
+
+    journal.record_submitted(Simulation(options, identifier="simulation1"))
+    journal.close()
+
+    scheduler = SimulationScheduler()
+    runner = LocalSimulationRunner(journal=journal, scheduler=scheduler)
+    async with runner:
+        simulations = await runner.resume()
+
+    assert len(simulations) == 1
+    for standard_options in analysis.apply(options):
+        assert scheduler.get_fanout(standard_options) == 1
+
+
+@pytest.mark.asyncio
+async def test_local_runner_resume_submitted(event_loop, journal, options):
+    # Simulation submitted, but runner interrupted
+    journal.record_submitted(Simulation(options, identifier="simulation1"))
+    journal.close()
+
+    runner = LocalSimulationRunner(journal=journal)
+    async with runner:
+        simulations = await runner.resume()
+
+    assert len(simulations) == 1
+    assert len(runner.project.simulations) == 1
+    assert len(runner.project.simulations[0].results) == 1
+    assert journal.read_jobs()[0].state == JobState.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_local_runner_resume_completed(event_loop, journal, options, tmp_path):
+    filepath = str(tmp_path / "project.h5")
+
+    runner = LocalSimulationRunner(Project(filepath), journal=journal)
+    async with runner:
+        await runner.submit(options)
+
+    assert journal.read_jobs()[0].outputdir is not None
+
+    # Project was not saved, results are imported again
+    runner = LocalSimulationRunner(Project(filepath), journal=journal)
+    async with runner:
+        simulations = await runner.resume()
+
+    assert len(simulations) == 1
+    assert len(runner.project.simulations) == 1
+    assert len(runner.project.simulations[0].results) == 1
+    assert not runner.token.get_subtokens(category="simulation")
+
+
+@pytest.mark.asyncio
+async def test_local_runner_resume_skip(event_loop, journal, options):
+    runner = LocalSimulationRunner(journal=journal)
+    async with runner:
+        await runner.submit(options)
+
+    # Simulation already in project
+    async with runner:
+        simulations = await runner.resume()
+
+    assert len(simulations) == 0
+
+    # Failed simulation
+    simulation = Simulation(options, identifier="simulation2")
+    journal.clear()
+    journal.record_submitted(simulation)
+    journal.record_failed(simulation, RuntimeError("error"))
+
+    runner = LocalSimulationRunner(journal=journal)
+    async with runner:
+        simulations = await runner.resume()
+
+    assert len(simulations) == 0
+
+
+@pytest.mark.asyncio
+async def test_local_runner_resume_no_journal(event_loop):
+    runner = LocalSimulationRunner()
+    with pytest.raises(RuntimeError):
+        await runner.resume()
@@ -9,6 +9,8 @@ import copy
 import pytest
 
 # Local modules.
+from pymontecarlo.options.beam import GaussianBeam
+from pymontecarlo.options.options import OptionsBuilder
 from pymontecarlo.runner.local import LocalSimulationRunner
 from pymontecarlo.util.token import TokenState
 
@@ -36,6 +38,9 @@ async def test_local_runner_single_simulation(event_loop, runner, options):
     assert len(runner.project.simulations) == 1
     assert runner.token.state == TokenState.DONE
 
+    # Finished simulations are kept in the default token
+    assert len(runner.token.get_subtokens(category="simulation")) == 1
+
 
 @pytest.mark.asyncio
 async def test_local_runner_multiple_simulations(event_loop, runner, options):
@@ -70,3 +75,60 @@ async def test_local_runner_cancel(event_loop, runner, options):
 
     assert len(runner.project.simulations) == 0
     assert runner.token.state == TokenState.CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_local_runner_submit_iter(event_loop, options):
+    builder = OptionsBuilder()
+    builder.add_program(options.program)
+    for energy_eV in [5e3, 10e3, 15e3, 20e3, 25e3]:
+        builder.add_beam(GaussianBeam(energy_eV, 10e-9))
+    builder.add_sample(options.sample)
+    builder.add_analysis(options.analyses[0])
+
+    runner = LocalSimulationRunner(max_workers=2, max_queue_size=2)
+
+    async with runner:
+        count = await runner.submit_iter(builder.iterbuild(), chunk_size=1)
+
+    assert count == 5
+    assert len(runner.project.simulations) == 5
+
+    identifiers = [simulation.identifier for simulation in runner.project.simulations]
+    assert len(set(identifiers)) == 5
+
+
+@pytest.mark.asyncio
+async def test_local_runner_recalculate_once_at_a_time(event_loop, options):
+    runner = LocalSimulationRunner(max_workers=1)
+    project = runner.project
+
+    calls = []
+    running = []
+    started = asyncio.Event()
+
+    async def recalculate(token=None):
+        calls.append(len(running))
+        running.append(True)
+        project.recalculate_required = False
+        started.set()
+        await asyncio.sleep(0.5)
+        running.pop()
+
+    project.recalculate = recalculate
+
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = 2000
+
+    async with runner:
+        await runner.submit(options)
+        await started.wait()
+
+        # Added while the first recalculation is running
+        await runner.submit(options2)
+        await runner._queue.join()
+
+    assert len(project.simulations) == 2
+    assert calls == [0, 0]
+    assert not running
+    assert not project.recalculate_required
@@ -0,0 +1,86 @@
+""""""
+
+# Standard library modules.
+import os
+import copy
+import json
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.runner.metrics import RunnerMetrics, MetricsWriter
+
+# Globals and constants variables.
+
+
+@pytest.fixture
+def metrics():
+    metrics = RunnerMetrics()
+    metrics.start()
+    metrics.record_worker_started()
+    metrics.record_worker_finished(2.0, {"export": 0.25, "worker": 1.5, "import": 0.5})
+    metrics.record_completed()
+    return metrics
+
+
+def test_runnermetrics(metrics):
+    values = metrics.as_dict()
+    assert values["completed"] == 1
+    assert values["busy_workers"] == 0
+
+    durations = values["durations"]
+    assert durations["export"]["sum"] == pytest.approx(0.25)
+    assert durations["import"]["sum"] == pytest.approx(0.5)
+    assert durations["worker"]["sum"] == pytest.approx(1.5)
+    assert durations["run"]["sum"] == pytest.approx(0.75)
+    assert durations["queue"]["count"] == 0
+
+    assert metrics.simulations_per_hour > 0.0
+    assert metrics.utilization == pytest.approx(1.0)
+
+
+def test_runnermetrics_to_prometheus(metrics):
+    text = metrics.to_prometheus()
+    assert "# TYPE pymontecarlo_runner_completed_total counter" in text
+    assert "pymontecarlo_runner_completed_total 1" in text
+    assert 'pymontecarlo_runner_stage_duration_seconds_count{stage="export"} 1' in text
+
+
+@pytest.mark.parametrize("filename", ["metrics.json", "metrics.prom"])
+def test_metricswriter(metrics, tmp_path, filename):
+    filepath = os.path.join(str(tmp_path), filename)
+
+    with MetricsWriter(metrics, filepath, interval=60.0):
+        pass
+
+    assert os.path.exists(filepath)
+
+    if filename.endswith(".json"):
+        with open(filepath, "r") as fp:
+            assert json.load(fp)["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_local_runner_metrics(event_loop, options):
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = 2000
+
+    runner = LocalSimulationRunner(max_workers=2)
+
+    async with runner:
+        await runner.submit(options, options2)
+
+    values = runner.metrics.as_dict()
+    assert values["queued"] == 2
+    assert values["completed"] == 2
+    assert values["failed"] == 0
+    assert values["queue_size"] == 0
+
+    durations = values["durations"]
+    for stage in ["queue", "export", "run", "import", "worker"]:
+        assert durations[stage]["count"] == 2
+    assert durations["recalculation"]["count"] >= 1
+
+    assert 0.0 < runner.metrics.utilization <= 1.0
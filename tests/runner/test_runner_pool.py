@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+import copy
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.runner.pool import ProcessPoolSimulationRunner
+from pymontecarlo.util.token import TokenState
+
+# Globals and constants variables.
+
+
+@pytest.fixture
+def runner():
+    return ProcessPoolSimulationRunner(max_workers=2)
+
+
+@pytest.mark.asyncio
+async def test_pool_runner_single_simulation(event_loop, runner, options):
+    assert len(runner.project.simulations) == 0
+    assert runner.token.state == TokenState.NOTSTARTED
+
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 1
+    assert len(runner.project.simulations[0].results) == 1
+    assert runner.token.state == TokenState.DONE
+
+    # Durations timed in the process of the pool
+    durations = runner.metrics.as_dict()["durations"]
+    for stage in ["export", "import", "worker"]:
+        assert durations[stage]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_runner_multiple_simulations(event_loop, runner, options):
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = 2000
+
+    options3 = copy.deepcopy(options)
+    options3.beam.energy_eV = 3000
+
+    async with runner:
+        await runner.submit(options, options2, options3)
+
+    assert len(runner.project.simulations) == 3
+    assert runner.token.state == TokenState.DONE
+
+
+@pytest.mark.asyncio
+async def test_pool_runner_cancel_immediately(event_loop, runner, options):
+    async with runner:
+        await runner.submit(options)
+        await runner.cancel()
+
+    assert len(runner.project.simulations) == 0
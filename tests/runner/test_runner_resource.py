@@ -0,0 +1,105 @@
+""""""
+
+# Standard library modules.
+import asyncio
+import collections
+import copy
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.runner.resource import ResourceManager, ResourceAllocation
+
+# Globals and constants variables.
+
+VirtualMemory = collections.namedtuple(
+    "VirtualMemory", ["total", "available", "percent"]
+)
+
+GB = 1024**3
+
+
+class ResourceManagerMock(ResourceManager):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.memory = VirtualMemory(16 * GB, 12 * GB, 25.0)
+
+    def _get_virtual_memory(self):
+        return self.memory
+
+
+@pytest.fixture
+def manager():
+    return ResourceManagerMock(
+        max_cores=2, reserved_memory_bytes=1 * GB, poll_interval=0.01
+    )
+
+
+def test_resourcemanager_can_admit(manager):
+    # Always admitted when nothing is running
+    assert manager.can_admit(2, 100 * GB)
+
+    manager._allocations.append(ResourceAllocation(1, 4 * GB))
+    assert manager.can_admit(1, 4 * GB)
+    assert not manager.can_admit(2, 0)
+    assert not manager.can_admit(1, 12 * GB)
+
+    # Memory pressure
+    manager.memory = VirtualMemory(16 * GB, 1 * GB, 95.0)
+    assert not manager.can_admit(1, 0)
+
+
+@pytest.mark.asyncio
+async def test_resourcemanager_acquire(event_loop, manager, options):
+    allocation1 = await manager.acquire(options)
+    allocation2 = await manager.acquire(options)
+    assert manager.used_cores == 2
+
+    task = asyncio.ensure_future(manager.acquire(options))
+    await asyncio.sleep(0.05)
+    assert not task.done()
+
+    await manager.release(allocation1)
+    allocation3 = await asyncio.wait_for(task, 1.0)
+    assert manager.used_cores == 2
+
+    await manager.release(allocation2)
+    await manager.release(allocation3)
+    assert manager.used_cores == 0
+
+
+@pytest.mark.asyncio
+async def test_resourcemanager_memory_pressure(event_loop, manager, options):
+    allocation = await manager.acquire(options)
+
+    manager.memory = VirtualMemory(16 * GB, 1 * GB, 95.0)
+    task = asyncio.ensure_future(manager.acquire(options))
+    await asyncio.sleep(0.05)
+    assert not task.done()
+
+    # Resumes once the memory is available again
+    manager.memory = VirtualMemory(16 * GB, 12 * GB, 25.0)
+    allocation2 = await asyncio.wait_for(task, 1.0)
+
+    await manager.release(allocation)
+    await manager.release(allocation2)
+
+
+@pytest.mark.asyncio
+async def test_local_runner_resources(event_loop, manager, options):
+    options2 = copy.deepcopy(options)
+    options2.beam.energy_eV = 2000
+
+    options3 = copy.deepcopy(options)
+    options3.beam.energy_eV = 3000
+
+    runner = LocalSimulationRunner(max_workers=3, resources=manager)
+    assert len(runner._dispatchers) == 3
+
+    async with runner:
+        await runner.submit(options, options2, options3)
+
+    assert len(runner.project.simulations) == 3
+    assert manager.used_cores == 0
@@ -0,0 +1,80 @@
+""""""
+
+# Standard library modules.
+import copy
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.options.analysis import KRatioAnalysis
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.runner.scheduler import (
+    SimulationScheduler,
+    SimulationPriorityQueue,
+    estimate_cost,
+)
+from pymontecarlo.simulation import Simulation
+
+# Globals and constants variables.
+
+
+def create_simulation(options, number_trajectories, energy_eV):
+    options = copy.deepcopy(options)
+    options.program.number_trajectories = number_trajectories
+    options.beam.energy_eV = energy_eV
+    return Simulation(options)
+
+
+def test_estimate_cost(options):
+    cost = estimate_cost(options)
+
+    options2 = copy.deepcopy(options)
+    options2.program.number_trajectories *= 10
+    assert estimate_cost(options2) == pytest.approx(cost * 10)
+
+    options3 = copy.deepcopy(options)
+    options3.beam.energy_eV *= 2
+    assert estimate_cost(options3) == pytest.approx(cost * 2)
+
+
+def test_simulationscheduler_fanout(options):
+    analysis = KRatioAnalysis(options.detectors[0])
+    options.analyses.append(analysis)
+    list_standard_options = analysis.apply(options)
+
+    scheduler = SimulationScheduler()
+    scheduler.register([Simulation(options)])
+
+    assert scheduler.get_fanout(options) == 0
+    for standard_options in list_standard_options:
+        assert scheduler.get_fanout(standard_options) == 1
+
+
+@pytest.mark.asyncio
+async def test_simulationpriorityqueue(event_loop, options):
+    small = create_simulation(options, 100, 10e3)
+    large = create_simulation(options, 1000, 10e3)
+    medium = create_simulation(options, 100, 20e3)
+
+    standard = create_simulation(options, 10, 10e3)
+    standard.options.tags.append("standard")
+
+    queue = SimulationPriorityQueue(SimulationScheduler())
+    for simulation in [small, large, medium, standard]:
+        await queue.put(simulation)
+
+    order = [await queue.get() for _ in range(4)]
+    assert order == [standard, large, medium, small]
+
+
+@pytest.mark.asyncio
+async def test_local_runner_scheduler(event_loop, options):
+    options.analyses.append(KRatioAnalysis(options.detectors[0]))
+
+    runner = LocalSimulationRunner(max_workers=2, scheduler=SimulationScheduler())
+
+    async with runner:
+        simulations = await runner.submit(options)
+
+    assert len(runner.project.simulations) == len(simulations)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+
+# Third party modules.
+import pytest
+import uncertainties
+
+# Local modules.
+from pymontecarlo.exceptions import WorkerError
+from pymontecarlo.mock import WorkerMock
+from pymontecarlo.runner.local import LocalSimulationRunner
+from pymontecarlo.runner.shard import (
+    split_options,
+    merge_results,
+    create_shard_group,
+)
+from pymontecarlo.options.analysis import KRatioAnalysis
+from pymontecarlo.results.photonintensity import (
+    EmittedPhotonIntensityResult,
+    EmittedPhotonIntensityResultBuilder,
+)
+from pymontecarlo.results.kratio import KRatioResultBuilder
+from pymontecarlo.simulation import Simulation
+import pymontecarlo.util.testutil as testutil
+
+# Globals and constants variables.
+
+
+class WorkerErrorMock(WorkerMock):
+    async def _run(self, token, simulation, outputdir):
+        raise WorkerError("failure")
+
+
+def test_split_options(options):
+    options.program.number_trajectories = 1001
+
+    list_options = split_options(options, 4)
+    assert len(list_options) == 4
+
+    assert sum(o.program.number_trajectories for o in list_options) == 1001
+    assert list_options[0].program.number_trajectories == 251
+    assert list_options[3].program.number_trajectories == 250
+    assert options.program.number_trajectories == 1001
+
+    for shard_options in list_options:
+        assert shard_options.beam == options.beam
+        assert shard_options.sample == options.sample
+
+    seeds = set(shard_options.program.seed for shard_options in list_options)
+    assert len(seeds) == 4
+
+
+def test_merge_results(options):
+    analysis = options.analyses[0]
+
+    builder = EmittedPhotonIntensityResultBuilder(analysis)
+    builder.add_intensity((29, "Ka1"), 1.0, 0.3)
+    result1 = builder.build()
+
+    builder = EmittedPhotonIntensityResultBuilder(analysis)
+    builder.add_intensity((29, "Ka1"), 2.0, 0.4)
+    result2 = builder.build()
+
+    results = merge_results([[result1], [result2]], [100, 300])
+    assert len(results) == 1
+
+    result = results[0]
+    assert isinstance(result, EmittedPhotonIntensityResult)
+    assert result.analysis == analysis
+
+    expected_n = (100 * 1.0 + 300 * 2.0) / 400
+    expected_s = ((100 * 0.3) ** 2 + (300 * 0.4) ** 2) ** 0.5 / 400
+    expected = uncertainties.ufloat(expected_n, expected_s)
+    testutil.assert_ufloats(result[(29, "Ka1")], expected)
+
+
+def test_merge_results_unsupported(options):
+    builder = KRatioResultBuilder(KRatioAnalysis(options.detectors[0]))
+    builder.add_kratio((29, "Ka1"), 1.0, 1.0)
+    result = builder.build()
+
+    with pytest.raises(ValueError):
+        merge_results([[result], [result]], [1, 1])
+
+
+def test_create_shard_group(options):
+    options.program.number_trajectories = 1000
+    simulation = Simulation(options, identifier="sim")
+
+    assert create_shard_group(simulation, 1000, 4) is None
+
+    group = create_shard_group(simulation, 300, 8)
+    assert len(group.shards) == 4
+    assert group.shards[0].identifier == "sim_shard1"
+
+    group = create_shard_group(simulation, 100, 3)
+    assert len(group.shards) == 3
+
+
+def test_create_shard_group_no_seed(options):
+    options.program.number_trajectories = 1000
+    del options.program.seed
+    simulation = Simulation(options, identifier="sim")
+
+    assert create_shard_group(simulation, 300, 8) is None
+
+
+@pytest.mark.asyncio
+async def test_local_runner_shard(event_loop, options):
+    options.program.number_trajectories = 1000
+    runner = LocalSimulationRunner(max_workers=3, shard_trajectories=400)
+
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 1
+
+    simulation = runner.project.simulations[0]
+    assert simulation.options.program.number_trajectories == 1000
+    assert len(simulation.find_result(EmittedPhotonIntensityResult)) == 1
+
+
+@pytest.mark.asyncio
+async def test_local_runner_shard_failed(event_loop, options):
+    options.program.number_trajectories = 1000
+    options.program._worker = WorkerErrorMock()
+    runner = LocalSimulationRunner(max_workers=3, shard_trajectories=400)
+
+    async with runner:
+        await runner.submit(options)
+
+    assert len(runner.project.simulations) == 0
+
+    # Only the first failed shard is recorded
+    assert len(runner.failed_simulations) == 1
+    assert runner.failed_simulations[0].simulation.options is options
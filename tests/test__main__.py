@@ -8,6 +8,7 @@ import subprocess
 # Third party modules.
 
 # Local modules.
+from pymontecarlo.project import Project
 
 # Globals and constants variables.
 
@@ -17,3 +18,70 @@ def test__main__():
     process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     out = process.stdout.decode("ascii")
     assert out.startswith("usage: pymontecarlo")
+
+
+SWEEP = """
+import math
+from pymontecarlo.mock import ProgramMock
+from pymontecarlo.options import Material, OptionsBuilder
+from pymontecarlo.options.beam import GaussianBeam
+from pymontecarlo.options.sample import SubstrateSample
+from pymontecarlo.options.detector import PhotonDetector
+from pymontecarlo.options.analysis import PhotonIntensityAnalysis
+
+detector = PhotonDetector("xray", math.radians(40.0))
+
+builder = OptionsBuilder()
+builder.add_program(ProgramMock())
+builder.add_beam(GaussianBeam(10e3, 10e-9))
+builder.add_beam(GaussianBeam(15e3, 10e-9))
+builder.add_sample(SubstrateSample(Material.pure(29)))
+builder.add_analysis(PhotonIntensityAnalysis(detector))
+"""
+
+
+def test__main__run(tmp_path):
+    sweep_filepath = tmp_path / "sweep.py"
+    sweep_filepath.write_text(SWEEP)
+    project_filepath = tmp_path / "project.h5"
+
+    args = [sys.executable, "-m", "pymontecarlo", "run", str(sweep_filepath)]
+    args += ["-o", str(project_filepath), "-n", "2"]
+    process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert process.returncode == 0, process.stderr.decode("utf8")
+    assert "2 done, 0 failed" in process.stderr.decode("utf8")
+
+    project = Project.read(str(project_filepath))
+    assert len(project.simulations) == 2
+
+    # Skip existing simulations
+    args.append("-s")
+    process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert process.returncode == 0, process.stderr.decode("utf8")
+    assert "0 done, 0 failed" in process.stderr.decode("utf8")
+
+    project = Project.read(str(project_filepath))
+    assert len(project.simulations) == 2
+
+
+def test__main__run_existing_output(tmp_path):
+    sweep_filepath = tmp_path / "sweep.py"
+    sweep_filepath.write_text(SWEEP)
+    project_filepath = tmp_path / "project.h5"
+    project_filepath.write_bytes(b"existing")
+
+    # Refused, without erasing the existing file
+    args = [sys.executable, "-m", "pymontecarlo", "run", str(sweep_filepath)]
+    args += ["-o", str(project_filepath), "-n", "2"]
+    process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert process.returncode == 2
+    assert "already exists" in process.stderr.decode("utf8")
+    assert project_filepath.read_bytes() == b"existing"
+
+    # Replaced
+    args.append("--overwrite")
+    process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert process.returncode == 0, process.stderr.decode("utf8")
+
+    project = Project.read(str(project_filepath))
+    assert len(project.simulations) == 2
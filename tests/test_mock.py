@@ -0,0 +1,130 @@
+""""""
+
+# Standard library modules.
+import os
+import time
+import random
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.exceptions import WorkerError, WorkerTimeoutError
+from pymontecarlo.mock import (
+    ProgramMock,
+    LoadWorkerMock,
+    WorkerMock,
+    Distribution,
+    ConstantDistribution,
+    UniformDistribution,
+    NormalDistribution,
+    LogNormalDistribution,
+    ExponentialDistribution,
+)
+from pymontecarlo.runner.fault import run_with_timeout
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.token import Token, TokenState
+
+# Globals and constants variables.
+
+
+def create_simulation(options, worker):
+    options.program._worker = worker
+    return Simulation(options)
+
+
+def test_programmock_worker():
+    assert isinstance(ProgramMock().worker, WorkerMock)
+
+    worker = LoadWorkerMock()
+    assert ProgramMock(worker=worker).worker is worker
+
+
+@pytest.mark.parametrize(
+    "distribution,low,high",
+    [
+        (ConstantDistribution(2.0), 2.0, 2.0),
+        (UniformDistribution(1.0, 3.0), 1.0, 3.0),
+        (NormalDistribution(1.0, 5.0), 0.0, float("inf")),
+        (LogNormalDistribution(1.0, 0.5), 0.0, float("inf")),
+        (ExponentialDistribution(1.0), 0.0, float("inf")),
+    ],
+)
+def test_distribution(distribution, low, high):
+    rng = random.Random(0)
+    for _ in range(100):
+        assert low <= distribution.sample(rng) <= high
+
+
+def test_distribution_abstract():
+    class IncompleteDistribution(Distribution):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteDistribution()
+
+
+def test_loadworkermock_sample_load():
+    worker = LoadWorkerMock(
+        runtime_s=UniformDistribution(1.0, 2.0), memory_bytes=100, seed=0
+    )
+    runtime_s, cpu_s, memory_bytes, output_bytes = worker.sample_load()
+
+    assert 1.0 <= runtime_s <= 2.0
+    assert cpu_s == 0.0
+    assert memory_bytes == 100
+    assert output_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_loadworkermock_no_load(event_loop, options, tmp_path):
+    simulation = create_simulation(options, LoadWorkerMock())
+    token = Token("test")
+
+    await simulation.options.program.worker.run(token, simulation, str(tmp_path))
+
+    assert token.state == TokenState.DONE
+    assert len(simulation.results) == 1
+    assert not os.path.exists(tmp_path / LoadWorkerMock.OUTPUT_FILENAME)
+
+
+@pytest.mark.asyncio
+async def test_loadworkermock_load(event_loop, options, tmp_path):
+    worker = LoadWorkerMock(
+        runtime_s=0.2, cpu_s=0.05, memory_bytes=1024**2, output_bytes=3000
+    )
+    simulation = create_simulation(options, worker)
+
+    start = time.monotonic()
+    await worker.run(Token("test"), simulation, str(tmp_path))
+
+    assert time.monotonic() - start >= 0.2
+    assert len(simulation.results) == 1
+    filepath = tmp_path / LoadWorkerMock.OUTPUT_FILENAME
+    assert os.path.getsize(filepath) == 3000
+
+
+@pytest.mark.asyncio
+async def test_loadworkermock_failure(event_loop, options, tmp_path):
+    worker = LoadWorkerMock(failure_probability=1.0)
+    simulation = create_simulation(options, worker)
+    token = Token("test")
+
+    with pytest.raises(WorkerError):
+        await worker.run(token, simulation, str(tmp_path))
+
+    assert token.state == TokenState.ERROR
+
+
+@pytest.mark.asyncio
+async def test_loadworkermock_timeout(event_loop, options, tmp_path):
+    worker = LoadWorkerMock(timeout_probability=1.0, hang_s=30.0)
+    simulation = create_simulation(options, worker)
+
+    start = time.monotonic()
+    with pytest.raises(WorkerTimeoutError):
+        await run_with_timeout(
+            worker.run(Token("test"), simulation, str(tmp_path)), 0.5
+        )
+
+    assert time.monotonic() - start < 10.0
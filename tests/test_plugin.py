@@ -0,0 +1,130 @@
+""""""
+
+# Standard library modules.
+import os
+import sys
+import json
+
+# Third party modules.
+import pytest
+
+# Local modules.
+import pymontecarlo
+from pymontecarlo.plugin import PluginRegistry, GROUP_PROGRAMS, GROUP_PLUGINS
+
+# Globals and constants variables.
+
+ENTRY_POINTS = """
+[pymontecarlo.programs]
+dummy = pymontecarlo_epdummy.program:DummyProgram
+
+[pymontecarlo.plugins]
+epdummy = pymontecarlo_epdummy
+"""
+
+
+@pytest.fixture
+def plugindir(tmp_path, monkeypatch):
+    # Package with entry points
+    packagedir = tmp_path / "pymontecarlo_epdummy"
+    packagedir.mkdir()
+    (packagedir / "__init__.py").write_text("")
+    (packagedir / "program.py").write_text("class DummyProgram:\n    pass\n")
+
+    distinfodir = tmp_path / "pymontecarlo_epdummy-1.0.dist-info"
+    distinfodir.mkdir()
+    (distinfodir / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: pymontecarlo-epdummy\nVersion: 1.0\n"
+    )
+    (distinfodir / "entry_points.txt").write_text(ENTRY_POINTS)
+
+    # Legacy module, without entry points
+    (tmp_path / "pymontecarlo_legacydummy.py").write_text("VALUE = 1\n")
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    yield tmp_path
+
+    for name in [
+        "pymontecarlo_epdummy",
+        "pymontecarlo_epdummy.program",
+        "pymontecarlo_legacydummy",
+    ]:
+        sys.modules.pop(name, None)
+
+
+@pytest.fixture
+def registry(plugindir, tmp_path_factory):
+    manifest_filepath = tmp_path_factory.mktemp("cache") / "plugins.json"
+    return PluginRegistry(str(manifest_filepath))
+
+
+def test_registry_discover(registry):
+    manifest = registry.manifest
+
+    assert manifest["entry_points"][GROUP_PROGRAMS]["dummy"] == (
+        "pymontecarlo_epdummy.program:DummyProgram"
+    )
+    assert "epdummy" in manifest["entry_points"][GROUP_PLUGINS]
+    assert "pymontecarlo_legacydummy" in manifest["modules"]
+    assert "pymontecarlo_epdummy" not in manifest["modules"]
+
+    assert list(registry.iter_program_names()) == ["dummy"]
+    assert "pymontecarlo_legacydummy" in registry.iter_plugin_names()
+
+    # Nothing imported
+    assert "pymontecarlo_epdummy" not in sys.modules
+    assert "pymontecarlo_legacydummy" not in sys.modules
+
+
+def test_registry_get_program_class(registry):
+    clasz = registry.get_program_class("dummy")
+    assert clasz.__name__ == "DummyProgram"
+    assert registry.get_program_class("dummy") is clasz
+
+    with pytest.raises(KeyError):
+        registry.get_program_class("unknown")
+
+
+def test_registry_load_plugins(registry):
+    plugins = registry.load_plugins()
+
+    assert plugins["pymontecarlo_legacydummy"].VALUE == 1
+    assert plugins["epdummy"].__name__ == "pymontecarlo_epdummy"
+    assert "pymontecarlo_epdummy.program" in sys.modules
+    assert registry.load_plugins() is plugins
+
+
+def test_registry_manifest_cache(registry, plugindir):
+    registry.manifest
+    assert os.path.exists(registry.manifest_filepath)
+
+    # Cached manifest is used when nothing changed
+    with open(registry.manifest_filepath, "r") as fp:
+        manifest = json.load(fp)
+    manifest["modules"].append("pymontecarlo_cached")
+    with open(registry.manifest_filepath, "w") as fp:
+        json.dump(manifest, fp)
+
+    other = PluginRegistry(registry.manifest_filepath)
+    assert "pymontecarlo_cached" in other.manifest["modules"]
+
+    # Discovered again after a change of a directory
+    stat = os.stat(plugindir)
+    os.utime(plugindir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    other = PluginRegistry(registry.manifest_filepath)
+    assert "pymontecarlo_cached" not in other.manifest["modules"]
+    assert "pymontecarlo_legacydummy" in other.manifest["modules"]
+
+
+def test_registry_no_cache(plugindir):
+    registry = PluginRegistry()
+    assert "pymontecarlo_legacydummy" in registry.manifest["modules"]
+
+
+def test_pymontecarlo_plugins():
+    assert isinstance(pymontecarlo.pymontecarlo_plugins, dict)
+
+    with pytest.raises(AttributeError):
+        pymontecarlo.unknown_attribute
@@ -2,14 +2,29 @@
 """ """
 
 # Standard library modules.
+import os
+import copy
+import time
+import math
+import asyncio
+import threading
 
 # Third party modules.
+import pytest
 
 # Local modules.
+from pymontecarlo.options.analysis import PhotonIntensityAnalysis, KRatioAnalysis
+from pymontecarlo.options.material import Material
+from pymontecarlo.project import Project, ProjectWriter
+from pymontecarlo.results.kratio import KRatioResult
 from pymontecarlo.results.photonintensity import (
     EmittedPhotonIntensityResult,
     GeneratedPhotonIntensityResult,
+    GeneratedPhotonIntensityResultBuilder,
+    EmittedPhotonIntensityResultBuilder,
 )
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.token import Token, TokenState
 import pymontecarlo.util.testutil as testutil
 
 # Globals and constants variables.
@@ -111,3 +126,223 @@ def test_project_create_results_dataframe_with_two_results(project, settings):
 #    p = Project.read(filepath)
 #    self.assertEqual(3, len(p.simulations))
 #    self.assertEqual(3, len(p.result_classes))
+
+
+def test_projectwriter(project, simulation, tmp_path):
+    project = copy.deepcopy(project)
+    filepath = str(tmp_path / "project.h5")
+
+    with ProjectWriter(project, filepath, flush_interval=0.0):
+        sim4 = copy.deepcopy(simulation)
+        sim4.options.beam.energy_eV = 5e3
+        project.add_simulation(sim4)
+
+    project2 = Project.read(filepath)
+    assert len(project2.simulations) == 4
+    assert len(project2.result_classes) == 3
+
+
+def test_projectwriter_append_results(project, tmp_path):
+    project = copy.deepcopy(project)
+    filepath = str(tmp_path / "project.h5")
+
+    with ProjectWriter(project, filepath):
+        sim1 = project.simulations[0]
+        analysis = PhotonIntensityAnalysis(sim1.options.detectors[0])
+        builder = GeneratedPhotonIntensityResultBuilder(analysis)
+        builder.add_intensity((29, "Ka1"), 10.0, 0.1)
+        sim1.results.append(builder.build())
+        project.simulation_recalculated.send(sim1)
+
+        # Already written results are not written twice
+        project.simulation_recalculated.send(sim1)
+
+    project2 = Project.read(filepath)
+    assert len(project2.simulations) == 3
+    identifiers = [s.identifier for s in project2.simulations]
+    sim1_2 = project2.simulations[identifiers.index(sim1.identifier)]
+    assert len(sim1_2.results) == len(sim1.results)
+
+
+def test_projectwriter_checkpoint(project, simulation, tmp_path):
+    project = copy.deepcopy(project)
+    filepath = str(tmp_path / "project.h5")
+
+    # Existing file is not truncated before the first checkpoint
+    with open(filepath, "wb") as fp:
+        fp.write(b"existing")
+
+    writer = ProjectWriter(project, filepath, flush_interval=60.0)
+    with writer:
+        with open(filepath, "rb") as fp:
+            assert fp.read() == b"existing"
+
+        # Checkpoint while the writer is open
+        writer._queue.put(project.simulations[0])
+        writer.flush_interval = 0.0
+        writer._queue.put(project.simulations[0])
+
+        for _ in range(100):
+            if not writer._changed:
+                break
+            time.sleep(0.05)
+
+        assert len(Project.read(filepath).simulations) == 3
+
+        sim4 = copy.deepcopy(simulation)
+        sim4.options.beam.energy_eV = 5e3
+        project.add_simulation(sim4)
+
+    assert len(Project.read(filepath).simulations) == 4
+    assert not os.path.exists(writer.working_filepath)
+
+
+def test_projectwriter_no_filepath(project):
+    with pytest.raises(RuntimeError):
+        ProjectWriter(project)
+
+
+@pytest.fixture
+def kratio_simulations(options):
+    analysis = KRatioAnalysis(options.detectors[0])
+
+    unkoptions = copy.deepcopy(options)
+    unkoptions.sample.material = Material.from_formula("CaSiO4")
+    unkoptions.analyses.append(analysis)
+    list_standard_options = analysis.apply(unkoptions)
+
+    def create_simulation(options, identifier):
+        builder = EmittedPhotonIntensityResultBuilder(analysis)
+        for z, wf in options.sample.material.composition.items():
+            builder.add_intensity((z, "Ka"), wf * 1e3, math.sqrt(wf * 1e3))
+        return Simulation(options, [builder.build()], identifier)
+
+    unksim = create_simulation(unkoptions, "unknown")
+    stdsims = [
+        create_simulation(options, "standard{}".format(i))
+        for i, options in enumerate(list_standard_options)
+    ]
+    return unksim, stdsims
+
+
+@pytest.mark.asyncio
+async def test_project_recalculate_standards_added_later(
+    event_loop, kratio_simulations
+):
+    unksim, stdsims = kratio_simulations
+    project = Project()
+
+    project.add_simulation(unksim)
+    await project.recalculate()
+    assert not project.recalculate_required
+    assert len(unksim.find_result(KRatioResult)) == 0
+
+    for stdsim in stdsims:
+        project.add_simulation(stdsim)
+    assert project.recalculate_required
+
+    await project.recalculate()
+    results = unksim.find_result(KRatioResult)
+    assert len(results) == 1
+    assert len(results[0]) == 3
+
+
+@pytest.mark.asyncio
+async def test_project_recalculate_only_dirty(
+    event_loop, kratio_simulations, monkeypatch
+):
+    unksim, stdsims = kratio_simulations
+    project = Project()
+
+    calls = []
+    calculate_many = KRatioAnalysis.calculate_many
+
+    def counting_calculate_many(cls, items):
+        calls.extend(items)
+        return calculate_many(items)
+
+    monkeypatch.setattr(
+        KRatioAnalysis, "calculate_many", classmethod(counting_calculate_many)
+    )
+
+    for simulation in stdsims + [unksim]:
+        project.add_simulation(simulation)
+    await project.recalculate()
+
+    # Only the standards are given to the analysis
+    assert len(calls) == 1
+    assert calls[0][1].identifier == unksim.identifier
+    assert len(calls[0][2]) == len(stdsims)
+    assert len(unksim.find_result(KRatioResult)) == 1
+
+    # Nothing changed
+    token = Token("recalculate")
+    await project.recalculate(token)
+    assert token.state == TokenState.DONE
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_project_recalculate_add_simulation_meanwhile(
+    event_loop, kratio_simulations, monkeypatch
+):
+    unksim, stdsims = kratio_simulations
+    project = Project()
+
+    started = threading.Event()
+    release = threading.Event()
+    calculate_many = KRatioAnalysis.calculate_many
+
+    def blocking_calculate_many(cls, items):
+        started.set()
+        release.wait(10)
+        return calculate_many(items)
+
+    monkeypatch.setattr(
+        KRatioAnalysis, "calculate_many", classmethod(blocking_calculate_many)
+    )
+
+    for simulation in stdsims + [unksim]:
+        project.add_simulation(simulation)
+    task = asyncio.ensure_future(project.recalculate())
+
+    while not started.is_set():
+        await asyncio.sleep(0.01)
+
+    # The event loop is not blocked by the calculations
+    newsim = copy.deepcopy(unksim)
+    newsim.options.beam.energy_eV += 1e3
+    newsim.results.clear()
+    project.add_simulation(newsim)
+    assert len(unksim.find_result(KRatioResult)) == 0
+
+    release.set()
+    await task
+
+    assert len(unksim.find_result(KRatioResult)) == 1
+    assert len(project.simulations) == len(stdsims) + 2
+    assert project.recalculate_required
+
+
+def test_project_add_simulation_duplicate(project):
+    project = copy.deepcopy(project)
+    simulation = copy.deepcopy(project.simulations[0])
+
+    project.add_simulation(simulation)
+    assert len(project.simulations) == 3
+
+
+def test_project_find_simulation(project, options):
+    project = copy.deepcopy(project)
+    assert project.find_simulation(project.simulations[0].options) is (
+        project.simulations[0]
+    )
+
+    options = copy.deepcopy(options)
+    options.beam.energy_eV = 123.0
+    assert project.find_simulation(options) is None
+
+    # Simulations appended directly to the list are also found
+    simulation = Simulation(options)
+    project.simulations.append(simulation)
+    assert project.find_simulation(options) is simulation
@@ -0,0 +1,40 @@
+""""""
+
+# Standard library modules.
+import os
+
+# Third party modules.
+import pytest
+
+# Local modules.
+import pymontecarlo.util.fileio as fileio
+
+# Globals and constants variables.
+
+
+@pytest.mark.asyncio
+async def test_fileio(event_loop, tmp_path):
+    dirpath = os.path.join(str(tmp_path), "a", "b")
+    assert not await fileio.exists(dirpath)
+
+    await fileio.makedirs(dirpath)
+    assert await fileio.exists(dirpath)
+    assert await fileio.listdir(dirpath) == []
+
+    await fileio.rmtree(os.path.join(str(tmp_path), "a"))
+    assert not await fileio.exists(dirpath)
+
+
+@pytest.mark.asyncio
+async def test_fileio_mkdtemp(event_loop):
+    dirpath = await fileio.mkdtemp()
+    assert os.path.isdir(dirpath)
+
+    with open(os.path.join(dirpath, "file.txt"), "w") as fp:
+        fp.write("abc")
+
+    future = fileio.rmtree_later(dirpath)
+    fileio.wait_removals()
+
+    assert future.done()
+    assert not os.path.exists(dirpath)
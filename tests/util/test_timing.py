@@ -0,0 +1,48 @@
+""""""
+
+# Standard library modules.
+import time
+
+# Third party modules.
+import pytest
+
+# Local modules.
+from pymontecarlo.util.timing import record_timings, timed, add_timings
+
+# Globals and constants variables.
+
+
+def test_timed():
+    with record_timings() as timings:
+        with timed("export"):
+            time.sleep(0.01)
+        with timed("export"):
+            pass
+
+    assert timings["export"] >= 0.01
+
+
+def test_timed_nested():
+    with record_timings() as timings:
+        with timed("worker"):
+            with timed("worker"):
+                time.sleep(0.01)
+            with timed("worker"):
+                time.sleep(0.01)
+
+    assert 0.02 <= timings["worker"] < 0.04
+
+
+def test_timed_outside_record_timings():
+    with timed("worker"):
+        pass
+
+
+def test_add_timings():
+    with record_timings() as timings:
+        with timed("export"):
+            pass
+        add_timings({"export": 1.0, "import": 2.0})
+
+    assert timings["export"] == pytest.approx(1.0, abs=0.01)
+    assert timings["import"] == pytest.approx(2.0)
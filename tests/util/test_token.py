@@ -3,6 +3,7 @@
 # Standard library modules.
 
 # Third party modules.
+import pytest
 
 # Local modules.
 from pymontecarlo.util.token import Token, TokenState, TqdmToken
@@ -162,3 +163,92 @@ def test_tqdm_subtoken(capsys):
     assert capsys.readouterr().err.strip().startswith("subtest:")
 
     subtoken.done()
+
+
+def test_subtoken_nested():
+    token = Token("test")
+    subtoken = token.create_subtoken("subtest")
+    subsubtoken1 = subtoken.create_subtoken("subsubtest1")
+    subsubtoken2 = subtoken.create_subtoken("subsubtest2")
+
+    subtoken.start()
+    subsubtoken1.update(0.5, "progress made in subsubtest1")
+
+    assert token.state == TokenState.RUNNING
+    assert token.progress == pytest.approx((0.01 + 0.5) / 2)
+    assert token.status == "progress made in subsubtest1"
+
+    subsubtoken1.done()
+    subsubtoken2.error("failed")
+    subtoken.done()
+
+    assert token.state == TokenState.ERROR
+    assert token.progress == pytest.approx(1.0)
+    assert token.status == "Done"
+    assert subtoken.get_state_counts() == {
+        TokenState.DONE: 1,
+        TokenState.ERROR: 1,
+    }
+
+
+def test_subtoken_collapse_finished():
+    token = Token("test", collapse_finished=True)
+    subtokens = [token.create_subtoken("subtest{}".format(i)) for i in range(1000)]
+
+    assert token.get_state_counts() == {TokenState.NOTSTARTED: 1000}
+
+    for subtoken in subtokens[:999]:
+        subtoken.start()
+        subtoken.done()
+
+    assert token.get_subtokens() == [subtokens[999]]
+    assert token.get_state_counts() == {
+        TokenState.DONE: 999,
+        TokenState.NOTSTARTED: 1,
+    }
+    assert token.state == TokenState.NOTSTARTED
+    assert token.progress == pytest.approx(1.0)
+
+    subtokens[999].cancel()
+
+    assert token.get_subtokens() == []
+    assert token.state == TokenState.CANCELLED
+    assert token.status == "Cancelled"
+
+
+def test_subtoken_collapse_finished_not_inherited():
+    token = Token("test", collapse_finished=True)
+    subtoken = token.create_subtoken("subtest")
+    subsubtoken = subtoken.create_subtoken("subsubtest")
+
+    subsubtoken.start()
+    subsubtoken.done()
+
+    assert subtoken.get_subtokens() == [subsubtoken]
+
+
+def test_subtoken_reset():
+    token = Token("test")
+    subtoken = token.create_subtoken("subtest")
+    subtoken.create_subtoken("subsubtest").update(0.5, "progress")
+    subtoken.update(0.5, "progress")
+
+    subtoken.reset()
+
+    assert subtoken.get_subtokens() == []
+    assert token.state == TokenState.NOTSTARTED
+    assert token.progress == 0.0
+
+
+def test_token_state_counts_with_category():
+    token = Token("test")
+    token.create_subtoken("subtest1", "cat1").done()
+    token.create_subtoken("subtest2", "cat1").start()
+    token.create_subtoken("subtest3", "cat2").done()
+
+    assert token.get_state_counts() == {TokenState.DONE: 2, TokenState.RUNNING: 1}
+    assert token.get_state_counts("cat1") == {
+        TokenState.DONE: 1,
+        TokenState.RUNNING: 1,
+    }
+    assert token.get_state_counts("cat2") == {TokenState.DONE: 1}
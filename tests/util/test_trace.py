@@ -0,0 +1,127 @@
+""""""
+
+# Standard library modules.
+import os
+import sys
+import json
+import subprocess
+
+# Third party modules.
+import pytest
+
+# Local modules.
+import pymontecarlo.util.trace as trace
+from pymontecarlo.mock import WorkerMock
+from pymontecarlo.simulation import Simulation
+from pymontecarlo.util.token import Token
+
+# Globals and constants variables.
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = trace.enable_tracing(str(tmp_path / "trace.json"))
+    yield tracer
+    trace.disable_tracing()
+
+
+def _get_spans(tracer):
+    return [event for event in tracer.as_dict()["traceEvents"] if event["ph"] == "X"]
+
+
+def test_span_disabled():
+    assert not trace.is_tracing_enabled()
+
+    with trace.span("test", simulation="abc"):
+        pass
+
+    assert trace.get_tracer() is None
+
+
+def test_span(tracer):
+    with trace.span("outer", simulation="abc"):
+        with trace.span("inner"):
+            pass
+
+    with trace.span("other"):
+        pass
+
+    spans = _get_spans(tracer)
+    assert [span["name"] for span in spans] == ["inner", "outer", "other"]
+    assert spans[0]["args"] == {"simulation": "abc"}
+    assert spans[1]["args"] == {"simulation": "abc"}
+    assert spans[2]["args"] == {}
+    assert spans[1]["ts"] <= spans[0]["ts"]
+    assert spans[1]["dur"] >= spans[0]["dur"]
+
+
+def test_traced(tracer):
+    @trace.traced()
+    def func(value):
+        return value * 2
+
+    @trace.traced("other")
+    def func2():
+        pass
+
+    assert func(2) == 4
+    func2()
+
+    assert func.__name__ == "func"
+    assert [span["name"] for span in _get_spans(tracer)] == ["func", "other"]
+
+
+def test_disable_tracing(tracer):
+    with trace.span("test"):
+        pass
+
+    assert trace.disable_tracing() is tracer
+    assert not trace.is_tracing_enabled()
+
+    with open(tracer.filepath, "r") as fp:
+        data = json.load(fp)
+
+    names = [event["name"] for event in data["traceEvents"]]
+    assert "test" in names
+    assert "thread_name" in names
+
+
+def test_write_forked(tracer):
+    # Tracer copied in a forked child process
+    tracer.pid = -1
+    tracer.write()
+
+    assert not os.path.exists(tracer.filepath)
+
+
+def test_environ_child_process(tmp_path):
+    filepath = tmp_path / "trace.json"
+    env = dict(os.environ, **{trace.ENVIRON_TRACE: str(filepath)})
+    code = (
+        "import multiprocessing\n"
+        "import pymontecarlo.util.trace as trace\n"
+        "with multiprocessing.get_context('spawn').Pool(1) as pool:\n"
+        "    print(trace.is_tracing_enabled(), pool.apply(trace.is_tracing_enabled))\n"
+    )
+
+    process = subprocess.run(
+        [sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, check=True
+    )
+
+    assert process.stdout.decode("utf8").split() == ["True", "False"]
+    with open(filepath, "r") as fp:
+        assert "traceEvents" in json.load(fp)
+
+
+@pytest.mark.asyncio
+async def test_span_worker(event_loop, tracer, options, tmpdir):
+    worker = WorkerMock()
+    simulation = Simulation(options, identifier="sim1")
+
+    await worker.run(Token("test"), simulation, tmpdir)
+
+    spans = dict((span["name"], span) for span in _get_spans(tracer))
+    for name in ["export", "worker", "import"]:
+        assert spans[name]["args"]["simulation"] == "sim1"
+
+    assert spans["export"]["tid"] == spans["worker"]["tid"]